@@ -0,0 +1,100 @@
+import logging
+from typing import List, Mapping, Optional
+from .dogstatsd import statsd
+from .metrics import record_body_rejected
+from .models import ErrorResponse
+from .responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+class BodySizeLimitMiddleware:
+    """Pure ASGI middleware answering 413 for request bodies over a per-route limit.
+
+    A ``Content-Length`` over the limit is rejected before any of the body
+    is read. Otherwise (chunked uploads, or a client that under-declares)
+    the body is read here chunk by chunk and the request is rejected as soon
+    as the running total crosses the limit, so an oversized body is never
+    buffered whole, parsed or validated. An accepted body is replayed to the
+    app as a single message. ``route_limits`` maps exact paths to their own
+    limit; a limit of 0 disables the check.
+    """
+
+    def __init__(self, app, default_limit: int, route_limits: Optional[Mapping[str, int]] = None):
+        self.app = app
+        self.default_limit = default_limit
+        self.route_limits = dict(route_limits or {})
+
+    def limit_for(self, path: str) -> int:
+        return self.route_limits.get(path, self.default_limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        if limit <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = _content_length(scope)
+        if content_length is not None and content_length > limit:
+            await self._reject(scope, receive, send, limit, content_length)
+            return
+
+        chunks: List[bytes] = []
+        received = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunk = message.get("body", b"")
+            received += len(chunk)
+            if received > limit:
+                await self._reject(scope, receive, send, limit, received)
+                return
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Later calls wait for the client to go away, as with the real receive.
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    async def _reject(self, scope, receive, send, limit: int, rejected_bytes: int) -> None:
+        route = scope["path"] if scope["path"] in self.route_limits else "default"
+        logger.warning(
+            f"Rejecting {scope['method']} {scope['path']}: body of at least {rejected_bytes} bytes exceeds {limit}"
+        )
+        record_body_rejected(route, rejected_bytes)
+        statsd.increment("request.body_rejected", 1, (f"route:{route}",))
+        statsd.increment("request.body_rejected_bytes", rejected_bytes, (f"route:{route}",))
+        response = FastJSONResponse(
+            status_code=413,
+            # Close the connection rather than reading the rest of the body.
+            headers={"Connection": "close"},
+            content={"detail": ErrorResponse(
+                error="Request body too large",
+                detail=f"Request bodies for this endpoint are limited to {limit} bytes",
+                error_code="PAYLOAD_TOO_LARGE"
+            ).model_dump()}
+        )
+        await response(scope, receive, send)
+
+def _content_length(scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
@@ -1,9 +1,15 @@
+from functools import lru_cache
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
-from typing import Optional
-import os
-from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
 
-load_dotenv()
+class UpstreamTarget(BaseModel):
+    """One endpoint serving a routed model: a base URL, key and/or deployment."""
+    base_url: Optional[str] = None
+    api_key: Optional[str] = None
+    # Model or deployment name sent upstream (defaults to the requested one)
+    model: Optional[str] = None
+    name: Optional[str] = None
 
 class Settings(BaseSettings):
     openai_api_key: str
@@ -14,6 +20,137 @@ class Settings(BaseSettings):
     port: int = 8000
     log_level: str = "INFO"
 
+    # Gunicorn workers: 0 derives the count from the container's CPU quota
+    workers: int = 0
+    workers_per_cpu: float = 1.0
+    max_workers: int = 32
+    # Worker recycling: a worker retires after max_requests (+ jitter), drains
+    # in-flight requests for up to graceful_timeout and is replaced beforehand
+    max_requests: int = 1000
+    max_requests_jitter: int = 100
+    graceful_timeout: int = 60
+
+    # /readyz: dependency checks run in the background every interval and
+    # cached, each bounded by the timeout
+    readiness_interval: float = 15.0
+    readiness_timeout: float = 5.0
+
+    # Per-worker load shedding: requests beyond max_concurrency queue briefly,
+    # then get a 503 (0 disables the limit)
+    worker_max_concurrency: int = 100
+    worker_max_queue: int = 100
+    worker_queue_timeout: float = 5.0
+
+    # Request body size limits in bytes (413 before the body is parsed), with
+    # per-path overrides as JSON; 0 disables the check
+    max_request_body_bytes: int = 1024 * 1024
+    route_body_limits: Dict[str, int] = {"/chat/batch": 16 * 1024 * 1024, "/chat/batch/stream": 16 * 1024 * 1024}
+
+    # Access log: 4xx/5xx always logged, successful requests sampled
+    access_log_enabled: bool = True
+    access_log_sample_rate: float = 1.0
+    # Write log records from a background thread instead of the event loop
+    log_queue_enabled: bool = True
+
+    # Prometheus /metrics; gunicorn workers share samples through this directory
+    metrics_enabled: bool = True
+    metrics_multiproc_dir: str = "/tmp/fastapi-openai-gateway-metrics"
+
+    # DogStatsD: aggregated per flush interval, sent as batched UDP datagrams
+    dogstatsd_enabled: bool = False
+    dogstatsd_host: str = "127.0.0.1"
+    dogstatsd_port: int = 8125
+    dogstatsd_prefix: str = "fastapi_openai_gateway"
+    dogstatsd_tags: str = ""
+    dogstatsd_flush_interval: float = 10.0
+    dogstatsd_max_packet_size: int = 1432
+
+    # Upstream OpenAI HTTP connection pool (one pool per worker process)
+    openai_base_url: Optional[str] = None
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry: float = 30.0
+    openai_connect_timeout: float = 5.0
+    openai_read_timeout: float = 25.0
+    openai_write_timeout: float = 10.0
+    openai_pool_timeout: float = 5.0
+    # Open one upstream connection per worker at startup
+    upstream_warmup: bool = True
+    upstream_warmup_timeout: float = 5.0
+
+    # Multi-endpoint routing: logical model name -> upstream targets, as JSON,
+    # e.g. {"gpt-4o": [{"base_url": "https://eu.example/v1"}, {"base_url": ...}]}.
+    # Models without a route use the default client above.
+    upstream_routes: Dict[str, List[UpstreamTarget]] = {}
+    routing_ewma_alpha: float = 0.3
+    routing_stale_seconds: float = 30.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0
+
+    # Completion cache for deterministic (temperature=0) requests
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 300.0
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 16 * 1024 * 1024
+    cache_shared_path: Optional[str] = None
+    cache_shared_max_entries: int = 10000
+
+    # Collapse identical in-flight chat requests into one upstream call
+    coalesce_requests: bool = True
+
+    # /chat/batch fan-out
+    batch_max_items: int = 1000
+    batch_concurrency: int = 8
+    batch_max_concurrency: int = 32
+
+    # Client-side upstream rate limiting (adapts to x-ratelimit-* headers)
+    rate_limit_enabled: bool = True
+    rate_limit_requests_per_minute: int = 3500
+    rate_limit_tokens_per_minute: int = 200000
+    rate_limit_queue_timeout: float = 20.0
+    # Budget shared by every worker on the host; empty = one budget per worker
+    rate_limit_state_path: Optional[str] = "/tmp/fastapi-openai-gateway.ratelimit"
+
+    # Gunicorn worker timeout; upstream retries must finish inside it
+    worker_timeout: int = 30
+    upstream_deadline_margin: float = 5.0
+
+    # Weighted fair queuing of upstream calls by priority class (X-Priority
+    # header or client API key); lower-weight classes are deferred and shed first
+    scheduler_enabled: bool = True
+    scheduler_max_concurrency: int = 64
+    scheduler_max_queue: int = 256
+    scheduler_queue_timeout: float = 10.0
+    priority_weights: Dict[str, int] = {"interactive": 10, "batch": 1}
+    priority_default: str = "interactive"
+    priority_batch_default: str = "batch"
+    # Client API key -> priority class, e.g. {"sk-backfill-...": "batch"}
+    priority_api_keys: Dict[str, str] = {}
+    # Upstream calls in flight per tenant (X-Tenant-ID or API key), 0 = no cap
+    tenant_max_concurrency: int = 0
+
+    # Prompt-size preflight: count prompt tokens locally, clamp max_tokens to
+    # the model's context window and reject prompts that cannot fit.
+    # Encodings load from tiktoken's file cache in tokenizer_dir (pre-fetched
+    # into the image); models with no loaded encoding are estimated instead.
+    preflight_enabled: bool = True
+    tokenizer_dir: Optional[str] = None
+    tokenizer_encodings: List[str] = ["cl100k_base", "o200k_base"]
+    # Model name -> context window, added to the built-in table (dated
+    # "-YYYY-MM-DD" snapshots of a listed model share its window)
+    model_context_windows: Dict[str, int] = {}
+
+    # Upstream retries (exponential backoff with full jitter)
+    retry_max_retries: int = 2
+    retry_base_delay: float = 0.25
+    retry_max_delay: float = 4.0
+
+    # Hedged requests: race a second attempt past the latency percentile
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95
+    hedge_min_delay: float = 0.5
+    hedge_min_samples: int = 20
+
     model_config = {"env_file": ".env", "case_sensitive": False}
 
     def __init__(self, **kwargs):
@@ -24,7 +161,36 @@ class Settings(BaseSettings):
                 "Please set it in your .env file or environment variables."
             )
 
-def get_settings():
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """The process's settings, read from the environment and .env on first use."""
+    from dotenv import load_dotenv
+    load_dotenv()
     return Settings()
 
-settings = get_settings()
\ No newline at end of file
+def reload_settings() -> Settings:
+    """Re-read the environment and .env; ``settings`` resolves to the new values."""
+    get_settings.cache_clear()
+    return get_settings()
+
+class _LazySettings:
+    """Stands in for the ``Settings`` instance until something reads from it.
+
+    Importing this module does no I/O and cannot fail on a missing API key;
+    the environment is parsed once, on the first attribute access, and
+    attribute writes (tests' monkeypatching) go to the cached instance.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(get_settings(), name)
+
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+settings: Settings = _LazySettings()  # type: ignore[assignment]
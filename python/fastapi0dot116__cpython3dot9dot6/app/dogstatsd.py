@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+Tags = Tuple[str, ...]
+_Key = Tuple[str, Tags]
+
+class DogStatsD:
+    """DogStatsD client that aggregates in memory and sends from a background task.
+
+    Recording a metric only updates a dict: counters are summed and gauges
+    keep their last value for the flush interval, and histogram samples are
+    packed as multi-value lines (``name:1:2:3|h``). Every ``flush_interval``
+    the aggregates are written as newline-separated lines, packed into as few
+    UDP datagrams as fit in ``max_packet_size``. Nothing is recorded until
+    ``start()`` has been called.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        prefix: str = "",
+        constant_tags: Sequence[str] = (),
+        flush_interval: float = 10.0,
+        max_packet_size: int = 1432
+    ):
+        self.address = (host, port)
+        self.prefix = f"{prefix}." if prefix else ""
+        self.constant_tags = tuple(constant_tags)
+        self.flush_interval = flush_interval
+        self.max_packet_size = max_packet_size
+        self._counters: Dict[_Key, float] = {}
+        self._gauges: Dict[_Key, float] = {}
+        self._histograms: Dict[_Key, List[float]] = {}
+        self._sock: Optional[socket.socket] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.packets_sent = 0
+        self.packets_dropped = 0
+
+    def increment(self, name: str, value: float = 1, tags: Tags = ()) -> None:
+        if self._sock is None:
+            return
+        key = (name, tags)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, tags: Tags = ()) -> None:
+        if self._sock is None:
+            return
+        self._gauges[(name, tags)] = value
+
+    def histogram(self, name: str, value: float, tags: Tags = ()) -> None:
+        if self._sock is None:
+            return
+        samples = self._histograms.get((name, tags))
+        if samples is None:
+            self._histograms[(name, tags)] = [value]
+        else:
+            samples.append(value)
+
+    def start(self) -> None:
+        """Open the socket and start flushing; call from the worker's event loop."""
+        if self._sock is not None:
+            return
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._sock.connect(self.address)
+        self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+        logger.info(f"DogStatsD metrics to {self.address[0]}:{self.address[1]} every {self.flush_interval}s")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._sock is not None:
+            self.flush()
+            self._sock.close()
+            self._sock = None
+
+    async def check(self) -> Dict[str, int]:
+        """Readiness check: the flush task is running (UDP can't confirm the agent)."""
+        if self._task is None or self._task.done():
+            raise RuntimeError("DogStatsD flush task is not running")
+        return {"packets_sent": self.packets_sent, "packets_dropped": self.packets_dropped}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_series": len(self._counters) + len(self._gauges) + len(self._histograms),
+            "packets_sent": self.packets_sent,
+            "packets_dropped": self.packets_dropped
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"DogStatsD flush failed: {str(e)}")
+
+    def _line(self, name: str, values: str, metric_type: str, tags: Tags) -> str:
+        all_tags = tags + self.constant_tags
+        if all_tags:
+            return f"{self.prefix}{name}:{values}|{metric_type}|#{','.join(all_tags)}"
+        return f"{self.prefix}{name}:{values}|{metric_type}"
+
+    def _drain(self) -> List[str]:
+        counters, self._counters = self._counters, {}
+        gauges, self._gauges = self._gauges, {}
+        histograms, self._histograms = self._histograms, {}
+
+        lines = [self._line(name, f"{value:g}", "c", tags) for (name, tags), value in counters.items()]
+        lines.extend(self._line(name, f"{value:g}", "g", tags) for (name, tags), value in gauges.items())
+        for (name, tags), samples in histograms.items():
+            # Keep each multi-value line comfortably inside one datagram.
+            for start in range(0, len(samples), 100):
+                values = ":".join(f"{value:g}" for value in samples[start:start + 100])
+                lines.append(self._line(name, values, "h", tags))
+        return lines
+
+    def _packets(self, lines: List[str]) -> List[bytes]:
+        packets: List[bytes] = []
+        buffer = bytearray()
+        for line in lines:
+            encoded = line.encode("utf-8")
+            if buffer and len(buffer) + 1 + len(encoded) > self.max_packet_size:
+                packets.append(bytes(buffer))
+                buffer.clear()
+            if buffer:
+                buffer += b"\n"
+            buffer += encoded
+        if buffer:
+            packets.append(bytes(buffer))
+        return packets
+
+    def flush(self) -> None:
+        """Send everything recorded since the last flush."""
+        lines = self._drain()
+        if self._sock is None or not lines:
+            return
+        for packet in self._packets(lines):
+            try:
+                self._sock.send(packet)
+                self.packets_sent += 1
+            except OSError:
+                # Agent down or socket buffer full: metrics are best effort.
+                self.packets_dropped += 1
+
+class DogStatsDMiddleware:
+    """Pure ASGI middleware counting and timing requests into DogStatsD."""
+
+    def __init__(self, app, client: "DogStatsD"):
+        self.app = app
+        self.client = client
+        self.in_flight = 0
+        self._worker_tag: Optional[Tags] = None
+
+    def _worker_tags(self) -> Tags:
+        # Read on first use: the middleware is built in the master, before
+        # the worker is forked and given its slot. The slot is reused by a
+        # recycled worker's replacement, so the series count stays bounded.
+        if self._worker_tag is None:
+            from .worker import WORKER_SLOT_ENV
+            slot = os.environ.get(WORKER_SLOT_ENV)
+            self._worker_tag = (f"worker:{slot}",) if slot is not None else ()
+        return self._worker_tag
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # Each worker reports its own gauge; without the worker tag the agent
+        # would keep only the last worker's value instead of one per worker.
+        worker_tags = self._worker_tags()
+        self.in_flight += 1
+        self.client.gauge("request.in_flight", self.in_flight, worker_tags)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight -= 1
+            self.client.gauge("request.in_flight", self.in_flight, worker_tags)
+            route = scope.get("route")
+            tags = (
+                f"method:{scope['method']}",
+                f"route:{route.path if route is not None else 'unmatched'}",
+                f"status:{status_code}"
+            )
+            self.client.increment("request.count", 1, tags)
+            self.client.histogram("request.duration", (time.perf_counter() - start) * 1000, tags)
+
+statsd = DogStatsD(
+    host=settings.dogstatsd_host,
+    port=settings.dogstatsd_port,
+    prefix=settings.dogstatsd_prefix,
+    constant_tags=[tag.strip() for tag in settings.dogstatsd_tags.split(",") if tag.strip()],
+    flush_interval=settings.dogstatsd_flush_interval,
+    max_packet_size=settings.dogstatsd_max_packet_size
+)
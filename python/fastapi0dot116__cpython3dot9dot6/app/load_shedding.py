@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, FrozenSet
+from .config import settings
+from .models import ErrorResponse
+from .responses import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+class ConcurrencyLimiter:
+    """Per-worker cap on requests in progress, with a short bounded queue.
+
+    Requests beyond ``max_concurrency`` wait in FIFO order. A request is
+    shed straight away when the queue is full or when the queue's expected
+    wait (queue depth x recent service time / slots) already exceeds
+    ``queue_timeout``, so clients get a fast 503 instead of a slow timeout.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        # Futures are created per waiter on the running loop; an
+        # asyncio.Semaphore built at import would bind the master's loop on 3.9.
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._service_time = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    def expected_wait(self) -> float:
+        return len(self._waiters) * self._service_time / self.max_concurrency
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue or self.expected_wait() > self.queue_timeout:
+            self.shed += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the client went away.
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        # Hand the slot straight to the next live waiter, if any.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def observe(self, seconds: float) -> None:
+        self._service_time = seconds if not self._service_time else 0.9 * self._service_time + 0.1 * seconds
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "expected_wait_seconds": round(self.expected_wait(), 3),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed
+        }
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware answering 503 when the worker is saturated.
+
+    Health and metrics paths bypass the limiter so probes and scrapes keep
+    working while the worker is shedding.
+    """
+
+    def __init__(self, app, limiter: ConcurrencyLimiter, exempt_paths: FrozenSet[str] = frozenset()):
+        self.app = app
+        self.limiter = limiter
+        self.exempt_paths = exempt_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.limiter.acquire():
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: worker at capacity")
+            response = FastJSONResponse(
+                status_code=503,
+                headers={"Retry-After": str(max(1, math.ceil(self.limiter.queue_timeout)))},
+                content={"detail": ErrorResponse(
+                    error="Service overloaded",
+                    detail="The server is at capacity, retry shortly",
+                    error_code="OVERLOADED"
+                ).model_dump()}
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
+            self.limiter.observe(time.perf_counter() - start)
+
+concurrency_limiter = ConcurrencyLimiter(
+    max_concurrency=settings.worker_max_concurrency,
+    max_queue=settings.worker_max_queue,
+    queue_timeout=settings.worker_queue_timeout
+)
@@ -1,13 +1,26 @@
+import json
 import logging
-import time
-from fastapi import FastAPI, HTTPException, Request
+from typing import AsyncIterator, Optional, Union
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 
+from .access_log import AccessLogMiddleware, start_queue_logging, stop_queue_logging
+from .body_limit import BodySizeLimitMiddleware
 from .config import settings
-from .models import ChatRequest, ChatResponse, ErrorResponse, HealthResponse
+from .dogstatsd import DogStatsDMiddleware, statsd
+from .load_shedding import LoadSheddingMiddleware, concurrency_limiter
+from .metrics import MetricsMiddleware, render_metrics
+from .readiness import ReadinessProbe
+from .responses import FastJSONResponse
+from .models import (
+    BatchChatRequest, BatchChatResponse, ChatRequest, ChatResponse, ChatStreamUsage, ErrorResponse, HealthResponse
+)
+from .services.batch_service import iter_batch_results, run_batch
+from .services.fair_scheduler import Caller, SchedulerRejected, resolve_caller
 from .services.openai_service import openai_service
+from .services.rate_limiter import RateLimitExceeded
 
 logging.basicConfig(
     level=getattr(logging, settings.log_level.upper()),
@@ -15,18 +28,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+readiness = ReadinessProbe(interval=settings.readiness_interval, timeout=settings.readiness_timeout)
+readiness.add_check("upstream", openai_service.check_upstream)
+readiness.add_check("routing", openai_service.check_routes, critical=False)
+if settings.dogstatsd_enabled:
+    readiness.add_check("dogstatsd", statsd.check, critical=False)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.log_queue_enabled:
+        start_queue_logging()
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
+    openai_service.start()
+    if settings.upstream_warmup:
+        await openai_service.warm_up()
+    if settings.dogstatsd_enabled:
+        statsd.start()
+    readiness.start()
     yield
+    # Under gunicorn the worker has stopped accepting and drained its
+    # connections by now (app/worker.py), so no request still needs the pool.
     logger.info("Shutting down application")
+    await readiness.close()
+    await openai_service.close()
+    await statsd.close()
+    stop_queue_logging()
 
 app = FastAPI(
     title=settings.app_name,
     description="A simple API gateway for OpenAI chat completions",
     version=settings.app_version,
     debug=settings.debug,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
+)
+
+if settings.worker_max_concurrency > 0:
+    app.add_middleware(
+        LoadSheddingMiddleware,
+        limiter=concurrency_limiter,
+        exempt_paths=frozenset({"/health", "/livez", "/readyz", "/metrics"})
+    )
+
+# Outside load shedding, so an oversized body never takes a worker slot;
+# inside metrics and the access log, so the 413s are still recorded.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    default_limit=settings.max_request_body_bytes,
+    route_limits=settings.route_body_limits
 )
 
 app.add_middleware(
@@ -37,18 +86,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    logger.info(f"Request: {request.method} {request.url}")
-    
-    response = await call_next(request)
-    
-    process_time = time.time() - start_time
-    logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
-    
-    return response
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+if settings.dogstatsd_enabled:
+    app.add_middleware(DogStatsDMiddleware, client=statsd)
+
+if settings.access_log_enabled:
+    app.add_middleware(AccessLogMiddleware, sample_rate=settings.access_log_sample_rate)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -64,22 +109,145 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
-    return HealthResponse(
+    return FastJSONResponse(HealthResponse(
         status="healthy",
         version=settings.app_version,
         environment="development" if settings.debug else "production"
+    ))
+
+_LIVE_BODY = b'{"status":"alive"}'
+
+@app.get("/livez", include_in_schema=False)
+async def livez():
+    # Liveness only: the event loop answers. Nothing is checked or built.
+    return Response(content=_LIVE_BODY, media_type="application/json")
+
+@app.get("/readyz")
+async def readyz():
+    ready, report = readiness.status()
+    return FastJSONResponse(report, status_code=200 if ready else 503)
+
+def _use_cache(x_cache_bypass: Optional[str]) -> bool:
+    return (x_cache_bypass or "").lower() not in ("1", "true", "yes")
+
+def _caller_dependency(default_priority: str):
+    def caller(
+        x_priority: Optional[str] = Header(default=None, description="Priority class, e.g. 'interactive' or 'batch'"),
+        x_tenant_id: Optional[str] = Header(default=None, description="Tenant the request counts against"),
+        authorization: Optional[str] = Header(default=None, include_in_schema=False)
+    ) -> Caller:
+        api_key = authorization[7:] if authorization and authorization[:7].lower() == "bearer " else None
+        return resolve_caller(
+            x_priority, x_tenant_id, api_key, default_priority, settings.priority_weights, settings.priority_api_keys
+        )
+    return caller
+
+interactive_caller = _caller_dependency(settings.priority_default)
+batch_caller = _caller_dependency(settings.priority_batch_default)
+
+def _overloaded(e: SchedulerRejected) -> HTTPException:
+    logger.warning(f"Shedding request: {str(e)}")
+    return HTTPException(
+        status_code=503,
+        detail=ErrorResponse(
+            error="Service overloaded",
+            detail=str(e),
+            error_code="OVERLOADED"
+        ).model_dump(),
+        headers={"Retry-After": str(max(1, round(e.retry_after)))}
     )
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(accept: Optional[str] = Header(default=None)):
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = render_metrics(accept or "")
+    return Response(content=body, media_type=content_type)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    if openai_service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.cache.stats()}
+
+@app.get("/coalescer/stats")
+async def coalescer_stats():
+    if openai_service.coalescer is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.coalescer.stats()}
+
+@app.get("/rate-limit/stats")
+async def rate_limit_stats():
+    if openai_service.rate_limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.rate_limiter.stats()}
+
+@app.get("/retry/stats")
+async def retry_stats():
+    stats = openai_service.retry_policy.stats()
+    if openai_service.hedge_policy is not None:
+        stats.update(openai_service.hedge_policy.stats())
+    return {"hedging_enabled": openai_service.hedge_policy is not None, **stats}
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    if openai_service.scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.scheduler.stats()}
+
+@app.get("/preflight/stats")
+async def preflight_stats():
+    if openai_service.token_counter is None:
+        return {"enabled": False}
+    return {"enabled": True, **openai_service.token_counter.stats()}
+
+@app.get("/routing/stats")
+async def routing_stats():
+    if openai_service.router is None:
+        return {"enabled": False}
+    return {"enabled": True, "routes": openai_service.router.stats()}
+
+@app.get("/dogstatsd/stats")
+async def dogstatsd_stats():
+    if not settings.dogstatsd_enabled:
+        return {"enabled": False}
+    return {"enabled": True, **statsd.stats()}
+
+@app.get("/load/stats")
+async def load_stats():
+    if settings.worker_max_concurrency <= 0:
+        return {"enabled": False}
+    return {"enabled": True, **concurrency_limiter.stats()}
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat_completion(request: ChatRequest):
+async def chat_completion(
+    request: ChatRequest,
+    x_cache_bypass: Optional[str] = Header(default=None, description="Set to 'true' to skip the completion cache"),
+    caller: Caller = Depends(interactive_caller)
+):
     try:
         logger.info(f"Processing chat request for model: {request.model}")
         
-        response = await openai_service.send_chat_completion(request)
+        response = await openai_service.send_chat_completion(
+            request, use_cache=_use_cache(x_cache_bypass), caller=caller
+        )
         
         logger.info("Chat completion successful")
-        return response
+        return FastJSONResponse(response)
         
+    except RateLimitExceeded as e:
+        logger.warning(f"Rate limited: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail=ErrorResponse(
+                error="Rate limit exceeded",
+                detail=str(e),
+                error_code="RATE_LIMITED"
+            ).model_dump(),
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
+    except SchedulerRejected as e:
+        raise _overloaded(e)
     except ValueError as e:
         logger.warning(f"Invalid request: {str(e)}")
         raise HTTPException(
@@ -101,6 +269,118 @@ async def chat_completion(request: ChatRequest):
             ).model_dump()
         )
 
+async def _sse_events(events: AsyncIterator[Union[str, ChatStreamUsage]]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            if isinstance(event, ChatStreamUsage):
+                yield f"event: usage\ndata: {event.model_dump_json()}\n\n"
+            else:
+                yield f"data: {json.dumps({'delta': event})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band.
+        logger.error(f"Chat completion stream failed: {str(e)}")
+        error = ErrorResponse(
+            error="OpenAI API error",
+            detail=str(e),
+            error_code="OPENAI_ERROR"
+        )
+        yield f"event: error\ndata: {error.model_dump_json()}\n\n"
+
+@app.post("/chat/stream", responses={200: {"content": {"text/event-stream": {}}}})
+async def chat_completion_stream(request: ChatRequest, caller: Caller = Depends(interactive_caller)):
+    try:
+        logger.info(f"Processing streaming chat request for model: {request.model}")
+
+        events = await openai_service.stream_chat_completion(request, caller=caller)
+
+    except RateLimitExceeded as e:
+        logger.warning(f"Rate limited: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail=ErrorResponse(
+                error="Rate limit exceeded",
+                detail=str(e),
+                error_code="RATE_LIMITED"
+            ).model_dump(),
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
+    except SchedulerRejected as e:
+        raise _overloaded(e)
+    except ValueError as e:
+        logger.warning(f"Invalid request: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                error="Invalid request",
+                detail=str(e),
+                error_code="VALIDATION_ERROR"
+            ).model_dump()
+        )
+    except Exception as e:
+        logger.error(f"Chat completion failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                error="OpenAI API error",
+                detail=str(e),
+                error_code="OPENAI_ERROR"
+            ).model_dump()
+        )
+
+    return StreamingResponse(
+        _sse_events(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _batch_concurrency(batch: BatchChatRequest) -> int:
+    if len(batch.requests) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                error="Invalid request",
+                detail=f"Batch exceeds the limit of {settings.batch_max_items} requests",
+                error_code="VALIDATION_ERROR"
+            ).model_dump()
+        )
+    return min(batch.concurrency or settings.batch_concurrency, settings.batch_max_concurrency)
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_completion_batch(
+    batch: BatchChatRequest,
+    x_cache_bypass: Optional[str] = Header(default=None, description="Set to 'true' to skip the completion cache"),
+    caller: Caller = Depends(batch_caller)
+):
+    concurrency = _batch_concurrency(batch)
+    logger.info(f"Processing batch of {len(batch.requests)} chat requests (concurrency {concurrency})")
+
+    results = await run_batch(
+        openai_service, batch.requests, concurrency, use_cache=_use_cache(x_cache_bypass), caller=caller
+    )
+
+    return FastJSONResponse(BatchChatResponse(results=results))
+
+@app.post("/chat/batch/stream", responses={200: {"content": {"application/x-ndjson": {}}}})
+async def chat_completion_batch_stream(
+    batch: BatchChatRequest,
+    x_cache_bypass: Optional[str] = Header(default=None, description="Set to 'true' to skip the completion cache"),
+    caller: Caller = Depends(batch_caller)
+):
+    concurrency = _batch_concurrency(batch)
+    logger.info(f"Streaming batch of {len(batch.requests)} chat requests (concurrency {concurrency})")
+
+    use_cache = _use_cache(x_cache_bypass)
+
+    async def ndjson_lines() -> AsyncIterator[str]:
+        async for result in iter_batch_results(
+            openai_service, batch.requests, concurrency, use_cache=use_cache, caller=caller
+        ):
+            yield result.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,135 @@
+import os
+import time
+from typing import Dict, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.openmetrics import exposition as openmetrics
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set in gunicorn.conf.py before the
+# app is imported; every worker then records into its own mmap files there and
+# /metrics merges all of them, so any worker can answer a scrape.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+REQUEST_LATENCY = Histogram(
+    "gateway_request_duration_seconds",
+    "Time to serve an HTTP request, including streamed bodies",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "gateway_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum"
+)
+UPSTREAM_LATENCY = Histogram(
+    "gateway_upstream_duration_seconds",
+    "Time for one upstream chat completion attempt (to first byte for streams)",
+    ["model", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "gateway_upstream_in_flight",
+    "Upstream chat completion calls currently in flight",
+    multiprocess_mode="livesum"
+)
+SCHEDULER_QUEUE_TIME = Histogram(
+    "gateway_scheduler_queue_seconds",
+    "Time an upstream call waited for a scheduler slot",
+    ["priority"],
+    buckets=LATENCY_BUCKETS
+)
+BODY_REJECTED = Counter(
+    "gateway_request_body_rejected",
+    "Requests rejected for an oversized body",
+    ["route"]
+)
+BODY_REJECTED_BYTES = Counter(
+    "gateway_request_body_rejected_bytes",
+    "Declared or received bytes of request bodies rejected as oversized",
+    ["route"]
+)
+TOKENS = Counter(
+    "gateway_tokens",
+    "Tokens reported by the upstream usage block",
+    ["model", "kind"]
+)
+
+_request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+_upstream_latency: Dict[Tuple[str, str], Histogram] = {}
+_queue_time: Dict[str, Histogram] = {}
+
+def _request_histogram(method: str, route: str, status: str) -> Histogram:
+    # .labels() takes the metric's lock on every call; the children never
+    # change once created, so look them up in a plain dict first.
+    key = (method, route, status)
+    child = _request_latency.get(key)
+    if child is None:
+        child = _request_latency[key] = REQUEST_LATENCY.labels(method, route, status)
+    return child
+
+def observe_upstream(model: str, outcome: str, seconds: float) -> None:
+    key = (model, outcome)
+    child = _upstream_latency.get(key)
+    if child is None:
+        child = _upstream_latency[key] = UPSTREAM_LATENCY.labels(model, outcome)
+    child.observe(seconds)
+
+def observe_queue_time(priority: str, seconds: float) -> None:
+    child = _queue_time.get(priority)
+    if child is None:
+        child = _queue_time[priority] = SCHEDULER_QUEUE_TIME.labels(priority)
+    child.observe(seconds)
+
+def record_body_rejected(route: str, rejected_bytes: int) -> None:
+    BODY_REJECTED.labels(route).inc()
+    BODY_REJECTED_BYTES.labels(route).inc(rejected_bytes)
+
+def record_tokens(model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    TOKENS.labels(model, "completion").inc(completion_tokens)
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency and in-flight requests.
+
+    The route label is the matched route template (``/chat``, not the raw
+    path) so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            _request_histogram(
+                scope["method"], route.path if route is not None else "unmatched", str(status_code)
+            ).observe(time.perf_counter() - start)
+
+def render_metrics(accept: str = "") -> Tuple[bytes, str]:
+    """Serialize every metric, merged across workers in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    if "application/openmetrics-text" in accept:
+        return openmetrics.generate_latest(registry), openmetrics.CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
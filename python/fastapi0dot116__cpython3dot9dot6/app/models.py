@@ -1,9 +1,13 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+# Characters per message; the request body limit (BodySizeLimitMiddleware)
+# bounds whole requests, this bounds each item of a batch.
+MAX_MESSAGE_LENGTH = 1_000_000
+
 class ChatRequest(BaseModel):
-    message: str = Field(..., description="The user's message to send to OpenAI")
+    message: str = Field(..., max_length=MAX_MESSAGE_LENGTH, description="The user's message to send to OpenAI")
     model: str = Field(default="gpt-3.5-turbo", description="OpenAI model to use")
     max_tokens: Optional[int] = Field(default=150, description="Maximum tokens in response")
     temperature: Optional[float] = Field(default=0.7, ge=0, le=2, description="Response creativity (0-2)")
@@ -45,6 +49,23 @@ class ChatResponse(BaseModel):
         }
     }
 
+class ChatStreamUsage(BaseModel):
+    model: str = Field(..., description="Model used for the response")
+    usage: UsageInfo = Field(..., description="Token usage information")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "model": "gpt-3.5-turbo",
+                "usage": {
+                    "prompt_tokens": 10,
+                    "completion_tokens": 12,
+                    "total_tokens": 22
+                }
+            }
+        }
+    }
+
 class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(None, description="Additional error details")
@@ -60,6 +81,30 @@ class ErrorResponse(BaseModel):
         }
     }
 
+class BatchChatRequest(BaseModel):
+    requests: List[ChatRequest] = Field(..., min_length=1, description="Chat requests to run")
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Max upstream calls in flight for this batch")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "requests": [
+                    {"message": "Hello, how are you?"},
+                    {"message": "Tell me a joke", "max_tokens": 50}
+                ],
+                "concurrency": 4
+            }
+        }
+    }
+
+class BatchChatResult(BaseModel):
+    index: int = Field(..., description="Position of the request in the batch")
+    result: Optional[ChatResponse] = Field(None, description="Chat response, if the request succeeded")
+    error: Optional[ErrorResponse] = Field(None, description="Error details, if the request failed")
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatResult] = Field(..., description="One result per request, in request order")
+
 class HealthResponse(BaseModel):
     status: str = Field(..., description="Service health status")
     timestamp: datetime = Field(default_factory=datetime.now, description="Health check timestamp")
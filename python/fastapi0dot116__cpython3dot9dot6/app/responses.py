@@ -0,0 +1,16 @@
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serialized by pydantic-core's Rust encoder.
+
+    Returning one from an endpoint skips FastAPI's response_model
+    re-validation and ``jsonable_encoder`` pass, so use it for objects the
+    gateway built itself (a ChatResponse it just constructed), not for data
+    that still needs checking. Models, datetimes and plain containers are all
+    encoded in a single ``to_json`` call.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
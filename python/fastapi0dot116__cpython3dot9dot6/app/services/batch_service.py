@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional
+from ..models import BatchChatResult, ChatRequest, ErrorResponse
+from .fair_scheduler import Caller, SchedulerRejected
+from .openai_service import OpenAIService
+from .rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+async def _run_one(
+    service: OpenAIService, index: int, request: ChatRequest, use_cache: bool, caller: Optional[Caller]
+) -> BatchChatResult:
+    try:
+        response = await service.send_chat_completion(request, use_cache=use_cache, caller=caller)
+        return BatchChatResult(index=index, result=response)
+
+    except RateLimitExceeded as e:
+        logger.warning(f"Batch item {index} rate limited: {str(e)}")
+        return BatchChatResult(index=index, error=ErrorResponse(
+            error="Rate limit exceeded",
+            detail=str(e),
+            error_code="RATE_LIMITED"
+        ))
+    except SchedulerRejected as e:
+        logger.warning(f"Batch item {index} shed: {str(e)}")
+        return BatchChatResult(index=index, error=ErrorResponse(
+            error="Service overloaded",
+            detail=str(e),
+            error_code="OVERLOADED"
+        ))
+    except ValueError as e:
+        logger.warning(f"Invalid batch item {index}: {str(e)}")
+        return BatchChatResult(index=index, error=ErrorResponse(
+            error="Invalid request",
+            detail=str(e),
+            error_code="VALIDATION_ERROR"
+        ))
+    except Exception as e:
+        logger.error(f"Batch item {index} failed: {str(e)}")
+        return BatchChatResult(index=index, error=ErrorResponse(
+            error="OpenAI API error",
+            detail=str(e),
+            error_code="OPENAI_ERROR"
+        ))
+
+async def iter_batch_results(
+    service: OpenAIService,
+    requests: List[ChatRequest],
+    concurrency: int,
+    use_cache: bool = True,
+    caller: Optional[Caller] = None
+) -> AsyncIterator[BatchChatResult]:
+    """Run a batch with at most ``concurrency`` upstream calls in flight.
+
+    Results are yielded in completion order. A fixed pool of workers pulls
+    requests from a shared iterator, so a batch of thousands never creates
+    thousands of tasks, and the bounded result queue stops the workers when
+    the consumer (e.g. a slow NDJSON client) falls behind.
+    """
+    pending = iter(enumerate(requests))
+    results: "asyncio.Queue[BatchChatResult]" = asyncio.Queue(maxsize=concurrency)
+
+    async def worker() -> None:
+        for index, request in pending:
+            await results.put(await _run_one(service, index, request, use_cache, caller))
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(requests)))]
+    try:
+        for _ in range(len(requests)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+async def run_batch(
+    service: OpenAIService,
+    requests: List[ChatRequest],
+    concurrency: int,
+    use_cache: bool = True,
+    caller: Optional[Caller] = None
+) -> List[BatchChatResult]:
+    """Run a batch and return its results in request order."""
+    ordered: List[BatchChatResult] = [None] * len(requests)
+    async for result in iter_batch_results(service, requests, concurrency, use_cache, caller):
+        ordered[result.index] = result
+    return ordered
@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from ..models import ChatRequest, ChatResponse
+
+logger = logging.getLogger(__name__)
+
+def is_deterministic(request: ChatRequest) -> bool:
+    """Only greedy (temperature=0) completions are safe to replay."""
+    return request.temperature == 0
+
+def completion_cache_key(request: ChatRequest) -> str:
+    """Canonical hash of every ChatRequest field that shapes the completion."""
+    canonical = json.dumps(request.model_dump(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class SharedCompletionCache:
+    """SQLite-file cache shared by every worker process on the host.
+
+    Survives worker recycling (``max_requests``). Lookups run in a thread so
+    the event loop never waits on file I/O.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=1.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM completions WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + self.ttl_seconds)
+            )
+            self._conn.execute("DELETE FROM completions WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM completions WHERE key NOT IN "
+                "(SELECT key FROM completions ORDER BY expires_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await asyncio.to_thread(self._set, key, value)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class CompletionCache:
+    """In-process LRU cache of serialized ChatResponses with TTL and a byte budget.
+
+    Entries are stored as JSON bytes so the memory budget is exact and every
+    hit hands the caller its own ChatResponse instance. An optional shared
+    backend is consulted on local misses and written through on stores.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        max_bytes: int,
+        shared: Optional[SharedCompletionCache] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.shared_hits = 0
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def _store_local(self, key: str, value: bytes, expires_at: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, value)
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[ChatResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return ChatResponse.model_validate_json(value)
+            self._remove(key)
+            self.expirations += 1
+
+        if self.shared is not None:
+            try:
+                value = await self.shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared completion cache lookup failed: {str(e)}")
+                value = None
+            if value is not None:
+                self._store_local(key, value, time.monotonic() + self.ttl_seconds)
+                self.hits += 1
+                self.shared_hits += 1
+                return ChatResponse.model_validate_json(value)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, response: ChatResponse) -> None:
+        value = response.model_dump_json().encode("utf-8")
+        self._store_local(key, value, time.monotonic() + self.ttl_seconds)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value)
+            except Exception as e:
+                logger.warning(f"Shared completion cache store failed: {str(e)}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "shared_hits": self.shared_hits
+        }
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Mapping, NamedTuple, Optional
+from ..dogstatsd import statsd
+from ..metrics import observe_queue_time
+
+logger = logging.getLogger(__name__)
+
+class Caller(NamedTuple):
+    """Who a request is for: its priority class and the tenant it counts against."""
+    priority: str
+    tenant: str
+
+class SchedulerRejected(Exception):
+    """Raised when an upstream call is refused a slot (queue full, evicted or timed out)."""
+
+    def __init__(self, priority: str, reason: str, retry_after: float):
+        super().__init__(f"Upstream capacity exhausted for {priority} traffic ({reason})")
+        self.priority = priority
+        self.retry_after = retry_after
+
+def resolve_caller(
+    priority: Optional[str],
+    tenant: Optional[str],
+    api_key: Optional[str],
+    default_priority: str,
+    weights: Mapping[str, int],
+    api_key_priorities: Mapping[str, str]
+) -> Caller:
+    """Priority class and tenant for a request.
+
+    A client API key listed in ``api_key_priorities`` fixes the class;
+    otherwise the ``X-Priority`` header is used if it names a known class,
+    falling back to the endpoint's default. The tenant is the ``X-Tenant-ID``
+    header, else a digest of the API key (the key itself never reaches
+    stats or logs), else "anonymous".
+    """
+    if api_key and api_key in api_key_priorities:
+        priority = api_key_priorities[api_key]
+    if priority not in weights:
+        priority = default_priority
+    if not tenant:
+        tenant = f"key-{hashlib.sha256(api_key.encode()).hexdigest()[:12]}" if api_key else "anonymous"
+    return Caller(priority=priority, tenant=tenant)
+
+class _Waiter:
+    __slots__ = ("future", "caller", "enqueued")
+
+    def __init__(self, future: "asyncio.Future[None]", caller: Caller):
+        self.future = future
+        self.caller = caller
+        self.enqueued = time.monotonic()
+
+class FairScheduler:
+    """Weighted fair queuing of upstream calls across priority classes.
+
+    At most ``max_concurrency`` calls hold a slot. When a slot frees, the
+    next call comes from the backlogged class with the lowest virtual finish
+    time (stride scheduling), so under saturation each class gets slots in
+    proportion to its weight: with weights 10:1, a bulk backfill gets one
+    slot in eleven and interactive calls barely queue. An idle class cannot
+    bank credit for later. Within a class calls are FIFO, skipping tenants
+    already at ``tenant_max_concurrency``.
+
+    When the shared queue is full, an arriving call evicts the newest waiter
+    of a lower-weight class, so low-priority work is rejected first; if
+    there is none, the arriving call is rejected. Waiting is bounded by
+    ``queue_timeout``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        weights: Mapping[str, int],
+        tenant_max_concurrency: int = 0
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.weights = dict(weights)
+        self.tenant_max_concurrency = tenant_max_concurrency
+        self.in_flight = 0
+        # Futures are created per waiter on the running loop, as in ConcurrencyLimiter.
+        self._queues: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in self.weights}
+        self._finish: Dict[str, float] = {priority: 0.0 for priority in self.weights}
+        self._virtual_time = 0.0
+        self._tenant_in_flight: Dict[str, int] = {}
+        self._counters: Dict[str, Dict[str, float]] = {
+            priority: {"admitted": 0, "queued": 0, "rejected": 0, "queue_seconds": 0.0, "max_queue_seconds": 0.0}
+            for priority in self.weights
+        }
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _tenant_has_room(self, tenant: str) -> bool:
+        return not self.tenant_max_concurrency or self._tenant_in_flight.get(tenant, 0) < self.tenant_max_concurrency
+
+    def _grant(self, caller: Caller, waited: float) -> None:
+        self.in_flight += 1
+        self._tenant_in_flight[caller.tenant] = self._tenant_in_flight.get(caller.tenant, 0) + 1
+        counters = self._counters[caller.priority]
+        counters["admitted"] += 1
+        counters["queue_seconds"] += waited
+        counters["max_queue_seconds"] = max(counters["max_queue_seconds"], waited)
+        observe_queue_time(caller.priority, waited)
+        statsd.histogram("scheduler.queue_time", waited * 1000, (f"priority:{caller.priority}",))
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        best_priority, best_index, best_finish = None, -1, 0.0
+        for priority, queue in self._queues.items():
+            while queue and queue[0].future.done():
+                queue.popleft()
+            for index, waiter in enumerate(queue):
+                if self._tenant_has_room(waiter.caller.tenant) and not waiter.future.done():
+                    finish = self._finish[priority] + 1.0 / self.weights[priority]
+                    if best_priority is None or finish < best_finish:
+                        best_priority, best_index, best_finish = priority, index, finish
+                    break
+        if best_priority is None:
+            return None
+        queue = self._queues[best_priority]
+        waiter = queue[best_index]
+        del queue[best_index]
+        self._virtual_time = self._finish[best_priority]
+        self._finish[best_priority] = best_finish
+        return waiter
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._grant(waiter.caller, time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+
+    def _evict_for(self, priority: str) -> bool:
+        weight = self.weights[priority]
+        for victim_priority in sorted(self._queues, key=lambda p: self.weights[p]):
+            if self.weights[victim_priority] >= weight:
+                return False
+            queue = self._queues[victim_priority]
+            while queue:
+                victim = queue.pop()
+                if not victim.future.done():
+                    self._counters[victim_priority]["rejected"] += 1
+                    victim.future.set_exception(SchedulerRejected(victim_priority, "evicted", self.queue_timeout))
+                    return True
+        return False
+
+    async def acquire(self, caller: Caller) -> None:
+        if self.in_flight < self.max_concurrency and not self.queue_depth() and self._tenant_has_room(caller.tenant):
+            self._grant(caller, 0.0)
+            return
+
+        counters = self._counters[caller.priority]
+        if self.queue_depth() >= self.max_queue and not self._evict_for(caller.priority):
+            counters["rejected"] += 1
+            raise SchedulerRejected(caller.priority, "queue full", self.queue_timeout)
+
+        queue = self._queues[caller.priority]
+        if not queue:
+            # A class returning from idle starts at the current virtual time.
+            self._finish[caller.priority] = max(self._finish[caller.priority], self._virtual_time)
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), caller)
+        queue.append(waiter)
+        counters["queued"] += 1
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            counters["rejected"] += 1
+            raise SchedulerRejected(caller.priority, "queue timeout", self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # The slot was granted just as the caller went away.
+                self.release(caller)
+            raise
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)
+
+    def release(self, caller: Caller) -> None:
+        self.in_flight -= 1
+        remaining = self._tenant_in_flight.get(caller.tenant, 1) - 1
+        if remaining > 0:
+            self._tenant_in_flight[caller.tenant] = remaining
+        else:
+            self._tenant_in_flight.pop(caller.tenant, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, caller: Caller) -> AsyncIterator[None]:
+        await self.acquire(caller)
+        try:
+            yield
+        finally:
+            self.release(caller)
+
+    def stats(self) -> Dict[str, object]:
+        classes = {}
+        for priority, counters in self._counters.items():
+            admitted = counters["admitted"]
+            classes[priority] = {
+                "weight": self.weights[priority],
+                "queue_depth": len(self._queues[priority]),
+                "admitted": int(admitted),
+                "queued": int(counters["queued"]),
+                "rejected": int(counters["rejected"]),
+                "avg_queue_ms": round(counters["queue_seconds"] / admitted * 1000, 1) if admitted else 0.0,
+                "max_queue_ms": round(counters["max_queue_seconds"] * 1000, 1)
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth(),
+            "tenants_in_flight": len(self._tenant_in_flight),
+            "classes": classes
+        }
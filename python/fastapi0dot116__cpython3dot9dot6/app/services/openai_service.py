@@ -1,33 +1,433 @@
+import asyncio
 import logging
-from openai import OpenAI
-from typing import Dict, Any
+import time
+import weakref
+from contextlib import asynccontextmanager
+import httpx
+from openai import APIStatusError, AsyncOpenAI
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Set, Union
 from ..config import settings
-from ..models import ChatRequest, ChatResponse, UsageInfo
+from ..dogstatsd import statsd
+from ..metrics import UPSTREAM_IN_FLIGHT, observe_upstream, record_tokens
+from ..models import ChatRequest, ChatResponse, ChatStreamUsage, UsageInfo
+from .fair_scheduler import Caller, FairScheduler, SchedulerRejected
+from .completion_cache import CompletionCache, SharedCompletionCache, completion_cache_key, is_deterministic
+from .rate_limiter import (
+    FileBucketStore, LocalBucketStore, RateLimiter, RateLimitExceeded, estimate_request_tokens, parse_reset_duration
+)
+from .request_coalescer import RequestCoalescer
+from .retry_policy import FATAL, RATE_LIMITED, HedgePolicy, RetryPolicy, classify_error
+from .tokenizer import TokenCounter
+from .upstream_router import CircuitBreaker, UpstreamEndpoint, UpstreamRouter
 
 logger = logging.getLogger(__name__)
 
 class OpenAIService:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        # The client is opened per worker process (see start()), never at import
+        # time, so a preloaded gunicorn master doesn't hand shared sockets to
+        # its forked workers.
+        self.client: Optional[AsyncOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.cache: Optional[CompletionCache] = None
+        self.coalescer: Optional[RequestCoalescer] = RequestCoalescer() if settings.coalesce_requests else None
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.router: Optional[UpstreamRouter] = None
+        # When the upstream last answered below 500 (monotonic), for readiness
+        self.last_upstream_ok = 0.0
+        self.scheduler: Optional[FairScheduler] = FairScheduler(
+            max_concurrency=settings.scheduler_max_concurrency,
+            max_queue=settings.scheduler_max_queue,
+            queue_timeout=settings.scheduler_queue_timeout,
+            weights=settings.priority_weights,
+            tenant_max_concurrency=settings.tenant_max_concurrency
+        ) if settings.scheduler_enabled else None
+        self.retry_policy = RetryPolicy(
+            max_retries=settings.retry_max_retries,
+            base_delay=settings.retry_base_delay,
+            max_delay=settings.retry_max_delay
+        )
+        self.hedge_policy: Optional[HedgePolicy] = HedgePolicy(
+            percentile=settings.hedge_percentile,
+            min_delay=settings.hedge_min_delay,
+            min_samples=settings.hedge_min_samples
+        ) if settings.hedge_enabled else None
+        self.token_counter: Optional[TokenCounter] = TokenCounter(
+            encodings=settings.tokenizer_encodings,
+            context_windows=settings.model_context_windows,
+            tokenizer_dir=settings.tokenizer_dir
+        ) if settings.preflight_enabled else None
         logger.info("OpenAI service initialized")
 
-    async def send_chat_completion(self, request: ChatRequest) -> ChatResponse:
+    def start(self) -> None:
+        """Open the shared async HTTP connection pool and OpenAI client."""
+        if self.client is not None:
+            return
+
+        if self.token_counter is not None:
+            # A no-op when the preloaded master has already loaded them.
+            self.token_counter.preload()
+
+        if settings.cache_enabled and self.cache is None:
+            shared = None
+            if settings.cache_shared_path:
+                shared = SharedCompletionCache(
+                    settings.cache_shared_path,
+                    ttl_seconds=settings.cache_ttl_seconds,
+                    max_entries=settings.cache_shared_max_entries
+                )
+            self.cache = CompletionCache(
+                ttl_seconds=settings.cache_ttl_seconds,
+                max_entries=settings.cache_max_entries,
+                max_bytes=settings.cache_max_bytes,
+                shared=shared
+            )
+
+        if settings.rate_limit_enabled and self.rate_limiter is None:
+            store = (
+                FileBucketStore(settings.rate_limit_state_path)
+                if settings.rate_limit_state_path else LocalBucketStore()
+            )
+            self.rate_limiter = RateLimiter(
+                requests_per_minute=settings.rate_limit_requests_per_minute,
+                tokens_per_minute=settings.rate_limit_tokens_per_minute,
+                store=store
+            )
+
+        self._http_client = httpx.AsyncClient(
+            event_hooks={"response": [self._observe_response]},
+            limits=httpx.Limits(
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_keepalive_connections,
+                keepalive_expiry=settings.openai_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(
+                connect=settings.openai_connect_timeout,
+                read=settings.openai_read_timeout,
+                write=settings.openai_write_timeout,
+                pool=settings.openai_pool_timeout
+            )
+        )
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            http_client=self._http_client,
+            # Retries are handled by _create_completion, which also knows
+            # about the rate limiter and the request deadline.
+            max_retries=0
+        )
+        if settings.upstream_routes:
+            self.router = self._build_router()
+        logger.info(
+            f"OpenAI connection pool opened "
+            f"(max_connections={settings.openai_max_connections}, "
+            f"max_keepalive={settings.openai_max_keepalive_connections})"
+        )
+
+    def _build_router(self) -> UpstreamRouter:
+        """One client per routed target, all sharing this worker's connection pool."""
+        routes = {}
+        for model, targets in settings.upstream_routes.items():
+            routes[model] = [
+                UpstreamEndpoint(
+                    name=target.name or f"{model}-{i}",
+                    client=AsyncOpenAI(
+                        api_key=target.api_key or settings.openai_api_key,
+                        base_url=target.base_url or settings.openai_base_url,
+                        http_client=self._http_client,
+                        max_retries=0
+                    ),
+                    model=target.model,
+                    breaker=CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_timeout),
+                    ewma_alpha=settings.routing_ewma_alpha,
+                    stale_seconds=settings.routing_stale_seconds
+                )
+                for i, target in enumerate(targets)
+            ]
+            logger.info(f"Routing model {model} across {len(targets)} upstream endpoint(s)")
+        return UpstreamRouter(routes)
+
+    async def warm_up(self) -> None:
+        """Open a first upstream connection (DNS, TCP, TLS) before taking traffic."""
+        if self.client is None:
+            self.start()
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self.client.models.list(), settings.upstream_warmup_timeout)
+        except Exception as e:
+            # Only the connection matters; a 4xx still leaves it in the pool.
+            logger.debug(f"Upstream warmup request failed: {str(e)}")
+        logger.info(f"Upstream connection warmed up in {time.monotonic() - start:.3f}s")
+
+    async def close(self) -> None:
+        """Close the OpenAI client and drain its connection pool."""
+        if self.client is None:
+            return
+
+        await self.client.close()
+        self.client = None
+        self._http_client = None
+        self.router = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if self.rate_limiter is not None:
+            self.rate_limiter.close()
+            self.rate_limiter = None
+        logger.info("OpenAI connection pool closed")
+
+    async def check_upstream(self) -> Dict[str, Any]:
+        """Readiness check: the pool is open and the upstream answers.
+
+        Any upstream response below 500 within ``readiness_interval`` counts,
+        so live traffic is the probe; only an idle worker sends a
+        ``GET /models``, where a 4xx still proves the upstream reachable.
+        """
+        if self.client is None:
+            raise RuntimeError("Upstream connection pool is not open")
+        if time.monotonic() - self.last_upstream_ok > settings.readiness_interval:
+            try:
+                await self.client.models.list()
+            except APIStatusError as e:
+                if e.status_code >= 500:
+                    raise
+        return {"last_ok_seconds_ago": round(time.monotonic() - self.last_upstream_ok, 1), **self._pool_stats()}
+
+    def _pool_stats(self) -> Dict[str, int]:
+        # httpx keeps its httpcore pool private; this is only for reporting.
+        pool = getattr(getattr(self._http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {"pool_connections": len(connections), "pool_idle": sum(1 for c in connections if c.is_idle())}
+
+    async def check_routes(self) -> Dict[str, Any]:
+        """Readiness check: every routed model has an endpoint whose circuit admits traffic."""
+        if self.router is None:
+            return {}
+        available = {
+            model: sum(1 for endpoint in endpoints if endpoint.breaker.available())
+            for model, endpoints in self.router.routes.items()
+        }
+        down = [model for model, count in available.items() if count == 0]
+        if down:
+            raise RuntimeError(f"Every upstream circuit is open for {', '.join(down)}")
+        return {"available_endpoints": available}
+
+    async def _observe_response(self, response: httpx.Response) -> None:
+        if response.status_code < 500:
+            self.last_upstream_ok = time.monotonic()
+        if self.rate_limiter is not None:
+            self.rate_limiter.observe(response.status_code, response.headers)
+
+    async def _create_completion(self, estimated_tokens: int, hedge: bool = False, **params):
+        """Call the upstream with rate limiting, retries and optional hedging.
+
+        Transient failures are retried with jittered exponential backoff. A
+        429 blocks the shared rate limiter until the provider's reset time
+        (see _observe_response), so the next acquire() waits it out. No
+        attempt runs past the request deadline, which is kept inside
+        gunicorn's worker timeout.
+        """
+        start = time.monotonic()
+        deadline = start + settings.worker_timeout - settings.upstream_deadline_margin
+        queue_deadline = min(deadline, start + settings.rate_limit_queue_timeout)
+        # Routed endpoints already tried, so retries and hedges go elsewhere
+        tried: Set[str] = set()
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(estimated_tokens, queue_deadline)
+            try:
+                if hedge and self.hedge_policy is not None:
+                    return await self._hedged_attempt(estimated_tokens, deadline, params, tried)
+                return await self._attempt(deadline, params, record_latency=hedge, tried=tried)
+
+            except Exception as e:
+                error_class = classify_error(e)
+                if error_class == RATE_LIMITED and self.rate_limiter is not None:
+                    self.retry_policy.retries += 1
+                    logger.warning("Upstream rate limited the request; re-queueing")
+                    continue
+
+                retry_after = 0.0
+                if error_class == RATE_LIMITED:
+                    headers = e.response.headers
+                    retry_after = (
+                        float(headers["retry-after-ms"]) / 1000.0 if headers.get("retry-after-ms")
+                        else parse_reset_duration(headers.get("retry-after"))
+                    ) or 1.0
+
+                delay = max(self.retry_policy.backoff(attempt), retry_after)
+                if (
+                    not self.retry_policy.should_retry(error_class, attempt)
+                    or time.monotonic() + delay >= deadline
+                ):
+                    if error_class == RATE_LIMITED:
+                        raise RateLimitExceeded(retry_after=retry_after)
+                    raise
+
+                attempt += 1
+                self.retry_policy.retries += 1
+                logger.warning(
+                    f"Retrying upstream call ({attempt}/{self.retry_policy.max_retries}) "
+                    f"after {error_class} error in {delay:.2f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+
+    async def _attempt(
+        self, deadline: float, params: Dict[str, Any], record_latency: bool, tried: Optional[Set[str]] = None
+    ):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError("Upstream request deadline exceeded")
+
+        client, call_params = self.client, params
+        endpoint = self.router.pick(params["model"], tried) if self.router is not None else None
+        if endpoint is not None:
+            client = endpoint.client
+            if endpoint.model:
+                call_params = {**params, "model": endpoint.model}
+            if tried is not None:
+                tried.add(endpoint.name)
+            endpoint.in_flight += 1
+
+        started = time.monotonic()
+        outcome = "error"
+        error_class = None
+        UPSTREAM_IN_FLIGHT.inc()
+        try:
+            response = await asyncio.wait_for(client.chat.completions.create(**call_params), remaining)
+            outcome = "success"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise asyncio.TimeoutError(f"Upstream call exceeded the {remaining:.1f}s request deadline")
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            error_class = classify_error(e)
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            UPSTREAM_IN_FLIGHT.dec()
+            observe_upstream(params["model"], outcome, elapsed)
+            statsd.histogram("upstream.duration", elapsed * 1000, (f"model:{params['model']}", f"outcome:{outcome}"))
+            if endpoint is not None:
+                endpoint.in_flight -= 1
+                if outcome == "cancelled" or error_class == FATAL:
+                    # Says nothing about the endpoint's health.
+                    endpoint.breaker.release()
+                else:
+                    endpoint.observe(elapsed, ok=outcome == "success")
+
+        if record_latency and self.hedge_policy is not None:
+            self.hedge_policy.record(time.monotonic() - started)
+        return response
+
+    async def _hedged_attempt(self, estimated_tokens: int, deadline: float, params: Dict[str, Any], tried: Set[str]):
+        """Race a second attempt once the first outlives the hedge threshold.
+
+        The first successful attempt wins and the other is cancelled. If one
+        attempt fails, the other is still awaited; only if both fail is the
+        first error raised. With routing, the hedge goes to a different
+        endpoint than the primary.
+        """
+        delay = self.hedge_policy.threshold()
+        if delay is None:
+            return await self._attempt(deadline, params, record_latency=True, tried=tried)
+
+        primary = asyncio.ensure_future(self._attempt(deadline, params, record_latency=True, tried=tried))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and (self.rate_limiter is None or self.rate_limiter.try_acquire(estimated_tokens)):
+                self.hedge_policy.hedges += 1
+                logger.info(f"Hedging upstream call still running after {delay:.2f}s")
+                pending.add(asyncio.ensure_future(self._attempt(deadline, params, record_latency=True, tried=tried)))
+
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_policy.hedges_won += 1
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _caller(self, caller: Optional[Caller]) -> Caller:
+        return caller or Caller(priority=settings.priority_default, tenant="anonymous")
+
+    @asynccontextmanager
+    async def _upstream_slot(self, caller: Optional[Caller]) -> AsyncIterator[None]:
+        """Hold a fair-scheduler slot for the duration of an upstream call."""
+        if self.scheduler is None:
+            yield
+            return
+        async with self.scheduler.slot(self._caller(caller)):
+            yield
+
+    def _record_tokens(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        record_tokens(model, prompt_tokens, completion_tokens)
+        tags = (f"model:{model}",)
+        statsd.increment("tokens.prompt", prompt_tokens, tags)
+        statsd.increment("tokens.completion", completion_tokens, tags)
+
+    async def send_chat_completion(
+        self, request: ChatRequest, use_cache: bool = True, caller: Optional[Caller] = None
+    ) -> ChatResponse:
+        if self.client is None:
+            # Used outside the app lifespan (scripts, tests): open lazily.
+            self.start()
+
+        if self.token_counter is not None:
+            request = await self.token_counter.apreflight(request)
+
+        cache_key = None
+        if use_cache and self.cache is not None and is_deterministic(request):
+            cache_key = completion_cache_key(request)
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Serving chat completion from cache for model: {request.model}")
+                return cached
+
+        if self.coalescer is None or not is_deterministic(request):
+            return await self._complete(request, cache_key, caller)
+
+        # Like the cache, only replayable (temperature=0) completions are
+        # shared, and only between calls from the same tenant and priority.
+        caller = self._caller(caller)
+        return await self.coalescer.run(
+            f"{caller.tenant}:{caller.priority}:{cache_key or completion_cache_key(request)}",
+            lambda: self._complete(request, cache_key, caller)
+        )
+
+    async def _complete(self, request: ChatRequest, cache_key: Optional[str], caller: Optional[Caller]) -> ChatResponse:
+        estimated_tokens = estimate_request_tokens(request)
         try:
             logger.info(f"Sending chat completion request with model: {request.model}")
             logger.debug(f"Request details: {request.model_dump()}")
-            
-            response = self.client.chat.completions.create(
-                model=request.model,
-                messages=[
-                    {"role": "user", "content": request.message}
-                ],
-                max_tokens=request.max_tokens,
-                temperature=request.temperature
-            )
-            
+
+            async with self._upstream_slot(caller):
+                response = await self._create_completion(
+                    estimated_tokens,
+                    hedge=True,
+                    model=request.model,
+                    messages=[
+                        {"role": "user", "content": request.message}
+                    ],
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature
+                )
+
             logger.info(f"Received response from OpenAI API")
             logger.debug(f"Response usage: {response.usage}")
-            
+
             chat_response = ChatResponse(
                 response=response.choices[0].message.content,
                 model=response.model,
@@ -37,11 +437,123 @@ class OpenAIService:
                     total_tokens=response.usage.total_tokens
                 )
             )
-            
-            return chat_response
-            
+
+        except (RateLimitExceeded, SchedulerRejected):
+            raise
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {str(e)}")
             raise Exception(f"OpenAI API error: {str(e)}")
 
+        self._record_tokens(chat_response.model, chat_response.usage.prompt_tokens, chat_response.usage.completion_tokens)
+        if self.rate_limiter is not None:
+            self.rate_limiter.settle(estimated_tokens, chat_response.usage.total_tokens)
+
+        if cache_key is not None and self.cache is not None:
+            await self.cache.set(cache_key, chat_response)
+
+        return chat_response
+
+    async def stream_chat_completion(
+        self, request: ChatRequest, caller: Optional[Caller] = None
+    ) -> AsyncIterator[Union[str, ChatStreamUsage]]:
+        """Open a streaming completion and return an iterator over its events.
+
+        The upstream request is made before returning, so connection and API
+        errors surface here rather than after the client response has started.
+        The iterator yields each content delta as a ``str`` and finishes with a
+        single ``ChatStreamUsage``. Chunks are only read from upstream as the
+        caller consumes them, so a slow client applies backpressure all the way
+        to the upstream socket. The scheduler slot is held until the stream ends.
+        """
+        if self.client is None:
+            self.start()
+
+        if self.token_counter is not None:
+            request = await self.token_counter.apreflight(request)
+
+        caller = self._caller(caller)
+        if self.scheduler is not None:
+            await self.scheduler.acquire(caller)
+
+        estimated_tokens = estimate_request_tokens(request)
+        try:
+            try:
+                logger.info(f"Sending streaming chat completion request with model: {request.model}")
+                logger.debug(f"Request details: {request.model_dump()}")
+
+                stream = await self._create_completion(
+                    estimated_tokens,
+                    model=request.model,
+                    messages=[
+                        {"role": "user", "content": request.message}
+                    ],
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+
+            except RateLimitExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"Error calling OpenAI API: {str(e)}")
+                raise Exception(f"OpenAI API error: {str(e)}")
+
+        except BaseException:
+            if self.scheduler is not None:
+                self.scheduler.release(caller)
+            raise
+
+        release = None
+        if self.scheduler is not None:
+            # Also released if the iterator is dropped without ever being started.
+            release = weakref.finalize(stream, self.scheduler.release, caller)
+        return self._iter_stream(stream, request.model, estimated_tokens, release)
+
+    async def _iter_stream(
+        self, stream, requested_model: str, estimated_tokens: int, release: Optional[Callable[[], None]] = None
+    ) -> AsyncIterator[Union[str, ChatStreamUsage]]:
+        model = requested_model
+        usage = None
+        try:
+            async for chunk in stream:
+                model = chunk.model or model
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                for choice in chunk.choices:
+                    if choice.delta is not None and choice.delta.content:
+                        yield choice.delta.content
+
+        except Exception as e:
+            logger.error(f"Error reading OpenAI stream: {str(e)}")
+            raise Exception(f"OpenAI API error: {str(e)}")
+
+        finally:
+            # Runs on normal completion, errors and client disconnects alike,
+            # returning the connection to the pool (or discarding it).
+            try:
+                await stream.close()
+            finally:
+                if release is not None:
+                    release()
+
+        if usage is None:
+            logger.warning("OpenAI stream ended without a usage chunk")
+        else:
+            self._record_tokens(model, usage.prompt_tokens, usage.completion_tokens)
+            if self.rate_limiter is not None:
+                self.rate_limiter.settle(estimated_tokens, usage.total_tokens)
+
+        logger.info("Streamed response from OpenAI API")
+        logger.debug(f"Response usage: {usage}")
+
+        yield ChatStreamUsage(
+            model=model,
+            usage=UsageInfo(
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                total_tokens=usage.total_tokens if usage else 0
+            )
+        )
+
 openai_service = OpenAIService()
\ No newline at end of file
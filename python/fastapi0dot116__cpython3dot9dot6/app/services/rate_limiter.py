@@ -0,0 +1,233 @@
+import asyncio
+import fcntl
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from ..models import ChatRequest
+
+logger = logging.getLogger(__name__)
+
+# Bucket state: (requests available, tokens available, last refill, blocked until).
+# Timestamps are wall-clock (time.time()) so they mean the same thing in every
+# process and container reading the shared file.
+_STATE = struct.Struct("dddd")
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+State = List[float]
+
+class RateLimitExceeded(Exception):
+    """The request could not be admitted before its queueing deadline."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream rate limit: no capacity within the queueing deadline (retry after {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset headers ("20ms", "1s", "6m0s") or plain seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+def estimate_request_tokens(request: ChatRequest) -> int:
+    """Rough upper bound on the tokens a request will consume (~4 chars/token)."""
+    return max(1, len(request.message) // 4) + (request.max_tokens or 0)
+
+class LocalBucketStore:
+    """Bucket state held in this process only."""
+
+    def __init__(self):
+        self._state: Optional[State] = None
+        self._lock = threading.Lock()
+
+    def transact(self, fn: Callable[[Optional[State]], Tuple[float, State]]) -> float:
+        with self._lock:
+            result, self._state = fn(self._state)
+            return result
+
+    def close(self) -> None:
+        pass
+
+class FileBucketStore:
+    """Bucket state in a small file shared by every worker on the host.
+
+    Each update is a read-modify-write of 32 bytes under an exclusive
+    ``flock``, which keeps the critical section to a few microseconds. The
+    file must be opened after fork: flock locks belong to the open file
+    description, so a descriptor inherited from the master would be shared.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def transact(self, fn: Callable[[Optional[State]], Tuple[float, State]]) -> float:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            raw = os.pread(self._fd, _STATE.size, 0)
+            state = list(_STATE.unpack(raw)) if len(raw) == _STATE.size else None
+            result, state = fn(state)
+            os.pwrite(self._fd, _STATE.pack(*state), 0)
+            return result
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+class RateLimiter:
+    """Token-bucket limiter on both requests/minute and tokens/minute.
+
+    Callers queue in ``acquire`` until both buckets have capacity, failing
+    only if that would take longer than their deadline. Upstream rate-limit
+    headers are fed back through ``observe`` so the buckets track what the
+    provider actually has left, and a 429 blocks every worker until the
+    provider's reset time instead of letting each one rediscover the limit.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, store=None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.store = store or LocalBucketStore()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _refill(self, state: Optional[State], now: float) -> State:
+        # A refill time in the future comes from another clock (a file left by
+        # an older version, or a clock stepped back): start over with full buckets.
+        if state is None or state[2] > now:
+            return [float(self.requests_per_minute), float(self.tokens_per_minute), now, 0.0]
+        requests, tokens, updated_at, blocked_until = state
+        elapsed = max(0.0, now - updated_at)
+        requests = min(float(self.requests_per_minute), requests + elapsed * self.requests_per_minute / 60.0)
+        tokens = min(float(self.tokens_per_minute), tokens + elapsed * self.tokens_per_minute / 60.0)
+        return [requests, tokens, now, blocked_until]
+
+    def _try_take(self, cost: int) -> Callable[[Optional[State]], Tuple[float, State]]:
+        def take(state: Optional[State]) -> Tuple[float, State]:
+            now = time.time()
+            state = self._refill(state, now)
+            requests, tokens, _, blocked_until = state
+            if blocked_until > now:
+                return blocked_until - now, state
+            if requests >= 1 and tokens >= cost:
+                state[0] -= 1
+                state[1] -= cost
+                return 0.0, state
+            wait = max(
+                (1 - requests) * 60.0 / self.requests_per_minute,
+                (cost - tokens) * 60.0 / self.tokens_per_minute
+            )
+            return max(wait, 0.001), state
+        return take
+
+    async def acquire(self, tokens: int, deadline: float) -> None:
+        """Wait for capacity for one request of ``tokens`` tokens.
+
+        ``deadline`` is a ``time.monotonic()`` timestamp. Raises
+        RateLimitExceeded if capacity won't be available before it.
+        """
+        cost = min(tokens, self.tokens_per_minute)
+        waited = False
+        while True:
+            wait = self.store.transact(self._try_take(cost))
+            if wait == 0:
+                self.admitted += 1
+                return
+            now = time.monotonic()
+            if now + wait > deadline:
+                self.rejected += 1
+                raise RateLimitExceeded(retry_after=wait)
+            if not waited:
+                self.queued += 1
+                waited = True
+            await asyncio.sleep(wait)
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Take capacity only if it is available right now, without queueing."""
+        if self.store.transact(self._try_take(min(tokens, self.tokens_per_minute))) == 0:
+            self.admitted += 1
+            return True
+        return False
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Refund (or charge) the difference between estimated and actual usage."""
+        delta = estimated_tokens - actual_tokens
+        if delta == 0:
+            return
+
+        def adjust(state: Optional[State]) -> Tuple[float, State]:
+            state = self._refill(state, time.time())
+            state[1] = min(float(self.tokens_per_minute), state[1] + delta)
+            return 0.0, state
+
+        self.store.transact(adjust)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapt to the provider's rate-limit headers on an upstream response."""
+        limit_requests = headers.get("x-ratelimit-limit-requests")
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        if limit_requests and limit_requests.isdigit() and int(limit_requests) > 0:
+            self.requests_per_minute = int(limit_requests)
+        if limit_tokens and limit_tokens.isdigit() and int(limit_tokens) > 0:
+            self.tokens_per_minute = int(limit_tokens)
+
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+
+        block_for = 0.0
+        if status_code == 429:
+            self.throttled += 1
+            retry_after_ms = headers.get("retry-after-ms")
+            block_for = (
+                (float(retry_after_ms) / 1000.0 if retry_after_ms else None)
+                or parse_reset_duration(headers.get("retry-after"))
+                or max(
+                    parse_reset_duration(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                    parse_reset_duration(headers.get("x-ratelimit-reset-tokens")) or 0.0
+                )
+                or 1.0
+            )
+            logger.warning(f"Upstream rate limited; pausing upstream calls for {block_for:.2f}s")
+
+        if remaining_requests is None and remaining_tokens is None and not block_for:
+            return
+
+        def adapt(state: Optional[State]) -> Tuple[float, State]:
+            now = time.time()
+            state = self._refill(state, now)
+            if remaining_requests is not None and remaining_requests.isdigit():
+                state[0] = min(state[0], float(remaining_requests))
+            if remaining_tokens is not None and remaining_tokens.isdigit():
+                state[1] = min(state[1], float(remaining_tokens))
+            if block_for:
+                state[3] = max(state[3], now + block_for)
+            return 0.0, state
+
+        self.store.transact(adapt)
+
+    def close(self) -> None:
+        self.store.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "throttled": self.throttled
+        }
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict
+from ..models import ChatResponse
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[ChatResponse]"):
+        self.task = task
+        self.waiters = 0
+
+class RequestCoalescer:
+    """Single-flight execution of identical in-flight chat completions.
+
+    The first caller for a key starts the upstream call in its own task; any
+    caller arriving with the same key while it is running awaits that task
+    instead of making another call. Each caller gets its own copy of the
+    ChatResponse, errors are delivered to every waiter, and the upstream call
+    is only cancelled once all of its waiters have gone away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.flights = 0
+        self.collapsed = 0
+
+    def _discard(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[ChatResponse]]) -> ChatResponse:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            flight.task.add_done_callback(lambda _: self._discard(key, flight))
+            self._flights[key] = flight
+            self.flights += 1
+        else:
+            self.collapsed += 1
+            logger.debug(f"Coalesced chat completion onto in-flight request {key[:12]}")
+
+        flight.waiters += 1
+        try:
+            response = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller was cancelled: stop the upstream call and make
+                # sure newcomers don't join a flight that is being torn down.
+                self._discard(key, flight)
+                flight.task.cancel()
+
+        return response.model_copy(deep=True)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "flights": self.flights,
+            "collapsed": self.collapsed
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import random
+from collections import deque
+from typing import Deque, Dict, Optional
+import openai
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+_TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+
+def classify_error(error: BaseException) -> str:
+    """Sort an upstream failure into rate_limited, transient or fatal."""
+    if isinstance(error, openai.RateLimitError):
+        # Out of credit is a billing problem, not back-pressure.
+        return FATAL if getattr(error, "code", None) == "insufficient_quota" else RATE_LIMITED
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return TRANSIENT
+    if isinstance(error, openai.APIStatusError):
+        return TRANSIENT if error.status_code in _TRANSIENT_STATUS_CODES else FATAL
+    return FATAL
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for transient upstream failures."""
+
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.exhausted = 0
+
+    def should_retry(self, error_class: str, attempt: int) -> bool:
+        if error_class == FATAL:
+            return False
+        if attempt >= self.max_retries:
+            self.exhausted += 1
+            return False
+        return True
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def stats(self) -> Dict[str, int]:
+        return {"retries": self.retries, "retries_exhausted": self.exhausted}
+
+class HedgePolicy:
+    """Decides when a slow upstream call earns a second, racing attempt.
+
+    Keeps a sliding window of successful attempt latencies and hedges once
+    the in-flight attempt has outlived the window's percentile (e.g. p95).
+    The percentile is recomputed every few samples, not on every request.
+    """
+
+    def __init__(self, percentile: float, min_delay: float, min_samples: int, window: int = 256):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._threshold: Optional[float] = None
+        self._since_update = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+        self._since_update += 1
+        if len(self._samples) >= self.min_samples and (self._threshold is None or self._since_update >= 16):
+            ordered = sorted(self._samples)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+            self._threshold = max(self.min_delay, ordered[index])
+            self._since_update = 0
+
+    def threshold(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough samples exist."""
+        return self._threshold
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "hedge_threshold_seconds": self._threshold,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won
+        }
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional
+from ..models import ChatRequest
+
+logger = logging.getLogger(__name__)
+
+# Context window (prompt + completion tokens) by exact model name. A dated
+# snapshot ("gpt-4o-2024-08-06") shares its model's window; older four-digit
+# snapshots are listed one by one, since "gpt-4-0613" and
+# "gpt-4-0125-preview" have different windows. Models not listed pass
+# through unchecked rather than risk rejecting a prompt the upstream accepts.
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-0125": 16385,
+    "gpt-3.5-turbo-1106": 16385,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-4": 8192,
+    "gpt-4-0314": 8192,
+    "gpt-4-0613": 8192,
+    "gpt-4-32k": 32768,
+    "gpt-4-32k-0314": 32768,
+    "gpt-4-32k-0613": 32768,
+    "gpt-4-0125-preview": 128000,
+    "gpt-4-1106-preview": 128000,
+    "gpt-4-1106-vision-preview": 128000,
+    "gpt-4-vision-preview": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-turbo-preview": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4.1-mini": 1047576,
+    "gpt-4.1-nano": 1047576,
+    "o1": 200000,
+    "o1-mini": 128000,
+    "o1-preview": 128000,
+    "o3": 200000,
+    "o3-mini": 200000,
+    "o4-mini": 200000,
+}
+
+_SNAPSHOT_DATE = re.compile(r"-\d{4}-\d{2}-\d{2}$")
+
+# Tokens the chat format adds around a single user message: the message
+# header and role, plus the primed assistant reply.
+CHAT_OVERHEAD_TOKENS = 7
+
+class PromptTooLong(ValueError):
+    """The prompt alone fills the model's context window."""
+
+def _offline(blobpath: str) -> bytes:
+    raise FileNotFoundError(f"{blobpath} is not in the tokenizer cache (downloads are disabled)")
+
+@contextmanager
+def _offline_tiktoken(cache_dir: Optional[str]) -> Iterator[None]:
+    """Point tiktoken at cache_dir and refuse downloads, for this block only.
+
+    tiktoken downloads any encoding file missing from its cache; inside the
+    block that raises instead, so a missing file falls back to estimating.
+    """
+    try:
+        import tiktoken.load
+    except ImportError:
+        yield
+        return
+    previous_dir = os.environ.get("TIKTOKEN_CACHE_DIR")
+    fetch = tiktoken.load.read_file
+    if cache_dir:
+        os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir
+    tiktoken.load.read_file = _offline
+    try:
+        yield
+    finally:
+        tiktoken.load.read_file = fetch
+        if cache_dir:
+            if previous_dir is None:
+                del os.environ["TIKTOKEN_CACHE_DIR"]
+            else:
+                os.environ["TIKTOKEN_CACHE_DIR"] = previous_dir
+
+def _load_encoding(name: str) -> Any:
+    import tiktoken
+    return tiktoken.get_encoding(name)
+
+def _encoding_name_for_model(model: str) -> Optional[str]:
+    try:
+        import tiktoken
+        return tiktoken.encoding_name_for_model(model)
+    except (ImportError, KeyError):
+        return None
+
+class TokenCounter:
+    """Local prompt token counting and context-window preflight.
+
+    Encodings are loaded once by ``preload`` (in the gunicorn master when the
+    app is preloaded, else at worker start) from tiktoken's file cache, which
+    ``tokenizer_dir`` points at; nothing is ever downloaded, and the request
+    path never loads anything. A model whose encoding is not loaded is
+    counted with a ~4 bytes/token estimate instead, which can only
+    under-count, so it never rejects a request the upstream would have
+    accepted.
+
+    A prompt is only tokenized when its byte length (an upper bound on its
+    tokens) does not already fit; ``apreflight`` tokenizes prompts longer
+    than ``thread_count_chars`` on a thread rather than the event loop.
+    """
+
+    def __init__(
+        self,
+        encodings: Iterable[str] = ("cl100k_base", "o200k_base"),
+        context_windows: Optional[Mapping[str, int]] = None,
+        tokenizer_dir: Optional[str] = None,
+        loader: Callable[[str], Any] = _load_encoding,
+        encoding_for_model: Callable[[str], Optional[str]] = _encoding_name_for_model,
+        thread_count_chars: int = 20000
+    ):
+        self.encoding_names = tuple(encodings)
+        self.context_windows = {**MODEL_CONTEXT_WINDOWS, **(context_windows or {})}
+        self.tokenizer_dir = tokenizer_dir
+        self._loader = loader
+        self._encoding_for_model = encoding_for_model
+        self.thread_count_chars = thread_count_chars
+        self._encodings: Dict[str, Any] = {}
+        self._model_encodings: Dict[str, Optional[str]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._counters = {
+            "checked": 0, "bounded": 0, "clamped": 0, "rejected": 0, "estimated": 0, "unknown_model": 0
+        }
+
+    def preload(self) -> int:
+        """Load every configured encoding once; returns how many are available."""
+        with self._lock:
+            if self._loaded:
+                return len(self._encodings)
+            if not self.tokenizer_dir:
+                logger.warning("tokenizer_dir is not set; loading encodings from tiktoken's default cache only")
+            with _offline_tiktoken(self.tokenizer_dir):
+                for name in self.encoding_names:
+                    try:
+                        self._encodings[name] = self._loader(name)
+                    except Exception as e:
+                        logger.warning(
+                            f"Tokenizer encoding {name} unavailable ({type(e).__name__}: {str(e)}); "
+                            f"estimating prompt tokens for its models"
+                        )
+            self._loaded = True
+            logger.info(f"Loaded {len(self._encodings)} tokenizer encoding(s): {', '.join(self._encodings) or 'none'}")
+            return len(self._encodings)
+
+    def context_window(self, model: str) -> Optional[int]:
+        if model in self.context_windows:
+            return self.context_windows[model]
+        return self.context_windows.get(_SNAPSHOT_DATE.sub("", model))
+
+    def _encoding(self, model: str) -> Optional[Any]:
+        if model not in self._model_encodings:
+            self._model_encodings[model] = self._encoding_for_model(model)
+        name = self._model_encodings[model]
+        return self._encodings.get(name) if name else None
+
+    def count_prompt(self, model: str, message: str) -> int:
+        """Prompt tokens for a single user message, as the upstream bills them."""
+        encoding = self._encoding(model)
+        if encoding is None:
+            self._counters["estimated"] += 1
+            return len(message.encode("utf-8")) // 4 + CHAT_OVERHEAD_TOKENS
+        return len(encoding.encode_ordinary(message)) + CHAT_OVERHEAD_TOKENS
+
+    def _window(self, request: ChatRequest) -> Optional[int]:
+        window = self.context_window(request.model)
+        self._counters["unknown_model" if window is None else "checked"] += 1
+        return window
+
+    def _fits_unchecked(self, request: ChatRequest, window: int) -> bool:
+        # BPE never produces more tokens than the prompt has bytes, so a
+        # prompt whose byte length leaves room needs no exact count.
+        available = window - len(request.message.encode("utf-8")) - CHAT_OVERHEAD_TOKENS
+        fits = available >= 1 and (request.max_tokens is None or request.max_tokens <= available)
+        if fits:
+            self._counters["bounded"] += 1
+        return fits
+
+    def _apply(self, request: ChatRequest, window: int, prompt_tokens: int) -> ChatRequest:
+        available = window - prompt_tokens
+        if available < 1:
+            self._counters["rejected"] += 1
+            raise PromptTooLong(
+                f"Prompt is {prompt_tokens} tokens, which leaves no room for a completion "
+                f"in the {window}-token context window of {request.model}"
+            )
+        if request.max_tokens is not None and request.max_tokens > available:
+            self._counters["clamped"] += 1
+            logger.debug(f"Clamping max_tokens from {request.max_tokens} to {available} for {request.model}")
+            return request.model_copy(update={"max_tokens": available})
+        return request
+
+    def preflight(self, request: ChatRequest) -> ChatRequest:
+        """Reject a prompt that cannot fit, and clamp ``max_tokens`` to the room left.
+
+        Raises ``PromptTooLong`` (a ``ValueError``, so a 400 VALIDATION_ERROR)
+        when no completion token would fit. Models with no known context
+        window pass through unchecked.
+        """
+        window = self._window(request)
+        if window is None or self._fits_unchecked(request, window):
+            return request
+        return self._apply(request, window, self.count_prompt(request.model, request.message))
+
+    async def apreflight(self, request: ChatRequest) -> ChatRequest:
+        """``preflight`` for the event loop: long prompts are tokenized on a thread."""
+        window = self._window(request)
+        if window is None or self._fits_unchecked(request, window):
+            return request
+        if len(request.message) > self.thread_count_chars:
+            prompt_tokens = await asyncio.to_thread(self.count_prompt, request.model, request.message)
+        else:
+            prompt_tokens = self.count_prompt(request.model, request.message)
+        return self._apply(request, window, prompt_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "encodings": sorted(self._encodings),
+            **{name: int(value) for name, value in self._counters.items()}
+        }
@@ -0,0 +1,181 @@
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Ejects an upstream endpoint after consecutive failures.
+
+    After ``failure_threshold`` failures in a row the circuit opens and the
+    endpoint gets no traffic for ``reset_timeout`` seconds. Then a single
+    probe request is let through (half-open): success closes the circuit,
+    failure opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+
+    def available(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self._clock() - self.opened_at >= self.reset_timeout
+        return False
+
+    def on_pick(self) -> None:
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = self._clock()
+            self.opened += 1
+
+    def release(self) -> None:
+        # The probe ended without a verdict (cancelled, or the request's own
+        # fault); let the next request probe instead.
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+
+class UpstreamEndpoint:
+    """One upstream target (base URL, key, deployment) with its live health."""
+
+    def __init__(
+        self,
+        name: str,
+        client: Any,
+        model: Optional[str],
+        breaker: CircuitBreaker,
+        ewma_alpha: float,
+        stale_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.breaker = breaker
+        self.ewma_alpha = ewma_alpha
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.last_observed = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def latency_estimate(self) -> Optional[float]:
+        """EWMA latency, or None if unmeasured or not observed recently."""
+        if self.latency is None or self._clock() - self.last_observed > self.stale_seconds:
+            return None
+        return self.latency
+
+    def score(self, default_latency: float) -> float:
+        """Expected cost of sending one more request here; lower is better."""
+        latency = self.latency_estimate()
+        if latency is None:
+            latency = default_latency
+        return latency * (self.in_flight + 1) / max(0.05, 1.0 - self.error_rate)
+
+    def observe(self, seconds: float, ok: bool) -> None:
+        alpha = self.ewma_alpha
+        self.requests += 1
+        if ok:
+            self.latency = seconds if self.latency is None else (1 - alpha) * self.latency + alpha * seconds
+            self.error_rate = (1 - alpha) * self.error_rate
+            if self.breaker.state != CLOSED:
+                logger.info(f"Circuit closed for upstream endpoint {self.name}")
+            self.breaker.record_success()
+        else:
+            self.errors += 1
+            self.error_rate = (1 - alpha) * self.error_rate + alpha
+            opened = self.breaker.opened
+            self.breaker.record_failure()
+            if self.breaker.opened != opened:
+                logger.warning(
+                    f"Circuit opened for upstream endpoint {self.name} after {self.breaker.failures} "
+                    f"failure(s); retrying in {self.breaker.reset_timeout:.0f}s"
+                )
+        self.last_observed = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "latency_ewma_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "error_rate_ewma": round(self.error_rate, 3),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "circuit_opened": self.breaker.opened
+        }
+
+class UpstreamRouter:
+    """Maps logical model names to pools of upstream endpoints.
+
+    Each request picks two random endpoints whose circuit admits traffic and
+    takes the one with the lower score (EWMA latency x queued requests,
+    inflated by the EWMA error rate). Power-of-two-choices keeps a burst of
+    requests from all piling onto whichever endpoint looked fastest a moment
+    ago. An endpoint with no recent samples and nothing in flight is picked
+    first, so a recovered region is re-measured. When every circuit is open
+    the endpoint ejected longest ago is used rather than failing the request.
+    """
+
+    def __init__(self, routes: Dict[str, List[UpstreamEndpoint]]):
+        self.routes = routes
+
+    def pick(self, model: str, avoid: Optional[Set[str]] = None) -> Optional[UpstreamEndpoint]:
+        """Endpoint for ``model``, or None if the model has no route.
+
+        ``avoid`` names endpoints already tried by this request (a retry or
+        hedge); they are only reused when nothing else is available.
+        """
+        endpoints = self.routes.get(model)
+        if not endpoints:
+            return None
+
+        candidates = [e for e in endpoints if e.breaker.available()]
+        if avoid:
+            candidates = [e for e in candidates if e.name not in avoid] or candidates
+        if not candidates:
+            endpoint = min(endpoints, key=lambda e: e.breaker.opened_at)
+            logger.warning(f"All upstream circuits open for model {model}; trying {endpoint.name}")
+            return endpoint
+
+        for endpoint in candidates:
+            if endpoint.latency_estimate() is None and endpoint.in_flight == 0:
+                endpoint.breaker.on_pick()
+                return endpoint
+
+        if len(candidates) == 1:
+            endpoint = candidates[0]
+        else:
+            first, second = random.sample(candidates, 2)
+            known = [e.latency_estimate() for e in (first, second) if e.latency_estimate() is not None]
+            default_latency = max(known) if known else 1.0
+            endpoint = first if first.score(default_latency) <= second.score(default_latency) else second
+        endpoint.breaker.on_pick()
+        return endpoint
+
+    def stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {model: [e.stats() for e in endpoints] for model, endpoints in self.routes.items()}
@@ -0,0 +1,52 @@
+import os
+from typing import Optional
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> Optional[float]:
+    """CPU quota of the container in cores, or None if it is unlimited.
+
+    Reads cgroup v2 ``cpu.max`` ("200000 100000" = 2 cores, "max 100000" =
+    no limit), falling back to cgroup v1 ``cpu.cfs_quota_us``/``cfs_period_us``.
+    """
+    cpu_max = _read(os.path.join(root, "cpu.max"))
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota == "max" or not period:
+            return None
+        return int(quota) / int(period)
+
+    quota = _read(os.path.join(root, "cpu", "cpu.cfs_quota_us")) or _read(os.path.join(root, "cpu.cfs_quota_us"))
+    period = _read(os.path.join(root, "cpu", "cpu.cfs_period_us")) or _read(os.path.join(root, "cpu.cfs_period_us"))
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+def available_cpus(root: str = CGROUP_ROOT) -> float:
+    """CPUs this process may actually use: the cgroup quota, capped by CPU affinity.
+
+    ``os.cpu_count()`` reports the host's cores, which oversubscribes a
+    container limited to a fraction of them.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = float(len(os.sched_getaffinity(0)))
+    else:
+        cpus = float(os.cpu_count() or 1)
+    limit = cgroup_cpu_limit(root)
+    return min(cpus, limit) if limit is not None else cpus
+
+def auto_worker_count(cpus: float, workers_per_cpu: float, max_workers: int) -> int:
+    """Worker processes for ``cpus`` cores.
+
+    Each UvicornWorker is a single event loop that is mostly waiting on the
+    upstream, so one per core keeps every core busy without the context
+    switching of the ``2 * cores + 1`` rule meant for sync workers.
+    """
+    return max(1, min(max_workers, int(cpus * workers_per_cpu + 0.5)))
@@ -0,0 +1,61 @@
+import gc
+import logging
+import time
+from fastapi import FastAPI
+from .models import (
+    BatchChatRequest, BatchChatResponse, ChatRequest, ChatResponse, ErrorResponse, HealthResponse, UsageInfo
+)
+
+logger = logging.getLogger(__name__)
+
+def warm_up(app: FastAPI) -> float:
+    """Pay the app's one-off first-request costs in the gunicorn master.
+
+    Builds the OpenAPI schema and the middleware stack, runs every request and
+    response model through validation and serialization once, imports the
+    OpenAI SDK modules that are otherwise loaded lazily on first use and loads
+    the tokenizer encodings used by the prompt preflight. With
+    ``preload_app`` the results are inherited by every worker at fork instead
+    of being rebuilt in each of them. Returns the time taken in seconds.
+    """
+    start = time.perf_counter()
+
+    app.openapi()
+    if app.middleware_stack is None:
+        app.middleware_stack = app.build_middleware_stack()
+
+    request = ChatRequest(message="warm up", temperature=0)
+    response = ChatResponse(
+        response="warm up",
+        model=request.model,
+        usage=UsageInfo(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    )
+    BatchChatRequest.model_validate({"requests": [request.model_dump()]})
+    BatchChatResponse.model_validate_json(
+        BatchChatResponse(results=[{"index": 0, "result": response}]).model_dump_json()
+    )
+    ChatResponse.model_validate_json(response.model_dump_json())
+    HealthResponse(status="healthy", version="warm up", environment="warm up").model_dump_json()
+    ErrorResponse(error="warm up").model_dump_json()
+
+    import openai.resources.chat.completions  # noqa: F401
+    import openai.resources.models  # noqa: F401
+    import openai.types.chat  # noqa: F401
+
+    # BPE ranks are tens of MB per encoding: load them once here and share them.
+    from .services.openai_service import openai_service
+    if openai_service.token_counter is not None:
+        openai_service.token_counter.preload()
+
+    return time.perf_counter() - start
+
+def freeze_for_fork() -> None:
+    """Move every object allocated so far into the permanent GC generation.
+
+    Frozen objects are never scanned by the collector, so a worker's GC
+    passes don't write to their headers and the pages stay shared
+    copy-on-write with the master instead of being copied into every worker.
+    """
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Froze {gc.get_freeze_count()} objects before forking workers")
@@ -0,0 +1,158 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Callable, List, Optional
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+# Seconds of gunicorn's graceful_timeout kept back for the lifespan shutdown
+# (closing the upstream pool, flushing metrics) after connections have drained.
+LIFESPAN_SHUTDOWN_MARGIN = 5
+
+# Replacement workers requested by retiring workers and not yet given back.
+# Created in the master when gunicorn imports the worker class, so every
+# forked worker shares it.
+surge_workers = multiprocessing.Value("i", 0)
+
+# Environment variable holding a worker's slot: the lowest index no other
+# live worker holds. Unlike the pid, a replacement worker reuses it, so
+# per-worker metric series stay bounded across recycles.
+WORKER_SLOT_ENV = "GATEWAY_WORKER_SLOT"
+
+class DrainingServer(Server):
+    """Uvicorn server that drains keep-alive connections before shutting down.
+
+    ``on_retire`` runs once, just before the server stops accepting, when it
+    leaves because of ``limit_max_requests`` (not on a master-initiated stop).
+
+    Shutdown first closes the listening sockets and, for up to the keep-alive
+    timeout, answers every request on an open connection with
+    ``Connection: close``, so clients stop reusing them. Closing an idle
+    keep-alive connection outright races a client that is sending on it, and
+    a POST lost that way is not retried. Only then does uvicorn's own
+    shutdown close what is left and wait for in-flight requests. Throughout,
+    gunicorn is still notified so a stream that runs past the worker
+    ``timeout`` is not killed mid-response.
+    """
+
+    def __init__(self, config, on_retire: Optional[Callable[[], None]] = None):
+        super().__init__(config=config)
+        self.on_retire = on_retire
+        self.retiring = False
+        self.draining = False
+
+    def wrap(self, app):
+        """ASGI wrapper adding ``Connection: close`` to responses started while draining."""
+        async def close_when_draining(scope, receive, send):
+            if scope["type"] != "http":
+                await app(scope, receive, send)
+                return
+
+            async def send_closing(message):
+                if self.draining and message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", []), (b"connection", b"close")]}
+                await send(message)
+
+            await app(scope, receive, send_closing)
+
+        return close_when_draining
+
+    async def on_tick(self, counter: int) -> bool:
+        should_exit = await super().on_tick(counter)
+        if should_exit and not self.should_exit and not self.retiring:
+            self.retiring = True
+            if self.on_retire is not None:
+                self.on_retire()
+        return should_exit
+
+    async def shutdown(self, sockets: Optional[List] = None) -> None:
+        heartbeat = asyncio.ensure_future(self._heartbeat())
+        try:
+            await self._drain_keep_alive(sockets)
+            await super().shutdown(sockets=sockets)
+        finally:
+            heartbeat.cancel()
+
+    async def _drain_keep_alive(self, sockets: Optional[List]) -> None:
+        self.draining = True
+        for server in self.servers:
+            server.close()
+        for sock in sockets or []:
+            sock.close()
+
+        deadline = time.monotonic() + self.config.timeout_keep_alive + 1
+        while self.server_state.connections and not self.force_exit and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+    async def _heartbeat(self) -> None:
+        if self.config.callback_notify is None:
+            return
+        deadline = (
+            time.monotonic() + self.config.timeout_keep_alive + 1
+            + (self.config.timeout_graceful_shutdown or 0) + LIFESPAN_SHUTDOWN_MARGIN
+        )
+        while time.monotonic() < deadline:
+            await self.config.callback_notify()
+            await asyncio.sleep(1)
+
+class DrainingUvicornWorker(UvicornWorker):
+    """UvicornWorker that drains in-flight requests and is replaced before it leaves.
+
+    Requests in progress get up to ``graceful_timeout`` (less the lifespan
+    margin) to finish, instead of uvicorn waiting unbounded and gunicorn
+    killing the worker at ``timeout``. A worker retiring at ``max_requests``
+    asks the master for a replacement (SIGTTIN) before it stops accepting, so
+    the pool is never a worker short; ``release_surge_worker`` in the
+    ``child_exit`` hook shrinks it back once the old worker is gone.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(1, self.cfg.graceful_timeout - LIFESPAN_SHUTDOWN_MARGIN)
+
+    def request_replacement(self) -> None:
+        with surge_workers.get_lock():
+            surge_workers.value += 1
+        self.log.info("Worker reached max requests, draining (pid: %s)", self.pid)
+        os.kill(self.ppid, signal.SIGTTIN)
+
+    async def _serve(self) -> None:
+        server = DrainingServer(config=self.config, on_retire=self.request_replacement)
+        self.config.app = server.wrap(self.wsgi)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+def release_surge_worker(server) -> bool:
+    """Give back one replacement worker, from the master's ``child_exit`` hook.
+
+    Returns True if the exiting worker's slot was already filled by a
+    replacement, in which case the master's target count is lowered instead
+    of spawning another worker.
+    """
+    with surge_workers.get_lock():
+        if surge_workers.value <= 0:
+            return False
+        surge_workers.value -= 1
+    server.num_workers -= 1
+    return True
+
+def assign_worker_slot(server, worker) -> int:
+    """Give a worker about to be forked the lowest free slot, from ``pre_fork``.
+
+    The master only lists live workers, so an exited worker's slot is free
+    again for the next one forked.
+    """
+    taken = {getattr(live, "slot", None) for live in server.WORKERS.values()}
+    worker.slot = next(slot for slot in itertools.count() if slot not in taken)
+    return worker.slot
+
+def export_worker_slot(worker) -> None:
+    """Publish the worker's slot to the app, from ``post_fork`` (in the worker)."""
+    os.environ[WORKER_SLOT_ENV] = str(worker.slot)
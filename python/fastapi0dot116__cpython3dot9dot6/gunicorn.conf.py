@@ -1,36 +1,76 @@
-import multiprocessing
+import os
+import shutil
 from app.config import settings
+from app.tuning import auto_worker_count, available_cpus
+
+# Prometheus multiprocess mode. The directory must be in the environment before
+# the app (and prometheus_client) is imported by preload_app, and it is emptied
+# on every start so counters from a previous run are not merged in.
+prometheus_multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.metrics_multiproc_dir)
+shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
 
 bind = f"{settings.host}:{settings.port}"
-workers = 4
-worker_class = "uvicorn.workers.UvicornWorker"
-worker_connections = 1000
-max_requests = 1000
-max_requests_jitter = 100
+# One worker per CPU the container may use (cgroup quota, not host cores),
+# unless WORKERS pins it. Per-worker concurrency is capped in the app by
+# LoadSheddingMiddleware; UvicornWorker ignores worker_connections.
+workers = settings.workers or auto_worker_count(available_cpus(), settings.workers_per_cpu, settings.max_workers)
+# A retiring worker asks for its replacement, then drains (app/worker.py).
+worker_class = "app.worker.DrainingUvicornWorker"
+max_requests = settings.max_requests
+max_requests_jitter = settings.max_requests_jitter
 preload_app = True
 
-timeout = 30
+timeout = settings.worker_timeout
+# Time a stopping worker gets to finish in-flight requests and streams
+graceful_timeout = settings.graceful_timeout
 keepalive = 5
 
 user = None
 group = None
 
 loglevel = settings.log_level.lower()
-accesslog = "-"
+# Access logging is done by the app (app/access_log.py), once per request.
+accesslog = None
 errorlog = "-"
-access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
 
 proc_name = "fastapi-openai-gateway"
 
 def post_fork(server, worker):
-    server.log.info("Worker spawned (pid: %s)", worker.pid)
+    # Sockets, files and threads are opened here in the worker, by the app
+    # lifespan (OpenAIService.start/warm_up, log listener), never in the master.
+    from app.worker import export_worker_slot
+    export_worker_slot(worker)
+    server.log.info("Worker spawned (pid: %s, slot: %s)", worker.pid, worker.slot)
 
 def pre_fork(server, worker):
-    pass
+    # A stable slot index per live worker, for per-worker metric tags
+    from app.worker import assign_worker_slot
+    assign_worker_slot(server, worker)
 
 def when_ready(server):
+    if preload_app:
+        # Build everything immutable once in the master, then freeze it so
+        # the forked workers share those pages copy-on-write.
+        from app.main import app
+        from app.warmup import freeze_for_fork, warm_up
+        elapsed = warm_up(app)
+        freeze_for_fork()
+        server.log.info("App warmed up in %.0fms", elapsed * 1000)
     server.log.info("Server is ready. Spawning workers")
 
+def child_exit(server, worker):
+    # A worker that retired at max_requests was replaced before it started
+    # draining; give that extra slot back instead of spawning another.
+    from app.worker import release_surge_worker
+    if release_surge_worker(server):
+        server.log.info("Retired worker exited (pid: %s), replacement already running", worker.pid)
+
+    # Drop the dead worker's live gauges (in-flight counts); its counters and
+    # histograms stay in the directory so totals don't go backwards.
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
 def worker_int(worker):
     worker.log.info("worker received INT or QUIT signal")
 
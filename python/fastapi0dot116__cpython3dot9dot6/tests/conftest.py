@@ -2,10 +2,13 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 import os
+import tempfile
 
 os.environ["OPENAI_API_KEY"] = "test-key"
 os.environ["DEBUG"] = "true"
 os.environ["LOG_LEVEL"] = "DEBUG"
+# Keep the shared rate-limit budget out of the real default path
+os.environ["RATE_LIMIT_STATE_PATH"] = os.path.join(tempfile.mkdtemp(), "ratelimit.state")
 
 @pytest.fixture(scope="session")
 def test_env():
@@ -26,4 +29,28 @@ def mock_openai_response():
     mock_response.usage.prompt_tokens = 10
     mock_response.usage.completion_tokens = 12
     mock_response.usage.total_tokens = 22
-    return mock_response
\ No newline at end of file
+    return mock_response
+
+@pytest.fixture
+def stub_upstream():
+    from tests.stub_upstream import run_stub_upstream
+    with run_stub_upstream() as (base_url, state):
+        yield base_url, state
+
+@pytest.fixture
+def upstream_service(stub_upstream, monkeypatch):
+    from app.config import settings
+    from app.services.openai_service import OpenAIService
+    base_url, state = stub_upstream
+    monkeypatch.setattr(settings, "openai_base_url", base_url)
+    return OpenAIService(), state
+
+@pytest.fixture
+def stub_client(stub_upstream, monkeypatch):
+    """TestClient running the app lifespan against the stub upstream."""
+    from app.config import settings
+    from app.main import app
+    base_url, state = stub_upstream
+    monkeypatch.setattr(settings, "openai_base_url", base_url)
+    with TestClient(app) as test_client:
+        yield test_client, state
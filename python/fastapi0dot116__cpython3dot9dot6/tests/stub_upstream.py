@@ -0,0 +1,184 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Runs a tiny FastAPI app under uvicorn on a free localhost port in a background
+thread so the gateway's real HTTP client, connection pool and timeouts can be
+exercised without network access or an API key.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class StubState:
+    """Knobs and counters shared between the test and the stub server."""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.chunk_delay = 0.0
+        self.fail_mid_stream = False
+        self.throttle_next = 0
+        self.retry_after_ms = 50
+        self.fail_next = 0
+        self.slow_next = 0
+        self.slow_delay = 1.0
+        self.ratelimit_headers = {}
+        self.throttled = 0
+        self.content = "Hello from the stub upstream"
+        self.model = "gpt-3.5-turbo-stub"
+        self.requests = 0
+        self.last_model = None
+        self.last_max_tokens = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Hold non-streaming requests until this many are in flight at once
+        # (or gather_timeout passes), so overlap doesn't depend on timing
+        self.gather = 0
+        self.gather_timeout = 5.0
+        self.gathered = None
+
+
+def create_stub_app(state: StubState) -> FastAPI:
+    app = FastAPI()
+
+    def usage_for(body: dict) -> dict:
+        prompt_tokens = len(body["messages"][0]["content"].split())
+        completion_tokens = len(state.content.split())
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    async def stream_chunks(body: dict):
+        created = int(time.time())
+        words = state.content.split(" ")
+        for i, word in enumerate(words):
+            if state.chunk_delay:
+                await asyncio.sleep(state.chunk_delay)
+            if state.fail_mid_stream and i == len(words) // 2:
+                raise RuntimeError("stub upstream dropped the stream")
+            chunk = {
+                "id": f"chatcmpl-stub-{state.requests}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": state.model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if i == 0 else f" {word}"},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        if body.get("stream_options", {}).get("include_usage"):
+            chunk = {
+                "id": f"chatcmpl-stub-{state.requests}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": state.model,
+                "choices": [],
+                "usage": usage_for(body)
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        state.requests += 1
+        state.last_model = body["model"]
+        state.last_max_tokens = body.get("max_tokens")
+        if state.throttle_next > 0:
+            state.throttle_next -= 1
+            state.throttled += 1
+            return JSONResponse(
+                status_code=429,
+                headers={
+                    **state.ratelimit_headers,
+                    "retry-after-ms": str(state.retry_after_ms),
+                    "x-ratelimit-remaining-requests": "0"
+                },
+                content={"error": {
+                    "message": "Rate limit reached for requests",
+                    "type": "requests",
+                    "code": "rate_limit_exceeded"
+                }}
+            )
+        if state.fail_next > 0:
+            state.fail_next -= 1
+            return JSONResponse(status_code=503, content={"error": {
+                "message": "The server is overloaded",
+                "type": "server_error",
+                "code": None
+            }})
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(body), media_type="text/event-stream")
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            if state.gather:
+                if state.gathered is None:
+                    state.gathered = asyncio.Event()
+                if state.in_flight >= state.gather:
+                    state.gathered.set()
+                try:
+                    await asyncio.wait_for(state.gathered.wait(), state.gather_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            if state.slow_next > 0:
+                state.slow_next -= 1
+                await asyncio.sleep(state.slow_delay)
+            elif state.delay:
+                await asyncio.sleep(state.delay)
+            return JSONResponse(headers=state.ratelimit_headers, content={
+                "id": f"chatcmpl-stub-{state.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": state.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": state.content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage_for(body)
+            })
+        finally:
+            state.in_flight -= 1
+
+    return app
+
+
+@contextmanager
+def run_stub_upstream() -> Iterator[tuple]:
+    """Serve the stub on 127.0.0.1 and yield ``(base_url, state)``."""
+    state = StubState()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_stub_app(state), log_level="warning", backlog=2048
+    ))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Stub upstream failed to start")
+        time.sleep(0.01)
+
+    try:
+        yield f"http://127.0.0.1:{port}/v1", state
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        sock.close()
@@ -0,0 +1,143 @@
+import io
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from app.access_log import AccessLogMiddleware, DeferredQueueHandler, start_queue_logging, stop_queue_logging
+
+def _app(sample_rate: float = 1.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="nope")
+
+    app.add_middleware(AccessLogMiddleware, sample_rate=sample_rate)
+    return app
+
+def test_access_log_line_is_structured(caplog):
+    client = TestClient(_app())
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get("/ok?secret=1")
+
+    [record] = [r for r in caplog.records if r.name == "app.access"]
+    message = record.getMessage()
+    assert message.startswith("method=GET path=/ok status=200 duration_ms=")
+    assert "secret" not in message
+
+def test_successful_requests_are_sampled_but_errors_are_not(caplog):
+    client = TestClient(_app(sample_rate=0.0))
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        client.get("/ok")
+        client.get("/missing")
+
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.access"]
+    assert len(messages) == 1
+    assert "status=404" in messages[0]
+
+def test_queue_logging_moves_handlers_off_the_caller_and_restores_them():
+    root = logging.getLogger()
+    original = root.handlers[:]
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    root.addHandler(handler)
+    try:
+        start_queue_logging()
+        assert handler not in root.handlers
+        assert any(isinstance(h, DeferredQueueHandler) for h in root.handlers)
+
+        logging.getLogger("app.test").warning("queued %s", "record")
+    finally:
+        stop_queue_logging()
+        root.removeHandler(handler)
+
+    assert "queued record" in stream.getvalue()
+    assert root.handlers == original
+
+# Benchmark: event-loop cost per request of the old middleware versus the new
+# one. Requests are driven straight through the ASGI interface so the numbers
+# are not swamped by a test client.
+
+REQUESTS = 2000
+
+def _benchmark_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    bench_logger = logging.getLogger(name)
+    bench_logger.handlers = [handler]
+    bench_logger.setLevel(logging.INFO)
+    bench_logger.propagate = False
+    return bench_logger
+
+def _legacy_app(bench_logger: logging.Logger) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        start_time = time.time()
+        bench_logger.info(f"Request: {request.method} {request.url}")
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        bench_logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
+        return response
+
+    return app
+
+def _bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    return app
+
+async def _seconds_per_request(app) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ok", "raw_path": b"/ok", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / REQUESTS
+
+@pytest.mark.asyncio
+async def test_access_log_overhead_benchmark(monkeypatch):
+    import app.access_log as access_log
+    sink = logging.StreamHandler(io.StringIO())
+    bare = await _seconds_per_request(_bare_app())
+    legacy = await _seconds_per_request(_legacy_app(_benchmark_logger("bench.legacy", sink)))
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    monkeypatch.setattr(access_log, "logger", _benchmark_logger("bench.access", DeferredQueueHandler(records)))
+    listener = QueueListener(records, sink)
+    listener.start()
+    try:
+        current = await _seconds_per_request(_app())
+    finally:
+        listener.stop()
+
+    print(f"\nper-request logging overhead: log_requests middleware {(legacy - bare) * 1e6:.0f}us, "
+          f"AccessLogMiddleware {(current - bare) * 1e6:.0f}us")
+
+    assert current < legacy
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.models import ChatRequest, ChatResponse, UsageInfo
+from app.services.batch_service import iter_batch_results, run_batch
+from app.services.fair_scheduler import Caller, SchedulerRejected
+
+class _FakeService:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.callers = set()
+
+    async def send_chat_completion(self, request: ChatRequest, use_cache: bool = True, caller=None) -> ChatResponse:
+        self.callers.add(caller)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later items finish first so completion order differs from request order.
+            await asyncio.sleep(0.01 * (10 - int(request.message.split()[-1])))
+            if request.message.startswith("fail"):
+                raise Exception("OpenAI API error: boom")
+            if request.message.startswith("invalid"):
+                raise ValueError("bad request")
+            if request.message.startswith("shed"):
+                raise SchedulerRejected("batch", "queue full", 10.0)
+            return ChatResponse(
+                response=f"echo {request.message}",
+                model=request.model,
+                usage=UsageInfo(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+            )
+        finally:
+            self.in_flight -= 1
+
+@pytest.mark.asyncio
+async def test_run_batch_returns_results_in_request_order():
+    service = _FakeService()
+    requests = [ChatRequest(message=f"item {i}") for i in range(10)]
+
+    results = await run_batch(service, requests, concurrency=3)
+
+    assert [r.index for r in results] == list(range(10))
+    assert [r.result.response for r in results] == [f"echo item {i}" for i in range(10)]
+    assert service.max_in_flight == 3
+
+@pytest.mark.asyncio
+async def test_run_batch_reports_per_item_errors():
+    service = _FakeService()
+    requests = [
+        ChatRequest(message="item 1"),
+        ChatRequest(message="fail 2"),
+        ChatRequest(message="invalid 3"),
+        ChatRequest(message="shed 4"),
+    ]
+    caller = Caller(priority="batch", tenant="backfill")
+
+    results = await run_batch(service, requests, concurrency=2, caller=caller)
+
+    assert results[0].result is not None and results[0].error is None
+    assert results[1].error.error_code == "OPENAI_ERROR"
+    assert results[2].error.error_code == "VALIDATION_ERROR"
+    assert results[3].error.error_code == "OVERLOADED"
+    assert service.callers == {caller}
+
+@pytest.mark.asyncio
+async def test_iter_batch_results_yields_in_completion_order():
+    service = _FakeService()
+    requests = [ChatRequest(message=f"item {i}") for i in range(5)]
+
+    indexes = [r.index async for r in iter_batch_results(service, requests, concurrency=5)]
+
+    assert indexes == [4, 3, 2, 1, 0]
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_early_stops_workers():
+    service = _FakeService()
+    requests = [ChatRequest(message=f"item {i % 10}") for i in range(50)]
+
+    results = iter_batch_results(service, requests, concurrency=4)
+    await results.__anext__()
+    await results.aclose()
+    await asyncio.sleep(0)
+
+    assert service.in_flight == 0
@@ -0,0 +1,114 @@
+import json
+import time
+from typing import List
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.body_limit import BodySizeLimitMiddleware
+from app.models import ChatRequest
+
+def _scope(path: str = "/chat", content_length: int = None) -> dict:
+    headers = [(b"content-type", b"application/json")]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    return {"type": "http", "method": "POST", "path": path, "headers": headers}
+
+class _Client:
+    """Feeds a body in chunks and records what the middleware sends back."""
+
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = list(chunks)
+        self.reads = 0
+        self.sent: List[dict] = []
+
+    async def receive(self):
+        self.reads += 1
+        if not self.chunks:
+            return {"type": "http.disconnect"}
+        chunk = self.chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(self.chunks)}
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    @property
+    def status(self) -> int:
+        return self.sent[0]["status"]
+
+async def _echo_app(scope, receive, send):
+    message = await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": message["body"]})
+
+def _middleware(**overrides) -> BodySizeLimitMiddleware:
+    return BodySizeLimitMiddleware(_echo_app, **{"default_limit": 100, "route_limits": {"/chat/batch": 1000}, **overrides})
+
+@pytest.mark.asyncio
+async def test_declared_oversized_body_is_rejected_without_reading_it():
+    client = _Client([b"x" * 50] * 100)
+    await _middleware()(_scope(content_length=5000), client.receive, client.send)
+
+    assert client.status == 413
+    assert client.reads == 0
+    body = json.loads(client.sent[1]["body"])
+    assert body["detail"]["error_code"] == "PAYLOAD_TOO_LARGE"
+    assert (b"connection", b"close") in client.sent[0]["headers"]
+
+@pytest.mark.asyncio
+async def test_chunked_body_is_rejected_once_it_crosses_the_limit():
+    client = _Client([b"x" * 40] * 100)
+    await _middleware()(_scope(), client.receive, client.send)
+
+    assert client.status == 413
+    # Three 40-byte chunks cross the 100-byte limit; the other 97 are never read.
+    assert client.reads == 3
+
+@pytest.mark.asyncio
+async def test_body_within_the_route_limit_is_replayed_to_the_app():
+    client = _Client([b"x" * 400, b"y" * 400])
+    await _middleware()(_scope("/chat/batch", content_length=800), client.receive, client.send)
+    assert client.status == 200
+    assert client.sent[1]["body"] == b"x" * 400 + b"y" * 400
+
+    client = _Client([b"x" * 400])
+    await _middleware(default_limit=0)(_scope(), client.receive, client.send)
+    assert client.status == 200
+
+def test_gateway_rejects_oversized_chat_bodies(client):
+    response = client.post("/chat", json={"message": "x" * (2 * 1024 * 1024)})
+    assert response.status_code == 413
+    assert response.json()["detail"]["error_code"] == "PAYLOAD_TOO_LARGE"
+
+    metrics = client.get("/metrics").text
+    assert 'gateway_request_body_rejected_bytes_total{route="default"}' in metrics
+
+# Cost of turning away a 4 MiB body: rejected from its Content-Length header,
+# against reading, parsing and validating it only to fail validation.
+
+BIG_BODY = json.dumps({"message": "x" * (4 * 1024 * 1024)}).encode()
+
+def _validation_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/chat")
+    async def chat(request: ChatRequest):
+        return {"ok": True}
+
+    return app
+
+def _time_rejections(app, iterations: int = 10) -> float:
+    client = TestClient(app)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = client.post("/chat", content=BIG_BODY, headers={"content-type": "application/json"})
+        assert response.status_code in (413, 422)
+    return (time.perf_counter() - start) / iterations
+
+def test_rejecting_oversized_bodies_early_is_cheaper():
+    app = _validation_app()
+    validated = _time_rejections(app)
+    guarded = _time_rejections(BodySizeLimitMiddleware(app, default_limit=1024 * 1024))
+
+    print(f"\n4 MiB body: rejected by validation in {validated * 1000:.1f}ms, "
+          f"by the body limit in {guarded * 1000:.1f}ms")
+    assert guarded < validated
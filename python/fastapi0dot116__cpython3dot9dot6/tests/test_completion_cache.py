@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import patch
+from app.models import ChatRequest, ChatResponse, UsageInfo
+from app.services.completion_cache import (
+    CompletionCache,
+    SharedCompletionCache,
+    completion_cache_key,
+    is_deterministic,
+)
+
+def _response(text: str = "cached") -> ChatResponse:
+    return ChatResponse(
+        response=text,
+        model="gpt-3.5-turbo",
+        usage=UsageInfo(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    )
+
+def test_cache_key_is_canonical():
+    a = ChatRequest(message="Hi", model="gpt-4", max_tokens=10, temperature=0)
+    b = ChatRequest(temperature=0, max_tokens=10, model="gpt-4", message="Hi")
+    c = ChatRequest(message="Hi", model="gpt-4", max_tokens=11, temperature=0)
+
+    assert completion_cache_key(a) == completion_cache_key(b)
+    assert completion_cache_key(a) != completion_cache_key(c)
+
+def test_only_zero_temperature_is_deterministic():
+    assert is_deterministic(ChatRequest(message="Hi", temperature=0))
+    assert not is_deterministic(ChatRequest(message="Hi", temperature=0.7))
+
+@pytest.mark.asyncio
+async def test_hit_returns_independent_copy():
+    cache = CompletionCache(ttl_seconds=60, max_entries=10, max_bytes=1 << 20)
+    await cache.set("k", _response())
+
+    first = await cache.get("k")
+    second = await cache.get("k")
+
+    assert first.response == "cached"
+    assert first is not second
+    assert await cache.get("missing") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    cache = CompletionCache(ttl_seconds=10, max_entries=10, max_bytes=1 << 20)
+    with patch("app.services.completion_cache.time.monotonic", return_value=100.0):
+        await cache.set("k", _response())
+    with patch("app.services.completion_cache.time.monotonic", return_value=111.0):
+        assert await cache.get("k") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
+
+@pytest.mark.asyncio
+async def test_lru_eviction_by_entry_count():
+    cache = CompletionCache(ttl_seconds=60, max_entries=2, max_bytes=1 << 20)
+    await cache.set("a", _response("a"))
+    await cache.set("b", _response("b"))
+    await cache.get("a")
+    await cache.set("c", _response("c"))
+
+    assert await cache.get("b") is None
+    assert (await cache.get("a")).response == "a"
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_memory_budget_is_enforced():
+    entry_size = len(_response("x" * 100).model_dump_json())
+    cache = CompletionCache(ttl_seconds=60, max_entries=100, max_bytes=entry_size * 3)
+    for i in range(10):
+        await cache.set(str(i), _response("x" * 100))
+
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["bytes"] <= cache.max_bytes
+    assert stats["evictions"] == 7
+
+@pytest.mark.asyncio
+async def test_shared_backend_is_used_across_instances(tmp_path):
+    path = str(tmp_path / "completions.db")
+    worker_a = CompletionCache(60, 10, 1 << 20, shared=SharedCompletionCache(path, 60, 100))
+    worker_b = CompletionCache(60, 10, 1 << 20, shared=SharedCompletionCache(path, 60, 100))
+    try:
+        await worker_a.set("k", _response("shared"))
+        hit = await worker_b.get("k")
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+    assert hit.response == "shared"
+    assert worker_b.stats()["shared_hits"] == 1
@@ -1,8 +1,13 @@
 import pytest
 import os
+import subprocess
+import sys
+from pathlib import Path
 from unittest.mock import patch
 from app.config import Settings
 
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
 def test_settings_with_valid_api_key():
     with patch.dict(os.environ, {
         'OPENAI_API_KEY': 'test-api-key',
@@ -33,4 +38,26 @@ def test_settings_defaults():
         assert settings.debug is False
         assert settings.host == "127.0.0.1"
         assert settings.port == 8000
-        assert settings.log_level == "INFO"
\ No newline at end of file
+        assert settings.log_level == "INFO"
+
+def test_settings_are_parsed_once_and_reloaded_on_demand():
+    from app.config import get_settings, reload_settings, settings
+    assert get_settings() is get_settings()
+    try:
+        with patch.dict(os.environ, {'APP_NAME': 'Reloaded App'}):
+            assert settings.app_name == "FastAPI OpenAI Gateway"
+            reload_settings()
+            assert settings.app_name == 'Reloaded App'
+    finally:
+        reload_settings()
+    assert settings.app_name == "FastAPI OpenAI Gateway"
+
+def test_importing_config_does_no_io():
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.config as c; print(c.get_settings.cache_info().misses)"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    # No API key is needed, and nothing is parsed, until settings are read.
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "0"
@@ -0,0 +1,118 @@
+import asyncio
+import socket
+import pytest
+from fastapi import FastAPI
+from app.dogstatsd import DogStatsD, DogStatsDMiddleware
+from app.worker import WORKER_SLOT_ENV
+
+@pytest.fixture
+def udp_listener():
+    """Local UDP socket standing in for the Datadog agent."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(2)
+    yield sock
+    sock.close()
+
+def _receive_all(sock: socket.socket) -> list:
+    packets = []
+    sock.settimeout(0.2)
+    try:
+        while True:
+            packets.append(sock.recv(65535).decode("utf-8"))
+    except socket.timeout:
+        return packets
+
+@pytest.mark.asyncio
+async def test_counters_and_gauges_are_aggregated_per_flush(udp_listener):
+    client = DogStatsD(*udp_listener.getsockname(), prefix="gw", constant_tags=["env:test"], flush_interval=60)
+    client.start()
+    try:
+        for _ in range(1000):
+            client.increment("hits", 1, ("route:/chat",))
+        client.gauge("in_flight", 3)
+        client.gauge("in_flight", 1)
+        client.histogram("latency", 12.5)
+        client.histogram("latency", 30)
+        client.flush()
+    finally:
+        await client.close()
+
+    [packet] = _receive_all(udp_listener)
+    assert sorted(packet.split("\n")) == [
+        "gw.hits:1000|c|#route:/chat,env:test",
+        "gw.in_flight:1|g|#env:test",
+        "gw.latency:12.5:30|h|#env:test"
+    ]
+    assert client.stats()["packets_sent"] == 1
+
+@pytest.mark.asyncio
+async def test_lines_are_packed_into_datagrams_up_to_max_packet_size(udp_listener):
+    client = DogStatsD(*udp_listener.getsockname(), flush_interval=60, max_packet_size=512)
+    client.start()
+    try:
+        for i in range(200):
+            client.increment(f"metric_{i}")
+        client.flush()
+    finally:
+        await client.close()
+
+    packets = _receive_all(udp_listener)
+    lines = [line for packet in packets for line in packet.split("\n")]
+    assert 1 < len(packets) < 200
+    assert all(len(packet.encode("utf-8")) <= 512 for packet in packets)
+    assert sorted(lines) == sorted(f"metric_{i}:1|c" for i in range(200))
+
+@pytest.mark.asyncio
+async def test_background_task_flushes_on_interval(udp_listener):
+    client = DogStatsD(*udp_listener.getsockname(), flush_interval=0.05)
+    client.start()
+    try:
+        client.increment("ticks")
+        await asyncio.sleep(0.2)
+        packet = udp_listener.recv(65535).decode("utf-8")
+    finally:
+        await client.close()
+
+    assert packet == "ticks:1|c"
+
+def test_nothing_is_recorded_before_start():
+    client = DogStatsD("127.0.0.1", 9)
+    client.increment("hits")
+    client.histogram("latency", 1)
+
+    assert client.stats()["pending_series"] == 0
+
+@pytest.mark.asyncio
+async def test_middleware_counts_requests_by_route(udp_listener, monkeypatch):
+    client = DogStatsD(*udp_listener.getsockname(), flush_interval=60)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    monkeypatch.setenv(WORKER_SLOT_ENV, "3")
+    middleware = DogStatsDMiddleware(app, client=client)
+    client.start()
+    try:
+        for i in range(3):
+            path = f"/items/{i}"
+            await middleware({
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+                "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+                "root_path": "", "headers": [(b"host", b"testserver")],
+                "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+            }, receive, send)
+    finally:
+        await client.close()
+
+    lines = _receive_all(udp_listener)[0].split("\n")
+    assert "request.count:3|c|#method:GET,route:/items/{item_id},status:200" in lines
+    assert "request.in_flight:0|g|#worker:3" in lines
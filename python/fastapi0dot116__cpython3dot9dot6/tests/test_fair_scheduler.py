@@ -0,0 +1,160 @@
+import asyncio
+import time
+from typing import List
+import pytest
+from app.models import ChatRequest
+from app.services.fair_scheduler import Caller, FairScheduler, SchedulerRejected, resolve_caller
+
+INTERACTIVE = Caller(priority="interactive", tenant="web")
+BATCH = Caller(priority="batch", tenant="backfill")
+
+def _scheduler(**overrides) -> FairScheduler:
+    options = {
+        "max_concurrency": 1,
+        "max_queue": 100,
+        "queue_timeout": 5.0,
+        "weights": {"interactive": 10, "batch": 1},
+        **overrides
+    }
+    return FairScheduler(**options)
+
+async def _queue(scheduler: FairScheduler, caller: Caller, granted: List[str]) -> None:
+    await scheduler.acquire(caller)
+    granted.append(caller.priority)
+
+def test_resolve_caller():
+    weights = {"interactive": 10, "batch": 1}
+    keys = {"sk-backfill": "batch"}
+
+    assert resolve_caller(None, None, None, "interactive", weights, keys) == Caller("interactive", "anonymous")
+    assert resolve_caller("batch", "acme", None, "interactive", weights, keys) == Caller("batch", "acme")
+    assert resolve_caller("unknown", None, None, "batch", weights, keys).priority == "batch"
+    # A mapped API key fixes the class whatever the header says.
+    caller = resolve_caller("interactive", None, "sk-backfill", "interactive", weights, keys)
+    assert caller.priority == "batch"
+    assert caller.tenant.startswith("key-") and "sk-backfill" not in caller.tenant
+
+@pytest.mark.asyncio
+async def test_slots_are_shared_by_weight_under_saturation():
+    scheduler = _scheduler()
+    await scheduler.acquire(BATCH)
+    granted: List[str] = []
+    tasks = [asyncio.ensure_future(_queue(scheduler, BATCH, granted)) for _ in range(20)]
+    tasks += [asyncio.ensure_future(_queue(scheduler, INTERACTIVE, granted)) for _ in range(20)]
+    await asyncio.sleep(0)
+
+    for _ in range(11):
+        scheduler.release(BATCH)
+        await asyncio.sleep(0.001)
+
+    # Interactive calls queued behind 20 batch calls still get ten of every eleven slots.
+    assert sorted(granted) == ["batch"] + ["interactive"] * 10
+    for task in tasks:
+        task.cancel()
+
+@pytest.mark.asyncio
+async def test_full_queue_evicts_lower_priority_first():
+    scheduler = _scheduler(max_queue=2)
+    await scheduler.acquire(BATCH)
+    first = asyncio.ensure_future(scheduler.acquire(BATCH))
+    second = asyncio.ensure_future(scheduler.acquire(BATCH))
+    await asyncio.sleep(0)
+
+    interactive = asyncio.ensure_future(scheduler.acquire(INTERACTIVE))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerRejected, match="evicted"):
+        await second
+    assert not first.done()
+
+    # A full queue with nothing of lower priority rejects the newcomer.
+    with pytest.raises(SchedulerRejected, match="queue full"):
+        await scheduler.acquire(BATCH)
+    assert scheduler.stats()["classes"]["batch"]["rejected"] == 2
+
+    scheduler.release(BATCH)
+    await interactive
+    first.cancel()
+
+@pytest.mark.asyncio
+async def test_tenant_cap_does_not_block_other_tenants():
+    scheduler = _scheduler(max_concurrency=3, tenant_max_concurrency=1)
+    noisy = Caller(priority="batch", tenant="noisy")
+    await scheduler.acquire(noisy)
+    blocked = asyncio.ensure_future(scheduler.acquire(noisy))
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(scheduler.acquire(Caller(priority="batch", tenant="quiet")), 1.0)
+    assert not blocked.done()
+
+    scheduler.release(noisy)
+    await asyncio.wait_for(blocked, 1.0)
+    assert scheduler.in_flight == 2
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_and_records_queue_time():
+    scheduler = _scheduler(queue_timeout=0.05)
+    await scheduler.acquire(INTERACTIVE)
+    with pytest.raises(SchedulerRejected, match="queue timeout"):
+        await scheduler.acquire(INTERACTIVE)
+
+    waiter = asyncio.ensure_future(scheduler.acquire(BATCH))
+    await asyncio.sleep(0.02)
+    scheduler.release(INTERACTIVE)
+    await waiter
+
+    stats = scheduler.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["classes"]["interactive"]["rejected"] == 1
+    assert stats["classes"]["batch"]["max_queue_ms"] >= 15
+
+# Interactive latency while a bulk job saturates the upstream: the same load
+# through weighted fair queuing, and through one FIFO class.
+
+UPSTREAM_DELAY = 0.05
+BULK_ITEMS = 120
+INTERACTIVE_REQUESTS = 10
+
+async def _interactive_latencies(service, weights) -> List[float]:
+    batch_caller = Caller(priority="batch" if "batch" in weights else "interactive", tenant="backfill")
+    bulk = [
+        asyncio.ensure_future(service.send_chat_completion(ChatRequest(message=f"bulk {i}"), caller=batch_caller))
+        for i in range(BULK_ITEMS)
+    ]
+    await asyncio.sleep(0.05)
+
+    latencies = []
+    for i in range(INTERACTIVE_REQUESTS):
+        start = time.perf_counter()
+        await service.send_chat_completion(ChatRequest(message=f"interactive {i}"), caller=INTERACTIVE)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)
+    await asyncio.gather(*bulk)
+    return sorted(latencies)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("weights", [{"interactive": 10, "batch": 1}, {"interactive": 1}], ids=["wfq", "fifo"])
+async def test_interactive_latency_during_bulk_job(stub_upstream, monkeypatch, weights):
+    from app.config import settings
+    from app.services.openai_service import OpenAIService
+    base_url, state = stub_upstream
+    state.delay = UPSTREAM_DELAY
+    monkeypatch.setattr(settings, "openai_base_url", base_url)
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    monkeypatch.setattr(settings, "coalesce_requests", False)
+    monkeypatch.setattr(settings, "rate_limit_enabled", False)
+    monkeypatch.setattr(settings, "scheduler_max_concurrency", 4)
+    monkeypatch.setattr(settings, "priority_weights", weights)
+    service = OpenAIService()
+    try:
+        latencies = await _interactive_latencies(service, weights)
+    finally:
+        await service.close()
+
+    p99 = latencies[-1]
+    print(f"\n{'+'.join(weights)}: interactive p50 {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+          f"p99 {p99 * 1000:.0f}ms with {BULK_ITEMS} bulk calls queued")
+    if "batch" in weights:
+        # Roughly one upstream latency plus the wait for a slot to free.
+        assert p99 < UPSTREAM_DELAY * 5
+    else:
+        assert p99 > UPSTREAM_DELAY * 5
@@ -0,0 +1,25 @@
+from app.import_profile import format_report, package_totals, parse_importtime, profile_imports
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   pydantic.version
+import time:      2000 |       2120 | pydantic
+import time:       300 |        300 |     app.config
+import time:       500 |       2920 | app.main
+"""
+
+def test_parse_importtime():
+    timings = parse_importtime(IMPORTTIME_OUTPUT)
+    assert [t.module for t in timings] == ["pydantic.version", "pydantic", "app.config", "app.main"]
+    assert timings[-1].self_us == 500 and timings[-1].cumulative_us == 2920
+    assert package_totals(timings) == {"pydantic": 2120, "app": 800}
+
+    report = format_report(timings, top=2)
+    assert report.startswith("4 modules imported in 2.9ms")
+    assert "app.main" in report and "app.config" not in report
+
+def test_profile_imports_of_the_app():
+    timings = profile_imports(["app.main"])
+    app_main = next(t for t in timings if t.module == "app.main")
+    print(f"\napp.main imports in {app_main.cumulative_us / 1000:.0f}ms "
+          f"({package_totals(timings)['app'] / 1000:.0f}ms in app modules)")
+    assert {"app.config", "app.services.openai_service"} <= {t.module for t in timings}
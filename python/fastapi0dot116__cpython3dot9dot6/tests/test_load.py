@@ -0,0 +1,56 @@
+"""Load tests against the local stub upstream.
+
+These show that one worker's event loop keeps serving other requests while
+upstream calls are in flight: N concurrent chat completions against an
+upstream with a fixed latency should finish in roughly one upstream latency,
+not N of them.
+"""
+import asyncio
+import time
+import pytest
+from app.models import ChatRequest
+
+UPSTREAM_DELAY = 0.2
+
+async def _run_batch(service, concurrency: int) -> float:
+    start = time.perf_counter()
+    responses = await asyncio.gather(*[
+        service.send_chat_completion(ChatRequest(message=f"load test {i}"))
+        for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+    assert len(responses) == concurrency
+    return elapsed
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_overlap_on_one_event_loop(upstream_service):
+    service, state = upstream_service
+    state.delay = UPSTREAM_DELAY
+    try:
+        serial = await _run_batch(service, 1)
+        # The stub holds each call until all 50 have arrived, so the peak
+        # doesn't depend on how quickly they were sent
+        state.gather = 50
+        concurrent = await _run_batch(service, 50)
+    finally:
+        await service.close()
+
+    print(f"\n1 request: {serial:.3f}s, 50 concurrent requests: {concurrent:.3f}s "
+          f"(peak upstream in-flight: {state.max_in_flight})")
+
+    # A blocking client would serialise these: 50 * 0.2s = 10s.
+    assert state.max_in_flight == 50
+    assert concurrent < serial * 5
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded_by_pool_size(upstream_service, monkeypatch):
+    from app.config import settings
+    service, state = upstream_service
+    state.delay = UPSTREAM_DELAY
+    monkeypatch.setattr(settings, "openai_max_connections", 5)
+    try:
+        await _run_batch(service, 20)
+    finally:
+        await service.close()
+
+    assert state.max_in_flight == 5
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.load_shedding import ConcurrencyLimiter, LoadSheddingMiddleware
+
+@pytest.mark.asyncio
+async def test_requests_queue_then_run_in_order():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=10, queue_timeout=1.0)
+    order = []
+
+    async def request(name: str):
+        assert await limiter.acquire()
+        try:
+            order.append(name)
+            await asyncio.sleep(0.01)
+        finally:
+            limiter.release()
+
+    await asyncio.gather(*[request(str(i)) for i in range(5)])
+
+    assert order == ["0", "1", "2", "3", "4"]
+    assert limiter.stats()["queued"] == 4
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_full_queue_is_shed_immediately():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=1, queue_timeout=1.0)
+    assert await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    assert not await limiter.acquire()
+
+    limiter.release()
+    assert await waiting
+    limiter.release()
+    assert limiter.stats()["shed"] == 1
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_queued_request_is_shed_after_queue_timeout():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=10, queue_timeout=0.05)
+    assert await limiter.acquire()
+
+    assert not await limiter.acquire()
+    assert limiter.stats()["queue_depth"] == 0
+
+@pytest.mark.asyncio
+async def test_shed_early_when_expected_wait_exceeds_timeout():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=10, queue_timeout=1.0)
+    limiter.observe(0.8)
+    assert await limiter.acquire()
+    queued = [asyncio.ensure_future(limiter.acquire()) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    # Two requests ahead at ~0.8s each means ~1.6s of queueing: past the timeout.
+    assert not await limiter.acquire()
+
+    for task in queued:
+        limiter.release()
+        assert await task
+    limiter.release()
+    assert limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=10, queue_timeout=1.0)
+    assert await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.sleep(0)
+
+    limiter.release()
+    assert limiter.in_flight == 0
+    assert limiter.stats()["queue_depth"] == 0
+
+def test_middleware_returns_503_with_retry_after():
+    limiter = ConcurrencyLimiter(max_concurrency=1, max_queue=0, queue_timeout=2.0)
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(LoadSheddingMiddleware, limiter=limiter, exempt_paths=frozenset({"/health"}))
+    client = TestClient(app)
+    limiter.in_flight = 1  # simulate a saturated worker
+
+    response = client.get("/work")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+    assert response.json()["detail"]["error_code"] == "OVERLOADED"
+    assert client.get("/health").status_code == 200
+
+    limiter.in_flight = 0
+    assert client.get("/work").status_code == 200
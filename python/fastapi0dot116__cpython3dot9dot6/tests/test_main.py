@@ -87,4 +87,182 @@ def test_chat_completion_minimal_request(client):
         
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
-        assert data["response"] == "Hi there!"
\ No newline at end of file
+        assert data["response"] == "Hi there!"
+
+def _parse_sse(body: str):
+    frames = []
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = line[len("data: "):]
+        frames.append((event, data))
+    return frames
+
+def test_chat_stream_forwards_deltas_and_usage(stub_client):
+    import json
+    from app.models import ChatStreamUsage
+    client, state = stub_client
+
+    response = client.post("/chat/stream", json={"message": "Hello stub"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = _parse_sse(response.text)
+    deltas = [json.loads(data)["delta"] for event, data in frames if event == "message" and data != "[DONE]"]
+    assert "".join(deltas) == "Hello from the stub upstream"
+
+    usage_frames = [data for event, data in frames if event == "usage"]
+    assert len(usage_frames) == 1
+    usage = ChatStreamUsage.model_validate_json(usage_frames[0])
+    assert usage.usage.prompt_tokens == 2
+    assert usage.usage.completion_tokens == 5
+    assert frames[-1] == ("message", "[DONE]")
+
+def test_chat_stream_mid_stream_error_frame(stub_client):
+    import json
+    client, state = stub_client
+    state.fail_mid_stream = True
+
+    response = client.post("/chat/stream", json={"message": "Hello stub"})
+
+    assert response.status_code == status.HTTP_200_OK
+    event, data = _parse_sse(response.text)[-1]
+    assert event == "error"
+    assert json.loads(data)["error_code"] == "OPENAI_ERROR"
+
+def test_chat_stream_upstream_unavailable(client):
+    with patch('app.services.openai_service.openai_service.stream_chat_completion') as mock_service:
+        mock_service.side_effect = Exception("OpenAI API error")
+
+        response = client.post("/chat/stream", json={"message": "Hello"})
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.json()["detail"]["error_code"] == "OPENAI_ERROR"
+
+def test_chat_completion_cache_bypass_header(client):
+    with patch('app.services.openai_service.openai_service.send_chat_completion') as mock_service:
+        from app.models import ChatResponse, UsageInfo
+        mock_service.return_value = ChatResponse(
+            response="Hi there!",
+            model="gpt-3.5-turbo",
+            usage=UsageInfo(prompt_tokens=5, completion_tokens=3, total_tokens=8)
+        )
+
+        client.post("/chat", json={"message": "Hello", "temperature": 0})
+        assert mock_service.call_args.kwargs["use_cache"] is True
+
+        client.post("/chat", json={"message": "Hello", "temperature": 0}, headers={"X-Cache-Bypass": "true"})
+        assert mock_service.call_args.kwargs["use_cache"] is False
+
+def test_cache_stats_via_stub_upstream(stub_client):
+    client, state = stub_client
+    for _ in range(3):
+        response = client.post("/chat", json={"message": "Hello stub", "temperature": 0})
+        assert response.status_code == status.HTTP_200_OK
+
+    stats = client.get("/cache/stats").json()
+    assert stats["enabled"] is True
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert state.requests == 1
+
+def test_chat_batch_returns_ordered_results_with_item_errors(client):
+    async def fake_completion(request, use_cache=True, caller=None):
+        from app.models import ChatResponse, UsageInfo
+        if request.message == "boom":
+            raise Exception("OpenAI API error: boom")
+        return ChatResponse(
+            response=f"echo {request.message}",
+            model=request.model,
+            usage=UsageInfo(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+        )
+
+    with patch('app.services.openai_service.openai_service.send_chat_completion', side_effect=fake_completion):
+        response = client.post("/chat/batch", json={
+            "requests": [{"message": "one"}, {"message": "boom"}, {"message": "three"}],
+            "concurrency": 2
+        })
+
+    assert response.status_code == status.HTTP_200_OK
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["result"]["response"] == "echo one"
+    assert results[1]["result"] is None
+    assert results[1]["error"]["error_code"] == "OPENAI_ERROR"
+    assert results[2]["result"]["response"] == "echo three"
+
+def test_chat_batch_stream_emits_ndjson(stub_client):
+    import json
+    client, state = stub_client
+
+    response = client.post("/chat/batch/stream", json={
+        "requests": [{"message": f"stub item {i}"} for i in range(4)]
+    })
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+    assert all(line["result"]["response"] == "Hello from the stub upstream" for line in lines)
+    assert state.requests == 4
+
+def test_chat_batch_rejects_oversized_batch(client):
+    from app.config import settings
+    with patch.object(settings, "batch_max_items", 2):
+        response = client.post("/chat/batch", json={
+            "requests": [{"message": "a"}, {"message": "b"}, {"message": "c"}]
+        })
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"]["error_code"] == "VALIDATION_ERROR"
+
+def test_chat_batch_rejects_empty_batch(client):
+    response = client.post("/chat/batch", json={"requests": []})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+def test_chat_completion_rate_limited(client):
+    from app.services.rate_limiter import RateLimitExceeded
+    with patch('app.services.openai_service.openai_service.send_chat_completion') as mock_service:
+        mock_service.side_effect = RateLimitExceeded(retry_after=2.4)
+
+        response = client.post("/chat", json={"message": "Hello"})
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["retry-after"] == "2"
+    assert response.json()["detail"]["error_code"] == "RATE_LIMITED"
+
+def test_chat_priority_and_tenant_headers(client):
+    from app.models import ChatResponse, UsageInfo
+    from app.services.fair_scheduler import Caller
+    with patch('app.services.openai_service.openai_service.send_chat_completion') as mock_service:
+        mock_service.return_value = ChatResponse(
+            response="Hi there!",
+            model="gpt-3.5-turbo",
+            usage=UsageInfo(prompt_tokens=5, completion_tokens=3, total_tokens=8)
+        )
+
+        client.post("/chat", json={"message": "Hello"})
+        assert mock_service.call_args.kwargs["caller"] == Caller(priority="interactive", tenant="anonymous")
+
+        client.post("/chat", json={"message": "Hello"}, headers={"X-Priority": "batch", "X-Tenant-ID": "acme"})
+        assert mock_service.call_args.kwargs["caller"] == Caller(priority="batch", tenant="acme")
+
+def test_chat_batch_defaults_to_batch_priority(client):
+    with patch('app.main.run_batch', new_callable=AsyncMock) as mock_run:
+        mock_run.return_value = []
+        client.post("/chat/batch", json={"requests": [{"message": "one"}]})
+
+    assert mock_run.call_args.kwargs["caller"].priority == "batch"
+
+def test_chat_completion_shed_by_scheduler(client):
+    from app.services.fair_scheduler import SchedulerRejected
+    with patch('app.services.openai_service.openai_service.send_chat_completion') as mock_service:
+        mock_service.side_effect = SchedulerRejected("batch", "queue full", 10.0)
+
+        response = client.post("/chat", json={"message": "Hello"}, headers={"X-Priority": "batch"})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "10"
+    assert response.json()["detail"]["error_code"] == "OVERLOADED"
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def _sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_request_latency_is_labelled_by_route_and_status(client):
+    labels = {"method": "GET", "route": "/health", "status": "200"}
+    before = _sample("gateway_request_duration_seconds_count", labels)
+
+    client.get("/health")
+    client.get("/health")
+
+    assert _sample("gateway_request_duration_seconds_count", labels) == before + 2
+
+def test_unmatched_paths_share_one_label(client):
+    labels = {"method": "GET", "route": "unmatched", "status": "404"}
+    before = _sample("gateway_request_duration_seconds_count", labels)
+
+    client.get("/does-not-exist/1")
+    client.get("/does-not-exist/2")
+
+    assert _sample("gateway_request_duration_seconds_count", labels) == before + 2
+
+def test_metrics_endpoint_exposes_upstream_latency_and_tokens(stub_client):
+    client, state = stub_client
+    upstream = {"model": "gpt-3.5-turbo", "outcome": "success"}
+    prompt = {"model": state.model, "kind": "prompt"}
+    before_upstream = _sample("gateway_upstream_duration_seconds_count", upstream)
+    before_prompt = _sample("gateway_tokens_total", prompt)
+
+    client.post("/chat", json={"message": "count these four words", "temperature": 0.7})
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "gateway_requests_in_flight" in response.text
+    assert _sample("gateway_upstream_duration_seconds_count", upstream) == before_upstream + 1
+    assert _sample("gateway_tokens_total", prompt) == before_prompt + 4
+
+def test_metrics_endpoint_negotiates_openmetrics(client):
+    response = client.get("/metrics", headers={"Accept": "application/openmetrics-text; version=1.0.0"})
+
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    assert response.text.endswith("# EOF\n")
+
+def test_multiprocess_samples_are_merged_across_workers(tmp_path):
+    worker = (
+        "from app.metrics import REQUESTS_IN_FLIGHT, TOKENS\n"
+        "TOKENS.labels('gpt-test', 'prompt').inc(5)\n"
+        "REQUESTS_IN_FLIGHT.inc()\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    for _ in range(3):
+        subprocess.run([sys.executable, "-c", worker], cwd=PROJECT_ROOT, env=env, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+
+    assert registry.get_sample_value("gateway_tokens_total", {"model": "gpt-test", "kind": "prompt"}) == 15
+    assert registry.get_sample_value("gateway_requests_in_flight", {}) == 3
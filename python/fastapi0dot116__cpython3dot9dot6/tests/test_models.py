@@ -1,6 +1,6 @@
 import pytest
 from pydantic import ValidationError
-from app.models import ChatRequest, ChatResponse, ErrorResponse, HealthResponse, UsageInfo
+from app.models import MAX_MESSAGE_LENGTH, ChatRequest, ChatResponse, ErrorResponse, HealthResponse, UsageInfo
 
 def test_chat_request_valid():
     request = ChatRequest(message="Hello, world!")
@@ -29,6 +29,10 @@ def test_chat_request_missing_message():
     with pytest.raises(ValidationError):
         ChatRequest()  # message is required
 
+def test_chat_request_message_too_long():
+    with pytest.raises(ValidationError):
+        ChatRequest(message="x" * (MAX_MESSAGE_LENGTH + 1))
+
 def test_usage_info():
     usage = UsageInfo(
         prompt_tokens=10,
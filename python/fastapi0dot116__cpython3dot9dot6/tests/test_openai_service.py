@@ -7,13 +7,36 @@ from app.models import ChatRequest
 def openai_service():
     with patch('app.services.openai_service.settings') as mock_settings:
         mock_settings.openai_api_key = "test-key"
-        return OpenAIService()
+        mock_settings.openai_base_url = None
+        mock_settings.openai_max_connections = 10
+        mock_settings.openai_max_keepalive_connections = 5
+        mock_settings.openai_keepalive_expiry = 5.0
+        mock_settings.openai_connect_timeout = 1.0
+        mock_settings.openai_read_timeout = 1.0
+        mock_settings.openai_write_timeout = 1.0
+        mock_settings.openai_pool_timeout = 1.0
+        mock_settings.cache_enabled = False
+        mock_settings.coalesce_requests = True
+        mock_settings.rate_limit_enabled = False
+        mock_settings.rate_limit_queue_timeout = 20.0
+        mock_settings.worker_timeout = 30
+        mock_settings.upstream_deadline_margin = 5.0
+        mock_settings.retry_max_retries = 2
+        mock_settings.retry_base_delay = 0.01
+        mock_settings.retry_max_delay = 0.05
+        mock_settings.hedge_enabled = False
+        mock_settings.upstream_routes = {}
+        mock_settings.scheduler_enabled = False
+        mock_settings.preflight_enabled = False
+        service = OpenAIService()
+        service.start()
+        return service
 
 @pytest.mark.asyncio
 async def test_send_chat_completion_success(openai_service, mock_openai_response):
     request = ChatRequest(message="Hello, world!")
     
-    with patch.object(openai_service.client.chat.completions, 'create', return_value=mock_openai_response):
+    with patch.object(openai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_openai_response):
         response = await openai_service.send_chat_completion(request)
         
         assert response.response == "This is a test response from OpenAI"
@@ -26,7 +49,7 @@ async def test_send_chat_completion_success(openai_service, mock_openai_response
 async def test_send_chat_completion_api_error(openai_service):
     request = ChatRequest(message="Hello, world!")
     
-    with patch.object(openai_service.client.chat.completions, 'create', side_effect=Exception("API Error")):
+    with patch.object(openai_service.client.chat.completions, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
         with pytest.raises(Exception, match="OpenAI API error: API Error"):
             await openai_service.send_chat_completion(request)
 
@@ -39,7 +62,7 @@ async def test_send_chat_completion_with_custom_parameters(openai_service, mock_
         temperature=0.5
     )
     
-    with patch.object(openai_service.client.chat.completions, 'create', return_value=mock_openai_response) as mock_create:
+    with patch.object(openai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_openai_response) as mock_create:
         response = await openai_service.send_chat_completion(request)
         
         mock_create.assert_called_once_with(
@@ -49,4 +72,214 @@ async def test_send_chat_completion_with_custom_parameters(openai_service, mock_
             temperature=0.5
         )
         
-        assert response.response == "This is a test response from OpenAI"
\ No newline at end of file
+        assert response.response == "This is a test response from OpenAI"
+
+@pytest.mark.asyncio
+async def test_start_is_idempotent_and_close_releases_client(openai_service):
+    client = openai_service.client
+    openai_service.start()
+    assert openai_service.client is client
+
+    await openai_service.close()
+    assert openai_service.client is None
+    await openai_service.close()
+
+@pytest.mark.asyncio
+async def test_send_chat_completion_against_stub_upstream(upstream_service):
+    service, state = upstream_service
+    try:
+        response = await service.send_chat_completion(ChatRequest(message="Hello stub"))
+    finally:
+        await service.close()
+
+    assert response.response == "Hello from the stub upstream"
+    assert response.model == "gpt-3.5-turbo-stub"
+    assert response.usage.prompt_tokens == 2
+    assert state.requests == 1
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_against_stub_upstream(upstream_service):
+    from app.models import ChatStreamUsage
+    service, state = upstream_service
+    try:
+        events = await service.stream_chat_completion(ChatRequest(message="Hello stub"))
+        received = [event async for event in events]
+    finally:
+        await service.close()
+
+    deltas, usage = received[:-1], received[-1]
+    assert "".join(deltas) == "Hello from the stub upstream"
+    assert len(deltas) == 5
+    assert isinstance(usage, ChatStreamUsage)
+    assert usage.model == "gpt-3.5-turbo-stub"
+    assert usage.usage.total_tokens == 7
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_mid_stream_error(upstream_service):
+    service, state = upstream_service
+    state.fail_mid_stream = True
+    try:
+        events = await service.stream_chat_completion(ChatRequest(message="Hello stub"))
+        with pytest.raises(Exception, match="OpenAI API error"):
+            async for _ in events:
+                pass
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_stream_chat_completion_api_error(openai_service):
+    request = ChatRequest(message="Hello, world!")
+
+    with patch.object(openai_service.client.chat.completions, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
+        with pytest.raises(Exception, match="OpenAI API error: API Error"):
+            await openai_service.stream_chat_completion(request)
+
+@pytest.mark.asyncio
+async def test_deterministic_requests_are_served_from_cache(upstream_service):
+    service, state = upstream_service
+    request = ChatRequest(message="Hello stub", temperature=0)
+    try:
+        first = await service.send_chat_completion(request)
+        second = await service.send_chat_completion(request.model_copy())
+    finally:
+        stats = service.cache.stats()
+        await service.close()
+
+    assert state.requests == 1
+    assert second.response == first.response
+    assert second is not first
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_non_deterministic_and_bypassed_requests_skip_cache(upstream_service):
+    service, state = upstream_service
+    try:
+        await service.send_chat_completion(ChatRequest(message="Hello stub", temperature=0.7))
+        await service.send_chat_completion(ChatRequest(message="Hello stub", temperature=0.7))
+        await service.send_chat_completion(ChatRequest(message="Hello stub", temperature=0), use_cache=False)
+        await service.send_chat_completion(ChatRequest(message="Hello stub", temperature=0), use_cache=False)
+    finally:
+        stats = service.cache.stats()
+        await service.close()
+
+    assert state.requests == 4
+    assert stats["hits"] == 0
+    assert stats["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_are_coalesced(upstream_service):
+    import asyncio
+    service, state = upstream_service
+    state.delay = 0.2
+    try:
+        responses = await asyncio.gather(*[
+            service.send_chat_completion(ChatRequest(message="Hello stub", temperature=0), use_cache=False)
+            for _ in range(10)
+        ])
+        await service.send_chat_completion(ChatRequest(message="Hello again", temperature=0), use_cache=False)
+    finally:
+        await service.close()
+
+    assert state.requests == 2
+    assert len({id(response) for response in responses}) == 10
+    assert all(response.response == "Hello from the stub upstream" for response in responses)
+    assert service.coalescer.stats()["collapsed"] == 9
+
+@pytest.mark.asyncio
+async def test_sampled_and_cross_tenant_requests_are_not_coalesced(upstream_service):
+    import asyncio
+    from app.services.fair_scheduler import Caller
+    service, state = upstream_service
+    state.delay = 0.2
+    request = ChatRequest(message="Hello stub", temperature=0)
+    try:
+        await asyncio.gather(
+            service.send_chat_completion(ChatRequest(message="Hello stub")),
+            service.send_chat_completion(ChatRequest(message="Hello stub")),
+            service.send_chat_completion(request, use_cache=False, caller=Caller("interactive", "tenant-a")),
+            service.send_chat_completion(request, use_cache=False, caller=Caller("interactive", "tenant-b"))
+        )
+    finally:
+        await service.close()
+
+    assert state.requests == 4
+    assert service.coalescer.stats()["collapsed"] == 0
+
+@pytest.mark.asyncio
+async def test_upstream_429s_are_queued_not_failed(upstream_service):
+    service, state = upstream_service
+    state.throttle_next = 4
+    state.retry_after_ms = 50
+    try:
+        response = await service.send_chat_completion(ChatRequest(message="Hello stub"))
+    finally:
+        stats = service.rate_limiter.stats()
+        await service.close()
+
+    assert response.response == "Hello from the stub upstream"
+    assert state.throttled == 4
+    assert stats["throttled"] == 4
+
+@pytest.mark.asyncio
+async def test_persistent_429s_fail_at_queue_deadline(upstream_service, monkeypatch):
+    from app.config import settings
+    from app.services.rate_limiter import RateLimitExceeded
+    service, state = upstream_service
+    monkeypatch.setattr(settings, "rate_limit_queue_timeout", 0.5)
+    state.throttle_next = 1000
+    state.retry_after_ms = 200
+    try:
+        with pytest.raises(RateLimitExceeded):
+            await service.send_chat_completion(ChatRequest(message="Hello stub"))
+    finally:
+        await service.close()
+
+    # Blocked by the observed reset window rather than hammering the upstream.
+    assert state.throttled < 10
+
+@pytest.mark.asyncio
+async def test_transient_upstream_errors_are_retried(upstream_service):
+    service, state = upstream_service
+    state.fail_next = 2
+    try:
+        response = await service.send_chat_completion(ChatRequest(message="Hello stub"))
+    finally:
+        await service.close()
+
+    assert response.response == "Hello from the stub upstream"
+    assert state.requests == 3
+    assert service.retry_policy.stats() == {"retries": 2, "retries_exhausted": 0}
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_max_retries(upstream_service):
+    service, state = upstream_service
+    state.fail_next = 10
+    try:
+        with pytest.raises(Exception) as exc_info:
+            await service.send_chat_completion(ChatRequest(message="Hello stub"))
+    finally:
+        await service.close()
+
+    assert "overloaded" in str(exc_info.value)
+    assert state.requests == 3
+    assert service.retry_policy.stats()["retries_exhausted"] == 1
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged(upstream_service):
+    from app.services.retry_policy import HedgePolicy
+    service, state = upstream_service
+    service.hedge_policy = HedgePolicy(percentile=0.95, min_delay=0.05, min_samples=5)
+    for _ in range(5):
+        service.hedge_policy.record(0.01)
+    state.slow_next = 1
+    state.slow_delay = 1.0
+    try:
+        response = await service.send_chat_completion(ChatRequest(message="Hello stub"))
+    finally:
+        await service.close()
+
+    assert response.response == "Hello from the stub upstream"
+    assert state.requests == 2
+    assert service.hedge_policy.stats()["hedges"] == 1
+    assert service.hedge_policy.stats()["hedges_won"] == 1
@@ -0,0 +1,133 @@
+import struct
+import time
+import pytest
+from app.models import ChatRequest
+from app.services.rate_limiter import (
+    FileBucketStore,
+    RateLimiter,
+    RateLimitExceeded,
+    estimate_request_tokens,
+    parse_reset_duration,
+)
+
+def test_parse_reset_duration():
+    assert parse_reset_duration("20ms") == pytest.approx(0.02)
+    assert parse_reset_duration("1s") == 1.0
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("1h2m3.5s") == pytest.approx(3723.5)
+    assert parse_reset_duration("7") == 7.0
+    assert parse_reset_duration("soon") is None
+    assert parse_reset_duration(None) is None
+
+def test_estimate_request_tokens_includes_max_tokens():
+    assert estimate_request_tokens(ChatRequest(message="x" * 40, max_tokens=100)) == 110
+    assert estimate_request_tokens(ChatRequest(message="hi", max_tokens=None)) == 1
+
+@pytest.mark.asyncio
+async def test_acquire_admits_within_capacity():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    for _ in range(3):
+        await limiter.acquire(100, deadline=time.monotonic() + 1)
+
+    assert limiter.stats()["admitted"] == 3
+    assert limiter.stats()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_acquire_queues_until_tokens_refill():
+    # 6000 tokens/min refills 100 tokens every second.
+    limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=6000)
+    await limiter.acquire(6000, deadline=time.monotonic() + 1)
+
+    start = time.monotonic()
+    await limiter.acquire(10, deadline=time.monotonic() + 1)
+
+    assert 0.05 <= time.monotonic() - start < 0.5
+    assert limiter.stats()["queued"] == 1
+
+@pytest.mark.asyncio
+async def test_acquire_rejects_when_deadline_is_too_close():
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=1000)
+    await limiter.acquire(1, deadline=time.monotonic() + 1)
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        await limiter.acquire(1, deadline=time.monotonic() + 1)
+
+    assert exc_info.value.retry_after > 1
+    assert limiter.stats()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_429_blocks_until_reset():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000)
+    limiter.observe(429, {"retry-after-ms": "150"})
+
+    start = time.monotonic()
+    await limiter.acquire(1, deadline=time.monotonic() + 1)
+
+    assert time.monotonic() - start >= 0.14
+    assert limiter.stats()["throttled"] == 1
+
+@pytest.mark.asyncio
+async def test_observe_adapts_limits_and_remaining_capacity():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000)
+    limiter.observe(200, {
+        "x-ratelimit-limit-requests": "600",
+        "x-ratelimit-limit-tokens": "60000",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-remaining-tokens": "59000",
+    })
+
+    assert limiter.requests_per_minute == 600
+    assert limiter.tokens_per_minute == 60000
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(1, deadline=time.monotonic() + 0.01)
+
+@pytest.mark.asyncio
+async def test_settle_refunds_overestimated_tokens():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1000)
+    await limiter.acquire(1000, deadline=time.monotonic() + 1)
+    limiter.settle(estimated_tokens=1000, actual_tokens=100)
+
+    await limiter.acquire(800, deadline=time.monotonic() + 0.01)
+
+@pytest.mark.asyncio
+async def test_file_store_shares_buckets_between_workers(tmp_path):
+    path = str(tmp_path / "ratelimit.state")
+    worker_a = RateLimiter(requests_per_minute=2, tokens_per_minute=1000, store=FileBucketStore(path))
+    worker_b = RateLimiter(requests_per_minute=2, tokens_per_minute=1000, store=FileBucketStore(path))
+    try:
+        await worker_a.acquire(1, deadline=time.monotonic() + 1)
+        await worker_b.acquire(1, deadline=time.monotonic() + 1)
+        with pytest.raises(RateLimitExceeded):
+            await worker_a.acquire(1, deadline=time.monotonic() + 1)
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+@pytest.mark.asyncio
+async def test_file_store_shares_429_block_between_workers(tmp_path):
+    path = str(tmp_path / "ratelimit.state")
+    worker_a = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000, store=FileBucketStore(path))
+    worker_b = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000, store=FileBucketStore(path))
+    try:
+        worker_b.observe(429, {"retry-after": "30"})
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            await worker_a.acquire(1, deadline=time.monotonic() + 10)
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+    assert exc_info.value.retry_after > 29
+
+@pytest.mark.asyncio
+async def test_file_store_resets_state_from_another_clock(tmp_path):
+    path = str(tmp_path / "ratelimit.state")
+    # Written by a clock far ahead of ours, with an hour-long block and empty buckets
+    future = time.time() + 3600
+    with open(path, "wb") as f:
+        f.write(struct.pack("dddd", 0.0, 0.0, future, future + 3600))
+
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000, store=FileBucketStore(path))
+    try:
+        await limiter.acquire(1, deadline=time.monotonic() + 0.01)
+    finally:
+        limiter.close()
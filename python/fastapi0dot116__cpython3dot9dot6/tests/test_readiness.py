@@ -0,0 +1,93 @@
+import asyncio
+from unittest.mock import AsyncMock
+import pytest
+from app.readiness import ReadinessProbe
+
+async def _ok():
+    return {"detail": 1}
+
+async def _fail():
+    raise RuntimeError("agent unreachable")
+
+async def _hang():
+    await asyncio.sleep(10)
+
+@pytest.mark.asyncio
+async def test_critical_failures_make_the_worker_unready():
+    probe = ReadinessProbe(interval=10.0, timeout=0.05)
+    probe.add_check("upstream", _ok)
+    probe.add_check("dogstatsd", _fail, critical=False)
+    assert probe.status() == (False, {"status": "starting", "checks": {}})
+
+    await probe.refresh()
+    ready, report = probe.status()
+    assert ready
+    assert report["checks"]["upstream"]["detail"] == 1
+    assert report["checks"]["dogstatsd"] == {
+        "ok": False, "error": "agent unreachable", "critical": False,
+        "duration_ms": report["checks"]["dogstatsd"]["duration_ms"]
+    }
+
+    probe.add_check("slow", _hang)
+    await probe.refresh()
+    ready, report = probe.status()
+    assert not ready
+    assert report["checks"]["slow"]["error"] == "timed out after 0.05s"
+
+@pytest.mark.asyncio
+async def test_stale_results_are_not_ready():
+    probe = ReadinessProbe(interval=1.0, timeout=1.0)
+    probe.add_check("upstream", _ok)
+    await probe.refresh()
+    assert probe.status()[0]
+
+    probe._checked_at -= 3.5
+    assert probe.status()[1]["status"] == "not_ready"
+
+def test_livez_and_readyz_never_call_the_upstream(stub_client):
+    from app.main import readiness
+    from app.services.openai_service import openai_service
+    client, state = stub_client
+    models_list = AsyncMock()
+    openai_service.client.models.list = models_list
+
+    assert client.get("/livez").json() == {"status": "alive"}
+    for _ in range(50):
+        response = client.get("/readyz")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["status"] == "ready"
+    assert report["checks"]["upstream"]["ok"]
+    # The warmup request's 404 proved the upstream reachable: no probe call yet.
+    assert models_list.await_count == 0
+    assert readiness._task is not None
+
+@pytest.mark.asyncio
+async def test_idle_worker_probes_the_upstream(upstream_service, monkeypatch):
+    from app.config import settings
+    service, state = upstream_service
+    monkeypatch.setattr(settings, "readiness_interval", 0.0)
+    service.start()
+    try:
+        # The stub answers GET /models with 404: reachable.
+        details = await service.check_upstream()
+        assert details["pool_connections"] == 1
+        await service.close()
+        with pytest.raises(RuntimeError, match="not open"):
+            await service.check_upstream()
+    finally:
+        await service.close()
+
+@pytest.mark.asyncio
+async def test_unreachable_upstream_fails_the_check(monkeypatch):
+    from app.config import settings
+    from app.services.openai_service import OpenAIService
+    monkeypatch.setattr(settings, "openai_base_url", "http://127.0.0.1:9/v1")
+    monkeypatch.setattr(settings, "readiness_interval", 0.0)
+    service = OpenAIService()
+    service.start()
+    try:
+        with pytest.raises(Exception, match="Connection error"):
+            await service.check_upstream()
+    finally:
+        await service.close()
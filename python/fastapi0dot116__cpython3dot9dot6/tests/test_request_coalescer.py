@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from app.models import ChatResponse, UsageInfo
+from app.services.request_coalescer import RequestCoalescer
+
+def _response(text: str = "shared") -> ChatResponse:
+    return ChatResponse(
+        response=text,
+        model="gpt-3.5-turbo",
+        usage=UsageInfo(prompt_tokens=1, completion_tokens=1, total_tokens=2)
+    )
+
+class _Upstream:
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> ChatResponse:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return _response()
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    coalescer = RequestCoalescer()
+    upstream = _Upstream()
+
+    responses = await asyncio.gather(*[coalescer.run("k", upstream) for _ in range(5)])
+
+    assert upstream.calls == 1
+    assert all(r.response == "shared" for r in responses)
+    assert len({id(r) for r in responses}) == 5
+    assert coalescer.stats() == {"in_flight": 0, "flights": 1, "collapsed": 4}
+
+@pytest.mark.asyncio
+async def test_different_keys_and_sequential_calls_are_not_coalesced():
+    coalescer = RequestCoalescer()
+    upstream = _Upstream()
+
+    await asyncio.gather(coalescer.run("a", upstream), coalescer.run("b", upstream))
+    await coalescer.run("a", upstream)
+
+    assert upstream.calls == 3
+    assert coalescer.stats()["collapsed"] == 0
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    coalescer = RequestCoalescer()
+    upstream = _Upstream(error=RuntimeError("upstream down"))
+
+    results = await asyncio.gather(
+        *[coalescer.run("k", upstream) for _ in range(3)],
+        return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    upstream.error = None
+    assert (await coalescer.run("k", upstream)).response == "shared"
+    assert upstream.calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_the_call_for_others():
+    coalescer = RequestCoalescer()
+    upstream = _Upstream(delay=0.1)
+
+    first = asyncio.ensure_future(coalescer.run("k", upstream))
+    second = asyncio.ensure_future(coalescer.run("k", upstream))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert (await second).response == "shared"
+    assert first.cancelled()
+    assert upstream.cancelled == 0
+
+@pytest.mark.asyncio
+async def test_cancelling_every_waiter_cancels_the_call():
+    coalescer = RequestCoalescer()
+    upstream = _Upstream(delay=1)
+
+    waiters = [asyncio.ensure_future(coalescer.run("k", upstream)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert upstream.cancelled == 1
+    assert coalescer.in_flight() == 0
@@ -0,0 +1,88 @@
+import json
+import time
+from datetime import datetime
+from typing import Tuple
+import pytest
+from fastapi import FastAPI
+from app.models import BatchChatResponse, BatchChatResult, ChatResponse, HealthResponse, UsageInfo
+from app.responses import FastJSONResponse
+
+def _chat_response() -> ChatResponse:
+    return ChatResponse(
+        response="This is a test response " * 10,
+        model="gpt-3.5-turbo",
+        usage=UsageInfo(prompt_tokens=10, completion_tokens=50, total_tokens=60),
+        created_at=datetime(2025, 1, 2, 3, 4, 5, 678901)
+    )
+
+def test_render_matches_default_encoding():
+    response = _chat_response()
+    rendered = json.loads(FastJSONResponse(response).body)
+
+    assert rendered == json.loads(response.model_dump_json())
+    assert rendered["created_at"] == "2025-01-02T03:04:05.678901"
+
+def test_render_handles_plain_containers_and_models():
+    health = HealthResponse(status="healthy", version="1.0.0", environment="test")
+    rendered = json.loads(FastJSONResponse({"health": health, "counts": [1, 2]}).body)
+
+    assert rendered["health"]["status"] == "healthy"
+    assert rendered["counts"] == [1, 2]
+
+# Microbenchmark: serialization cost per response of the default FastAPI path
+# (response_model validation + jsonable_encoder + json.dumps) versus returning
+# a FastJSONResponse, driven straight through ASGI.
+
+RESPONSES = 500
+
+def _batch() -> BatchChatResponse:
+    return BatchChatResponse(results=[BatchChatResult(index=i, result=_chat_response()) for i in range(20)])
+
+def _apps():
+    batch = _batch()
+    default_app = FastAPI()
+    fast_app = FastAPI()
+
+    @default_app.get("/batch", response_model=BatchChatResponse)
+    async def default_batch():
+        return batch
+
+    @fast_app.get("/batch", response_model=BatchChatResponse)
+    async def fast_batch():
+        return FastJSONResponse(batch)
+
+    return default_app, fast_app
+
+async def _seconds_per_response(app) -> Tuple[float, bytes]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/batch", "raw_path": b"/batch", "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+    }
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await app(dict(scope), receive, send)
+    first = bytes(body)
+    start = time.perf_counter()
+    for _ in range(RESPONSES):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / RESPONSES, first
+
+@pytest.mark.asyncio
+async def test_fast_json_response_benchmark():
+    default_app, fast_app = _apps()
+    default, default_body = await _seconds_per_response(default_app)
+    fast, fast_body = await _seconds_per_response(fast_app)
+
+    print(f"\nper-response cost for a 20-item batch: default {default * 1e6:.0f}us, "
+          f"FastJSONResponse {fast * 1e6:.0f}us")
+
+    assert json.loads(fast_body) == json.loads(default_body)
+    assert fast < default
@@ -0,0 +1,51 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from app.services.retry_policy import FATAL, RATE_LIMITED, TRANSIENT, HedgePolicy, RetryPolicy, classify_error
+
+def _status_error(error_class, status_code: int, body=None):
+    request = httpx.Request("POST", "http://upstream/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return error_class("upstream error", response=response, body=body)
+
+def test_classify_error():
+    request = httpx.Request("POST", "http://upstream/v1/chat/completions")
+    assert classify_error(_status_error(openai.RateLimitError, 429)) == RATE_LIMITED
+    assert classify_error(_status_error(openai.RateLimitError, 429, {"code": "insufficient_quota"})) == FATAL
+    assert classify_error(_status_error(openai.InternalServerError, 503)) == TRANSIENT
+    assert classify_error(openai.APITimeoutError(request=request)) == TRANSIENT
+    assert classify_error(openai.APIConnectionError(request=request)) == TRANSIENT
+    assert classify_error(asyncio.TimeoutError()) == TRANSIENT
+    assert classify_error(_status_error(openai.BadRequestError, 400)) == FATAL
+    assert classify_error(ValueError("bad")) == FATAL
+
+def test_retry_policy_stops_at_max_retries():
+    policy = RetryPolicy(max_retries=2, base_delay=0.1, max_delay=1.0)
+    assert policy.should_retry(TRANSIENT, 0)
+    assert policy.should_retry(TRANSIENT, 1)
+    assert not policy.should_retry(TRANSIENT, 2)
+    assert not policy.should_retry(FATAL, 0)
+    assert policy.stats()["retries_exhausted"] == 1
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(max_retries=10, base_delay=0.1, max_delay=1.0)
+    delays = [policy.backoff(attempt) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 1.0 for delay in delays)
+    assert len(set(delays)) > 1
+    assert all(policy.backoff(0) <= 0.1 for _ in range(20))
+
+def test_hedge_threshold_tracks_latency_percentile():
+    policy = HedgePolicy(percentile=0.9, min_delay=0.01, min_samples=10)
+    for _ in range(9):
+        policy.record(0.1)
+    assert policy.threshold() is None
+
+    policy.record(0.1)
+    assert policy.threshold() == pytest.approx(0.1)
+
+def test_hedge_threshold_respects_min_delay():
+    policy = HedgePolicy(percentile=0.5, min_delay=0.5, min_samples=3)
+    for _ in range(3):
+        policy.record(0.01)
+    assert policy.threshold() == 0.5
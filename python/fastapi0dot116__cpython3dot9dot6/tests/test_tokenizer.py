@@ -0,0 +1,159 @@
+import os
+import time
+import pytest
+import tiktoken
+from app.models import ChatRequest
+from app.services.tokenizer import CHAT_OVERHEAD_TOKENS, PromptTooLong, TokenCounter
+
+def _byte_encoding(name: str) -> tiktoken.Encoding:
+    # One token per byte: the real BPE files are not fetched in tests.
+    return tiktoken.Encoding(
+        name=name,
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={}
+    )
+
+def _counter(**overrides) -> TokenCounter:
+    options = {
+        "encodings": ["bytes"],
+        "context_windows": {"tiny": 100},
+        "loader": _byte_encoding,
+        "encoding_for_model": lambda model: "bytes" if model == "tiny" else None,
+        **overrides
+    }
+    counter = TokenCounter(**options)
+    counter.preload()
+    return counter
+
+def test_context_window_matches_exact_names_and_dated_snapshots():
+    counter = TokenCounter(context_windows={"my-finetune": 4096})
+    assert counter.context_window("gpt-4") == 8192
+    assert counter.context_window("gpt-4-0613") == 8192
+    assert counter.context_window("gpt-4-turbo-2024-04-09") == 128000
+    assert counter.context_window("gpt-4o-mini-2024-07-18") == 128000
+    assert counter.context_window("my-finetune") == 4096
+    assert counter.context_window("my-finetune-v2") is None
+    assert counter.context_window("some-local-model") is None
+
+def test_128k_gpt_4_variants_are_not_given_the_8k_window():
+    counter = _counter()
+    assert counter.context_window("gpt-4-vision-preview") == 128000
+    # Unlisted variants pass through rather than falling back to "gpt-4"
+    assert counter.context_window("gpt-4.5-preview") is None
+
+    request = ChatRequest(message="x" * 44000, model="gpt-4-vision-preview")
+    assert counter.preflight(request) is request
+    request = ChatRequest(message="x" * 44000, model="gpt-4.5-preview")
+    assert counter.preflight(request) is request
+    assert counter.stats()["rejected"] == 0
+
+def test_preflight_clamps_max_tokens_to_the_remaining_window():
+    counter = _counter()
+    request = ChatRequest(message="x" * 50, model="tiny", max_tokens=150)
+
+    clamped = counter.preflight(request)
+    assert clamped.max_tokens == 100 - 50 - CHAT_OVERHEAD_TOKENS
+    assert request.max_tokens == 150
+    assert counter.preflight(ChatRequest(message="hi", model="tiny", max_tokens=10)).max_tokens == 10
+    assert counter.stats()["clamped"] == 1
+
+def test_preflight_rejects_a_prompt_that_fills_the_window():
+    counter = _counter()
+    with pytest.raises(PromptTooLong, match="100-token context window of tiny"):
+        counter.preflight(ChatRequest(message="x" * 93, model="tiny"))
+    assert isinstance(PromptTooLong("x"), ValueError)
+
+    # Unknown models are passed through to the upstream unchecked.
+    request = ChatRequest(message="x" * 10000, model="some-local-model")
+    assert counter.preflight(request) is request
+    assert counter.stats()["rejected"] == 1
+    assert counter.stats()["unknown_model"] == 1
+
+def test_missing_encoding_falls_back_to_an_estimate_and_is_not_retried():
+    attempts = []
+
+    def offline_loader(name):
+        attempts.append(name)
+        raise OSError("no network")
+
+    counter = _counter(loader=offline_loader)
+    assert counter.count_prompt("tiny", "x" * 40) == 10 + CHAT_OVERHEAD_TOKENS
+    counter.preload()
+    assert attempts == ["bytes"]
+    assert counter.stats()["encodings"] == []
+    assert counter.stats()["estimated"] == 1
+
+def test_encodings_are_never_downloaded(tmp_path, monkeypatch):
+    import tiktoken.load
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+    fetch = tiktoken.load.read_file
+
+    counter = TokenCounter(encodings=["r50k_base"], tokenizer_dir=str(tmp_path))
+    assert counter.preload() == 0
+    assert list(tmp_path.iterdir()) == []
+    # The download guard and cache directory only apply while loading
+    assert tiktoken.load.read_file is fetch
+    assert "TIKTOKEN_CACHE_DIR" not in os.environ
+
+@pytest.mark.asyncio
+async def test_only_prompts_that_might_not_fit_are_tokenized(monkeypatch):
+    counter = _counter(context_windows={"tiny": 100}, thread_count_chars=40)
+    threads = []
+
+    async def to_thread(func, *args):
+        threads.append(args)
+        return func(*args)
+
+    monkeypatch.setattr("app.services.tokenizer.asyncio.to_thread", to_thread)
+
+    request = ChatRequest(message="x" * 20, model="tiny", max_tokens=50)
+    assert await counter.apreflight(request) is request
+    assert counter.stats()["bounded"] == 1
+
+    assert (await counter.apreflight(ChatRequest(message="x" * 30, model="tiny", max_tokens=90))).max_tokens == 63
+    assert threads == []
+    assert (await counter.apreflight(ChatRequest(message="x" * 50, model="tiny", max_tokens=90))).max_tokens == 43
+    assert threads == [("tiny", "x" * 50)]
+
+@pytest.mark.asyncio
+async def test_impossible_request_is_rejected_without_an_upstream_call(upstream_service):
+    service, state = upstream_service
+    service.token_counter = _counter()
+    try:
+        with pytest.raises(ValueError, match="no room for a completion"):
+            await service.send_chat_completion(ChatRequest(message="x" * 200, model="tiny"))
+        response = await service.send_chat_completion(ChatRequest(message="x" * 30, model="tiny", max_tokens=500))
+    finally:
+        await service.close()
+
+    assert response.response
+    assert state.requests == 1
+    assert state.last_max_tokens == 100 - 30 - CHAT_OVERHEAD_TOKENS
+
+def test_oversized_prompt_is_a_validation_error(stub_client, monkeypatch):
+    from app.services.openai_service import openai_service
+    client, state = stub_client
+    monkeypatch.setattr(openai_service, "token_counter", _counter())
+
+    response = client.post("/chat", json={"message": "x" * 200, "model": "tiny"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["error_code"] == "VALIDATION_ERROR"
+    response = client.post("/chat/stream", json={"message": "x" * 200, "model": "tiny"})
+    assert response.status_code == 400
+    assert state.requests == 0
+    assert client.get("/preflight/stats").json()["rejected"] == 2
+
+def test_preflight_cost_per_request():
+    counter = _counter(context_windows={"tiny": 1000000})
+    # max_tokens too large for the byte bound, so every request is tokenized
+    request = ChatRequest(message="The quick brown fox jumps over the lazy dog. " * 50, model="tiny", max_tokens=999000)
+    iterations = 2000
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        counter.preflight(request)
+    per_request = (time.perf_counter() - start) / iterations
+
+    print(f"\npreflight of a {len(request.message)}-character prompt: {per_request * 1e6:.1f}us per request")
+    assert per_request < 0.005
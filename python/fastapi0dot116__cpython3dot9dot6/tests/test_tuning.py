@@ -0,0 +1,37 @@
+import os
+from app.tuning import auto_worker_count, available_cpus, cgroup_cpu_limit
+
+def test_cgroup_v2_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert cgroup_cpu_limit(str(tmp_path)) == 1.5
+
+def test_cgroup_v2_unlimited(tmp_path):
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert cgroup_cpu_limit(str(tmp_path)) is None
+
+def test_cgroup_v1_quota(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_limit(str(tmp_path)) == 2.0
+
+def test_cgroup_v1_unlimited(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    assert cgroup_cpu_limit(str(tmp_path)) is None
+
+def test_no_cgroup_files(tmp_path):
+    assert cgroup_cpu_limit(str(tmp_path)) is None
+
+def test_available_cpus_is_capped_by_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    assert available_cpus(str(tmp_path)) == 0.5
+    assert available_cpus(str(tmp_path / "missing")) == len(os.sched_getaffinity(0))
+
+def test_auto_worker_count():
+    assert auto_worker_count(0.5, 1.0, 32) == 1
+    assert auto_worker_count(1.5, 1.0, 32) == 2
+    assert auto_worker_count(4, 1.0, 32) == 4
+    assert auto_worker_count(4, 2.0, 32) == 8
+    assert auto_worker_count(64, 1.0, 32) == 32
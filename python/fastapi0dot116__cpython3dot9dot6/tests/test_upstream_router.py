@@ -0,0 +1,191 @@
+import asyncio
+from collections import Counter
+import pytest
+from app.config import UpstreamTarget
+from app.models import ChatRequest
+from app.services.upstream_router import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, UpstreamEndpoint, UpstreamRouter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def _endpoint(name: str, clock: FakeClock, failure_threshold: int = 3) -> UpstreamEndpoint:
+    return UpstreamEndpoint(
+        name=name,
+        client=None,
+        model=None,
+        breaker=CircuitBreaker(failure_threshold, reset_timeout=10.0, clock=clock),
+        ewma_alpha=0.5,
+        stale_seconds=30.0,
+        clock=clock
+    )
+
+def test_circuit_opens_after_consecutive_failures_and_probes_after_reset():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.available()
+
+    clock.now += 10.0
+    assert breaker.available()
+    breaker.on_pick()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time.
+    assert not breaker.available()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now += 10.0
+    breaker.on_pick()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.opened == 2
+
+def test_released_probe_lets_the_next_request_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+    breaker.record_failure()
+    clock.now += 10.0
+    breaker.on_pick()
+    breaker.release()
+    assert breaker.state == OPEN
+    assert breaker.available()
+
+def test_router_prefers_the_faster_endpoint():
+    clock = FakeClock()
+    fast, slow = _endpoint("fast", clock), _endpoint("slow", clock)
+    fast.observe(0.05, ok=True)
+    slow.observe(0.5, ok=True)
+    router = UpstreamRouter({"gpt-4o": [fast, slow]})
+
+    picks = Counter(router.pick("gpt-4o").name for _ in range(100))
+    assert picks == {"fast": 100}
+    assert router.pick("unrouted-model") is None
+
+def test_router_spreads_load_as_in_flight_grows():
+    clock = FakeClock()
+    fast, slow = _endpoint("fast", clock), _endpoint("slow", clock)
+    fast.observe(0.1, ok=True)
+    slow.observe(0.3, ok=True)
+    router = UpstreamRouter({"gpt-4o": [fast, slow]})
+
+    fast.in_flight = 3
+    assert router.pick("gpt-4o") is slow
+
+def test_router_penalises_errors_and_skips_open_circuits():
+    clock = FakeClock()
+    flaky, steady = _endpoint("flaky", clock), _endpoint("steady", clock)
+    flaky.observe(0.05, ok=True)
+    steady.observe(0.08, ok=True)
+    # Half the recent calls failing doubles the flaky endpoint's score to 0.1.
+    flaky.observe(0.05, ok=False)
+    router = UpstreamRouter({"gpt-4o": [flaky, steady]})
+    assert router.pick("gpt-4o") is steady
+
+    flaky.observe(0.05, ok=False)
+    flaky.observe(0.05, ok=False)
+    assert flaky.breaker.state == OPEN
+    steady.in_flight = 50
+    assert router.pick("gpt-4o") is steady
+
+def test_router_avoids_endpoints_already_tried():
+    clock = FakeClock()
+    first, second = _endpoint("first", clock), _endpoint("second", clock)
+    first.observe(0.05, ok=True)
+    second.observe(0.5, ok=True)
+    router = UpstreamRouter({"gpt-4o": [first, second]})
+
+    assert router.pick("gpt-4o", avoid={"first"}) is second
+    assert router.pick("gpt-4o", avoid={"first", "second"}) is first
+
+def test_router_remeasures_stale_endpoints():
+    clock = FakeClock()
+    fast, recovered = _endpoint("fast", clock), _endpoint("recovered", clock)
+    recovered.observe(2.0, ok=True)
+    clock.now += 31.0
+    fast.observe(0.05, ok=True)
+    router = UpstreamRouter({"gpt-4o": [fast, recovered]})
+
+    assert router.pick("gpt-4o") is recovered
+    recovered.in_flight = 1
+    assert router.pick("gpt-4o") is fast
+
+def test_router_falls_back_when_every_circuit_is_open():
+    clock = FakeClock()
+    first, second = _endpoint("first", clock, failure_threshold=1), _endpoint("second", clock, failure_threshold=1)
+    first.observe(0.05, ok=False)
+    clock.now += 1.0
+    second.observe(0.05, ok=False)
+    router = UpstreamRouter({"gpt-4o": [first, second]})
+
+    assert router.pick("gpt-4o") is first
+
+# Routing through OpenAIService against two local stub upstreams.
+
+@pytest.fixture
+def routed_service(monkeypatch):
+    from app.config import settings
+    from app.services.openai_service import OpenAIService
+    from tests.stub_upstream import run_stub_upstream
+    with run_stub_upstream() as (url_a, state_a), run_stub_upstream() as (url_b, state_b):
+        monkeypatch.setattr(settings, "upstream_routes", {"gpt-4o": [
+            UpstreamTarget(name="region-a", base_url=url_a, model="gpt-4o-deployment-a"),
+            UpstreamTarget(name="region-b", base_url=url_b)
+        ]})
+        monkeypatch.setattr(settings, "circuit_failure_threshold", 2)
+        monkeypatch.setattr(settings, "cache_enabled", False)
+        monkeypatch.setattr(settings, "coalesce_requests", False)
+        monkeypatch.setattr(settings, "retry_base_delay", 0.01)
+        yield OpenAIService(), state_a, state_b
+
+async def _send(service, count: int, concurrency: int = 4):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await service.send_chat_completion(ChatRequest(message=f"routed {i}", model="gpt-4o"))
+
+    return await asyncio.gather(*[one(i) for i in range(count)])
+
+@pytest.mark.asyncio
+async def test_routed_requests_favour_the_faster_region(routed_service):
+    service, state_a, state_b = routed_service
+    state_a.delay = 0.15
+    state_b.delay = 0.01
+    try:
+        await _send(service, 60)
+    finally:
+        await service.close()
+
+    print(f"\nslow region: {state_a.requests} requests, fast region: {state_b.requests} requests")
+    assert state_a.last_model == "gpt-4o-deployment-a"
+    assert state_b.last_model == "gpt-4o"
+    assert state_b.requests > 3 * state_a.requests
+
+@pytest.mark.asyncio
+async def test_failing_region_is_ejected_and_requests_still_succeed(routed_service):
+    service, state_a, state_b = routed_service
+    state_a.fail_next = 1000
+    try:
+        responses = await _send(service, 30)
+        stats = service.router.stats()["gpt-4o"]
+    finally:
+        await service.close()
+
+    assert len(responses) == 30
+    assert stats[0]["circuit"] == OPEN
+    assert stats[1]["circuit"] == CLOSED
+    # Ejected after the threshold instead of taking a share of every request.
+    assert state_a.requests <= 4
+    assert service.retry_policy.stats()["retries_exhausted"] == 0
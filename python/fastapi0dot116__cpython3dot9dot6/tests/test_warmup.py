@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from fastapi import FastAPI
+from app.warmup import warm_up
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def test_warm_up_builds_openapi_and_middleware_stack():
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    elapsed = warm_up(app)
+
+    assert app.openapi_schema is not None
+    assert "/ping" in app.openapi_schema["paths"]
+    assert app.middleware_stack is not None
+    assert elapsed >= 0
+
+@pytest.mark.asyncio
+async def test_service_warm_up_tolerates_upstream_errors(upstream_service):
+    # The stub has no /models endpoint; the 404 must not stop the worker.
+    service, _ = upstream_service
+    try:
+        await service.warm_up()
+        assert service.client is not None
+    finally:
+        await service.close()
+
+# Measurement: a preloaded master forks a worker, which serves its first
+# requests and runs a full GC pass. Done in a fresh interpreter per mode so
+# lazy imports and caches are really cold.
+
+FORKED_WORKER = """
+import asyncio, gc, json, os, sys, time
+os.environ.setdefault("OPENAI_API_KEY", "test")
+from app.main import app
+from app.warmup import freeze_for_fork, warm_up
+
+if sys.argv[1] == "warm":
+    warm_up(app)
+    freeze_for_fork()
+
+async def get(path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+    }
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        pass
+    await app(scope, receive, send)
+
+def private_kb():
+    with open("/proc/self/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f if ":" in line)
+    return sum(int(fields[key].split()[0]) for key in ("Private_Clean", "Private_Dirty"))
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    start = time.perf_counter()
+    asyncio.run(get("/health"))
+    asyncio.run(get("/openapi.json"))
+    first_request_ms = (time.perf_counter() - start) * 1000
+    gc.collect()
+    os.write(write_fd, json.dumps({"first_request_ms": first_request_ms, "private_kb": private_kb()}).encode())
+    os._exit(0)
+os.close(write_fd)
+os.waitpid(pid, 0)
+print(os.read(read_fd, 4096).decode())
+"""
+
+def _measure(mode: str) -> dict:
+    env = {**os.environ, "OPENAI_API_KEY": "test", "LOG_LEVEL": "WARNING"}
+    result = subprocess.run(
+        [sys.executable, "-c", FORKED_WORKER, mode],
+        cwd=PROJECT_ROOT, env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="needs Linux smaps_rollup")
+def test_preload_warmup_reduces_first_request_latency_and_worker_memory():
+    cold = _measure("cold")
+    warm = _measure("warm")
+
+    print(f"\nforked worker, cold master: first requests {cold['first_request_ms']:.1f}ms, "
+          f"private memory {cold['private_kb']}kB")
+    print(f"forked worker, warmed + frozen master: first requests {warm['first_request_ms']:.1f}ms, "
+          f"private memory {warm['private_kb']}kB")
+
+    assert warm["first_request_ms"] < cold["first_request_ms"]
+    assert warm["private_kb"] < cold["private_kb"]
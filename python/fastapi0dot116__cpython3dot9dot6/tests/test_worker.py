@@ -0,0 +1,188 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+import httpx
+import pytest
+from uvicorn.config import Config
+from app.worker import DrainingServer, assign_worker_slot, release_surge_worker, surge_workers
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+def _server(limit_max_requests=None) -> DrainingServer:
+    retired = []
+    server = DrainingServer(
+        Config(app=None, limit_max_requests=limit_max_requests),
+        on_retire=lambda: retired.append(True)
+    )
+    server.retired = retired
+    return server
+
+@pytest.mark.asyncio
+async def test_on_retire_runs_once_when_max_requests_is_reached():
+    server = _server(limit_max_requests=2)
+    server.server_state.total_requests = 1
+    assert await server.on_tick(1) is False
+    assert server.retired == []
+
+    server.server_state.total_requests = 2
+    assert await server.on_tick(2) is True
+    assert await server.on_tick(3) is True
+    assert server.retired == [True]
+
+@pytest.mark.asyncio
+async def test_on_retire_is_not_called_when_the_master_stops_the_worker():
+    server = _server(limit_max_requests=2)
+    server.should_exit = True
+    server.server_state.total_requests = 5
+
+    assert await server.on_tick(1) is True
+    assert server.retired == []
+
+def test_release_surge_worker_only_gives_back_requested_replacements():
+    master = SimpleNamespace(num_workers=3)
+    surge_workers.value = 1
+
+    assert release_surge_worker(master) is True
+    assert master.num_workers == 2
+    # A worker that crashed, or was stopped by the master, is respawned as usual.
+    assert release_surge_worker(master) is False
+    assert master.num_workers == 2
+
+def test_worker_slots_are_reused_by_replacements():
+    master = SimpleNamespace(WORKERS={})
+    for pid in (101, 102, 103):
+        worker = SimpleNamespace()
+        assign_worker_slot(master, worker)
+        master.WORKERS[pid] = worker
+    assert [w.slot for w in master.WORKERS.values()] == [0, 1, 2]
+
+    # Worker 102 retires; its replacement takes slot 1 rather than a new one
+    del master.WORKERS[102]
+    replacement = SimpleNamespace()
+    assert assign_worker_slot(master, replacement) == 1
+
+# Soak tests: a real gunicorn master with the draining worker in front of the
+# stub upstream, recycling workers every few requests while under load.
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _start_gunicorn(base_url: str, tmp_path: Path, **env_overrides) -> tuple:
+    port = _free_port()
+    log_path = tmp_path / "gunicorn.log"
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": base_url,
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "DEBUG": "false",
+        "LOG_LEVEL": "INFO",
+        "METRICS_MULTIPROC_DIR": str(tmp_path / "metrics"),
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "metrics"),
+        "CACHE_ENABLED": "false",
+        "COALESCE_REQUESTS": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        **env_overrides
+    }
+    log = open(log_path, "w")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+        cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return process, url, log_path
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not start:\n{log_path.read_text()}")
+
+def _stop_gunicorn(process) -> None:
+    process.terminate()
+    process.wait(timeout=30)
+
+async def _soak(url: str, requests: int, concurrency: int) -> tuple:
+    latencies: List[float] = []
+    failures: List[str] = []
+    next_request = iter(range(requests))
+
+    async def client_loop(client: httpx.AsyncClient):
+        for i in next_request:
+            start = time.perf_counter()
+            try:
+                if i % 5 == 0:
+                    async with client.stream("POST", "/chat/stream", json={"message": f"soak {i}"}) as response:
+                        body = (await response.aread()).decode()
+                    ok = response.status_code == 200 and "[DONE]" in body and "event: error" not in body
+                else:
+                    response = await client.post("/chat", json={"message": f"soak {i}"})
+                    ok = response.status_code == 200
+                if not ok:
+                    failures.append(f"{i}: HTTP {response.status_code}")
+            except httpx.HTTPError as e:
+                failures.append(f"{i}: {type(e).__name__} {e}")
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+    return sorted(latencies), failures
+
+@pytest.mark.asyncio
+async def test_soak_no_dropped_requests_across_worker_recycles(stub_upstream, tmp_path):
+    base_url, state = stub_upstream
+    state.delay = 0.02
+    state.chunk_delay = 0.01
+    process, url, log_path = _start_gunicorn(
+        base_url, tmp_path, WORKERS="2", MAX_REQUESTS="25", MAX_REQUESTS_JITTER="5"
+    )
+    try:
+        latencies, failures = await _soak(url, requests=500, concurrency=8)
+    finally:
+        _stop_gunicorn(process)
+
+    log = log_path.read_text()
+    recycles = log.count("Worker reached max requests")
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"\n{len(latencies)} requests across {recycles} worker recycles: "
+          f"p50 {p50 * 1000:.0f}ms, p99 {p99 * 1000:.0f}ms, max {latencies[-1] * 1000:.0f}ms, "
+          f"{len(failures)} failed")
+
+    assert recycles >= 5
+    assert failures == []
+    assert latencies[-1] < 1.0
+
+def test_stream_outlives_worker_timeout_while_draining(stub_upstream, tmp_path):
+    base_url, state = stub_upstream
+    # Six words at 0.7s each: the stream runs ~4s, twice the worker timeout.
+    state.content = "a stream that outlives the timeout"
+    state.chunk_delay = 0.7
+    process, url, log_path = _start_gunicorn(
+        base_url, tmp_path, WORKERS="1", MAX_REQUESTS="1", MAX_REQUESTS_JITTER="0",
+        WORKER_TIMEOUT="2", UPSTREAM_DEADLINE_MARGIN="0.5", GRACEFUL_TIMEOUT="15"
+    )
+    try:
+        # The health check during startup used up the worker's one request.
+        with httpx.stream("POST", f"{url}/chat/stream", json={"message": "long"}, timeout=30) as response:
+            body = response.read().decode()
+        after = httpx.get(f"{url}/health")
+    finally:
+        _stop_gunicorn(process)
+
+    assert response.status_code == 200
+    assert "[DONE]" in body
+    assert "event: error" not in body
+    assert after.status_code == 200
+    assert "WORKER TIMEOUT" not in log_path.read_text()
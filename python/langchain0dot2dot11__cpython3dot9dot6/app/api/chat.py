@@ -1,7 +1,10 @@
 """FastAPI chat endpoints for LangChain agent."""
 import logging
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from app.api.responses import FastJSONResponse
+from app.api.streaming import event_stream_response, wants_ndjson
+from app.core.config import config
 from app.models.schemas import ChatRequest, ChatResponse, ErrorResponse
 from app.core.agent import get_agent
 
@@ -31,15 +34,15 @@ async def chat_endpoint(request: ChatRequest):
         # Get agent instance
         agent = get_agent()
         
-        # Process message
-        result = agent.process_message(
+        # Process message (awaits the LLM and tools instead of blocking the event loop)
+        result = await agent.aprocess_message(
             message=request.message,
             session_id=request.session_id
         )
         
         if result["success"]:
             logger.info(f"Chat response generated for session: {result['session_id']}")
-            return ChatResponse(**result)
+            return FastJSONResponse(ChatResponse(**result))
         else:
             logger.warning(f"Chat processing failed: {result.get('error', 'Unknown error')}")
             raise HTTPException(
@@ -63,14 +66,50 @@ async def chat_endpoint(request: ChatRequest):
             ).model_dump()
         )
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, accept: Optional[str] = Header(None)):
+    """
+    Chat with the LangChain agent, streaming progress as it happens.
+    
+    Sends Server-Sent Events, or NDJSON lines with `Accept: application/x-ndjson`.
+    Each event has a `type`:
+    - `start`: the session ID
+    - `tool_start` / `tool_end`: a tool call's name, input and output
+    - `token`: a chunk of the model's answer
+    - `final`: the full response, as returned by /chat
+    - `error`: the error, instead of `final`
+    
+    Keepalives are sent while nothing else happens, so proxies don't close
+    the connection during long tool calls.
+    """
+    logger.info(f"Streaming chat request received: {request.message[:100]}...")
+    
+    try:
+        agent = get_agent()
+    except Exception as e:
+        logger.error(f"Unexpected error in chat stream endpoint: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=ErrorResponse(
+                error="Internal server error",
+                details=str(e)
+            ).model_dump()
+        )
+    
+    return event_stream_response(
+        agent.astream_message(message=request.message, session_id=request.session_id),
+        ndjson=wants_ndjson(accept),
+        keepalive=config.STREAM_KEEPALIVE_SECONDS
+    )
+
 @router.get("/chat/status")
 async def chat_status():
     """
     Get the status of the chat agent and available tools.
     """
     try:
-        from app.core.config import config
         from app.tools import AVAILABLE_TOOLS, TOOL_DESCRIPTIONS
+        from app.tools.cache import tool_cache_stats
         
         # Check agent initialization
         agent_status = "healthy"
@@ -79,22 +118,57 @@ async def chat_status():
         except Exception as e:
             agent_status = f"error: {str(e)}"
         
-        return JSONResponse(content={
+        return FastJSONResponse(content={
             "status": "healthy" if agent_status == "healthy" else "degraded",
             "agent_status": agent_status,
             "openai_configured": bool(config.OPENAI_API_KEY),
             "datadog_configured": config.is_datadog_configured(),
             "available_tools": len(AVAILABLE_TOOLS),
             "tools": TOOL_DESCRIPTIONS,
+            "tool_cache": tool_cache_stats(),
             "message": "Chat API is operational"
         })
         
     except Exception as e:
         logger.error(f"Error getting chat status: {str(e)}")
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={
                 "status": "error",
                 "message": f"Failed to get status: {str(e)}"
             }
-        )
\ No newline at end of file
+        )
+
+# Plain def: FastAPI runs these on its threadpool, keeping session store
+# I/O (SQLite) off the event loop
+@router.get("/chat/memory")
+def memory_stats():
+    """
+    Get conversation memory usage: sessions, history tokens and evictions.
+    """
+    return FastJSONResponse(content=get_agent().memory.stats())
+
+@router.get("/chat/sessions/{session_id}")
+def session_stats(session_id: str):
+    """
+    Get the size of one session's conversation history.
+    """
+    stats = get_agent().memory.session_stats(session_id)
+    if stats is None:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(error="Session not found", details=session_id).model_dump()
+        )
+    return FastJSONResponse(content={"session_id": session_id, **stats})
+
+@router.delete("/chat/sessions/{session_id}")
+def delete_session(session_id: str):
+    """
+    Forget one session's conversation history.
+    """
+    if not get_agent().memory.delete(session_id):
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(error="Session not found", details=session_id).model_dump()
+        )
+    return FastJSONResponse(content={"session_id": session_id, "deleted": True})
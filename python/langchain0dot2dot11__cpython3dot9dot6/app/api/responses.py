@@ -0,0 +1,15 @@
+"""Fast JSON responses for objects the API built itself."""
+from typing import Any
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serialized by pydantic-core's Rust encoder.
+    
+    Returning one from an endpoint skips FastAPI's response_model
+    re-validation and jsonable_encoder pass. Only use it for trusted objects,
+    such as a response model the endpoint has just constructed.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,80 @@
+"""Event streams over Server-Sent Events or NDJSON."""
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+_DONE = object()
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    """Whether the Accept header asks for NDJSON rather than SSE."""
+    return bool(accept) and NDJSON_MEDIA_TYPE in accept
+
+
+def encode_event(event: Optional[Dict[str, Any]], ndjson: bool) -> bytes:
+    """Encode one event (None is a keepalive) as an SSE message or an NDJSON line."""
+    if event is None:
+        return b'{"type":"keepalive"}\n' if ndjson else b": keepalive\n\n"
+    data = to_json(event, fallback=str)
+    if ndjson:
+        return data + b"\n"
+    return b"event: " + event["type"].encode() + b"\ndata: " + data + b"\n\n"
+
+
+async def with_keepalive(events: AsyncIterator[Dict[str, Any]], interval: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Pass events through, yielding None after every ``interval`` seconds without one.
+
+    The events are consumed in a separate task, so a slow step (a tool call,
+    the model thinking) doesn't stop keepalives. Closing this iterator (the
+    client went away) cancels that task and the run behind it.
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_DONE)
+
+    producer = asyncio.ensure_future(produce())
+    get = None
+    try:
+        while True:
+            if get is None:
+                get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({get}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            item, get = get.result(), None
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        for task in (get, producer):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def event_stream_response(events: AsyncIterator[Dict[str, Any]], ndjson: bool, keepalive: float) -> StreamingResponse:
+    """Stream events as SSE (default) or NDJSON, with keepalives while idle."""
+
+    async def body() -> AsyncIterator[bytes]:
+        async for event in with_keepalive(events, keepalive):
+            yield encode_event(event, ndjson)
+
+    return StreamingResponse(
+        body(),
+        media_type=NDJSON_MEDIA_TYPE if ndjson else SSE_MEDIA_TYPE,
+        # No caching or proxy buffering: each event is sent as it happens
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
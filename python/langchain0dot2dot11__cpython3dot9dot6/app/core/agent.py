@@ -1,12 +1,17 @@
 """LangChain agent implementation with tool calling capabilities."""
 import uuid
 import logging
-from typing import Dict, Any, Optional
+import threading
+from typing import AsyncIterator, Dict, Any, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_openai import ChatOpenAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
 from app.tools import AVAILABLE_TOOLS
+from app.tools.pool import with_async_fallback
 from app.core.config import config
+from app.core.executor import ParallelToolExecutor
+from app.core.memory import create_session_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,6 +23,7 @@ class LangChainAgent:
         """Initialize the agent with tools and configuration."""
         self.llm = None
         self.agent_executor = None
+        self.memory = create_session_store()
         self._initialize_agent()
     
     def _initialize_agent(self):
@@ -37,20 +43,27 @@ class LangChainAgent:
             # Create prompt template
             prompt = ChatPromptTemplate.from_messages([
                 ("system", self._get_system_message()),
+                MessagesPlaceholder(variable_name="chat_history", optional=True),
                 ("human", "{input}"),
                 MessagesPlaceholder(variable_name="agent_scratchpad"),
             ])
             
+            # Sync-only tools run on the bounded tool pool when the agent runs async
+            tools = [with_async_fallback(tool) for tool in AVAILABLE_TOOLS]
+            
             # Create agent
-            agent = create_tool_calling_agent(self.llm, AVAILABLE_TOOLS, prompt)
+            agent = create_tool_calling_agent(self.llm, tools, prompt)
             
-            # Create agent executor
-            self.agent_executor = AgentExecutor(
+            # Create agent executor (a step's tool calls run concurrently, with deadlines)
+            self.agent_executor = ParallelToolExecutor(
                 agent=agent,
-                tools=AVAILABLE_TOOLS,
+                tools=tools,
                 verbose=config.VERBOSE_LOGGING,
                 handle_parsing_errors=True,
-                max_iterations=5  # Limit iterations to prevent infinite loops
+                max_iterations=5,  # Limit iterations to prevent infinite loops
+                tool_timeouts=config.TOOL_TIMEOUTS,
+                default_tool_timeout=config.TOOL_TIMEOUT_SECONDS,
+                step_timeout=config.TOOL_STEP_TIMEOUT_SECONDS
             )
             
             logger.info("LangChain agent initialized successfully")
@@ -90,6 +103,8 @@ Choose the appropriate tool based on the user's query and provide helpful respon
         """
         Process a user message through the agent.
         
+        Blocks until the agent finishes; async callers use aprocess_message.
+        
         Args:
             message: User's input message
             session_id: Optional session ID for conversation continuity
@@ -101,60 +116,167 @@ Choose the appropriate tool based on the user's query and provide helpful respon
             session_id = str(uuid.uuid4())
         
         try:
-            if not self.agent_executor:
-                raise RuntimeError("Agent not properly initialized")
+            rejected = self._check_message(message, session_id)
+            if rejected:
+                return rejected
             
-            if not message or not message.strip():
-                return {
-                    "response": "Please provide a message for me to help you with.",
-                    "session_id": session_id,
-                    "success": False,
-                    "error": "Empty message provided"
-                }
+            # Process through agent executor, with the session's earlier turns
+            result = self.agent_executor.invoke({
+                "input": message.strip(),
+                "chat_history": self.memory.get(session_id)
+            })
+            response = self._success_result(result, session_id)
+            self.memory.append(session_id, self._turn(message, response))
+            return response
             
-            logger.info(f"Processing message for session {session_id}: {message[:100]}...")
+        except Exception as e:
+            return self._error_result(e, session_id)
+
+    async def aprocess_message(self, message: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Process a user message through the agent without blocking the event loop.
+        
+        LLM calls are awaited natively; sync-only tools run on the tool pool.
+        
+        Args:
+            message: User's input message
+            session_id: Optional session ID for conversation continuity
             
-            # Process through agent executor
-            result = self.agent_executor.invoke({"input": message.strip()})
+        Returns:
+            Dictionary containing response and metadata
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        try:
+            rejected = self._check_message(message, session_id)
+            if rejected:
+                return rejected
             
-            # Extract response
-            response_content = result.get("output", "I apologize, but I couldn't generate a proper response.")
+            # Process through agent executor, with the session's earlier turns
+            result = await self.agent_executor.ainvoke({
+                "input": message.strip(),
+                "chat_history": await self.memory.aget(session_id)
+            })
+            response = self._success_result(result, session_id)
+            await self.memory.aappend(session_id, self._turn(message, response))
+            return response
             
-            logger.info(f"Agent response generated for session {session_id}")
+        except Exception as e:
+            return self._error_result(e, session_id)
+
+    async def astream_message(self, message: str, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user message, yielding progress events as they happen.
+        
+        Events: ``start``; ``tool_start`` and ``tool_end`` around each tool
+        call; ``token`` for each chunk of text the model generates; then
+        ``final`` (the same fields as process_message) or ``error``.
+        
+        Args:
+            message: User's input message
+            session_id: Optional session ID for conversation continuity
             
-            return {
-                "response": response_content,
-                "session_id": session_id,
-                "success": True
-            }
+        Yields:
+            Event dictionaries with a ``type`` key
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        try:
+            rejected = self._check_message(message, session_id)
+            if rejected:
+                yield {"type": "error", **rejected}
+                return
             
-        except Exception as e:
-            logger.error(f"Error processing message: {str(e)}", exc_info=True)
+            yield {"type": "start", "session_id": session_id}
             
-            # Handle specific error cases
-            error_message = str(e)
-            if "api key" in error_message.lower():
-                response = "I'm having trouble with my API configuration. Please check that the OpenAI API key is properly configured."
-            elif "rate limit" in error_message.lower():
-                response = "I'm currently experiencing rate limiting. Please try again in a moment."
-            else:
-                response = f"I encountered an error while processing your request: {error_message}"
+            inputs = {"input": message.strip(), "chat_history": await self.memory.aget(session_id)}
+            async for event in self.agent_executor.astream_events(inputs, version="v2"):
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield {"type": "token", "content": content}
+                elif kind == "on_tool_start":
+                    yield {"type": "tool_start", "tool": event["name"], "run_id": event["run_id"], "input": event["data"].get("input")}
+                elif kind == "on_tool_end":
+                    yield {"type": "tool_end", "tool": event["name"], "run_id": event["run_id"], "output": event["data"].get("output")}
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    # The executor itself finished
+                    response = self._success_result(event["data"]["output"], session_id)
+                    await self.memory.aappend(session_id, self._turn(message, response))
+                    yield {"type": "final", **response}
             
+        except Exception as e:
+            yield {"type": "error", **self._error_result(e, session_id)}
+
+    def _check_message(self, message: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """Raise if the agent isn't ready; return a result for messages not worth running."""
+        if not self.agent_executor:
+            raise RuntimeError("Agent not properly initialized")
+        
+        if not message or not message.strip():
             return {
-                "response": response,
+                "response": "Please provide a message for me to help you with.",
                 "session_id": session_id,
                 "success": False,
-                "error": error_message
+                "error": "Empty message provided"
             }
+        
+        logger.info(f"Processing message for session {session_id}: {message[:100]}...")
+        return None
+
+    def _success_result(self, result: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Build the response for a finished agent run."""
+        # Extract response
+        response_content = result.get("output", "I apologize, but I couldn't generate a proper response.")
+        
+        logger.info(f"Agent response generated for session {session_id}")
+        
+        return {
+            "response": response_content,
+            "session_id": session_id,
+            "success": True
+        }
+
+    def _turn(self, message: str, response: Dict[str, Any]) -> List[BaseMessage]:
+        """The messages a successful run adds to the session's history."""
+        return [HumanMessage(content=message.strip()), AIMessage(content=response["response"])]
+
+    def _error_result(self, e: Exception, session_id: str) -> Dict[str, Any]:
+        """Build the response for a failed agent run."""
+        logger.error(f"Error processing message: {str(e)}", exc_info=True)
+        
+        # Handle specific error cases
+        error_message = str(e)
+        if "api key" in error_message.lower():
+            response = "I'm having trouble with my API configuration. Please check that the OpenAI API key is properly configured."
+        elif "rate limit" in error_message.lower():
+            response = "I'm currently experiencing rate limiting. Please try again in a moment."
+        else:
+            response = f"I encountered an error while processing your request: {error_message}"
+        
+        return {
+            "response": response,
+            "session_id": session_id,
+            "success": False,
+            "error": error_message
+        }
 
 # Global agent instance
 _agent_instance = None
+# The readiness probe builds the agent on an executor thread while requests
+# may build it on the event loop; only one of them may
+_agent_lock = threading.Lock()
 
 def get_agent() -> LangChainAgent:
     """Get the global agent instance (singleton pattern)."""
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = LangChainAgent()
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = LangChainAgent()
     return _agent_instance
 
 def reset_agent():
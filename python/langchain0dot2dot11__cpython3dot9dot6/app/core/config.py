@@ -1,40 +1,113 @@
 """Configuration module for LangChain tool calling application."""
 import os
-from typing import Optional
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any, Dict
 
-# Load environment variables from .env file
-load_dotenv()
 
 class Config:
     """Configuration class for application settings."""
-    
-    # OpenAI Configuration (Required)
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    
-    # Datadog Configuration (Required for Datadog metrics)
-    DATADOG_API_KEY: str = os.getenv("DATADOG_API_KEY", "")
-    DATADOG_APP_KEY: str = os.getenv("DATADOG_APP_KEY", "")
-    
-    # Application Configuration
-    VERBOSE_LOGGING: bool = os.getenv("VERBOSE_LOGGING", "False").lower() == "true"
-    
+
     # FastAPI Configuration
     APP_TITLE: str = "LangChain Tool Calling API"
     APP_DESCRIPTION: str = "A simple API for LangChain agents with search and Datadog tools"
     APP_VERSION: str = "0.1.0"
-    
+
+    def __init__(self):
+        """Read settings from the environment (call get_config() instead)."""
+        # OpenAI Configuration (Required)
+        self.OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+        self.OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+        # Datadog Configuration (Required for Datadog metrics)
+        self.DATADOG_API_KEY: str = os.getenv("DATADOG_API_KEY", "")
+        self.DATADOG_APP_KEY: str = os.getenv("DATADOG_APP_KEY", "")
+
+        # Application Configuration
+        self.VERBOSE_LOGGING: bool = os.getenv("VERBOSE_LOGGING", "False").lower() == "true"
+
+        # Threads for running sync-only tools from the async agent
+        self.TOOL_THREAD_POOL_SIZE: int = int(os.getenv("TOOL_THREAD_POOL_SIZE", "8"))
+
+        # Tool call deadlines: per tool ("search_tool=10,datadog_metrics_tool=15"), default, and per agent step
+        self.TOOL_TIMEOUTS: Dict[str, float] = parse_timeouts(os.getenv("TOOL_TIMEOUTS", ""))
+        self.TOOL_TIMEOUT_SECONDS: float = float(os.getenv("TOOL_TIMEOUT_SECONDS", "20"))
+        self.TOOL_STEP_TIMEOUT_SECONDS: float = float(os.getenv("TOOL_STEP_TIMEOUT_SECONDS", "30"))
+
+        # Tool result cache: search results stay fresh for SEARCH_CACHE_TTL_SECONDS, Datadog
+        # results until their rollup interval ends, errors for TOOL_CACHE_ERROR_TTL_SECONDS
+        self.TOOL_CACHE_ENABLED: bool = os.getenv("TOOL_CACHE_ENABLED", "True").lower() == "true"
+        self.TOOL_CACHE_MAX_ENTRIES: int = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256"))
+        self.SEARCH_CACHE_TTL_SECONDS: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "300"))
+        self.TOOL_CACHE_ERROR_TTL_SECONDS: float = float(os.getenv("TOOL_CACHE_ERROR_TTL_SECONDS", "30"))
+
+        # Conversation history per session_id: "memory" (this process) or "sqlite" (file, survives restarts)
+        self.SESSION_STORE: str = os.getenv("SESSION_STORE", "memory").lower()
+        self.SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "sessions.db")
+        self.SESSION_MAX_SESSIONS: int = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+        self.SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+        self.SESSION_MAX_TOKENS: int = int(os.getenv("SESSION_MAX_TOKENS", "2000"))
+
+        # Seconds without events after which a streaming response sends a keepalive
+        self.STREAM_KEEPALIVE_SECONDS: float = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+
+        # Readiness probe: seconds between background checks, and per-check timeout
+        self.READINESS_INTERVAL: float = float(os.getenv("READINESS_INTERVAL", "15"))
+        self.READINESS_TIMEOUT: float = float(os.getenv("READINESS_TIMEOUT", "5"))
+
     def validate_required_config(self) -> None:
         """Validate that required configuration is present."""
         if not self.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required")
-        
+
         # Datadog keys are validated when the tool is used
         # This allows the app to start even without Datadog configuration
-    
+
     def is_datadog_configured(self) -> bool:
         """Check if Datadog configuration is available."""
         return bool(self.DATADOG_API_KEY and self.DATADOG_APP_KEY)
 
+
+def parse_timeouts(value: str) -> Dict[str, float]:
+    """Parse "name=seconds,name=seconds" into a dict."""
+    timeouts = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, seconds = item.partition("=")
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Get the configuration, loading .env and the environment on first use."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return Config()
+
+
+def reload_config() -> Config:
+    """Re-read .env and the environment; ``config`` resolves to the new values."""
+    get_config.cache_clear()
+    return get_config()
+
+
+class _LazyConfig:
+    """Stands in for the Config instance until something reads from it.
+
+    Importing this module does no I/O; the environment is read once, on
+    first attribute access, and writes (e.g. test patches) go to the cached
+    instance.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_config(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_config(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(get_config(), name)
+
+
 # Global configuration instance
-config = Config()
\ No newline at end of file
+config: Config = _LazyConfig()  # type: ignore[assignment]
@@ -0,0 +1,71 @@
+"""Agent executor with deadlines on concurrent tool calls."""
+import asyncio
+import logging
+from typing import Dict, Optional
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.callbacks import AsyncCallbackManagerForChainRun
+from langchain_core.tools import BaseTool
+from pydantic import Field
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelToolExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool calls are each bounded by a deadline.
+
+    On the async path, AgentExecutor already runs all tool calls of one step
+    concurrently (``asyncio.gather``) and joins their observations in call
+    order, so a step takes as long as its slowest tool. This bounds that
+    slowest tool: each call gets its tool's timeout, capped by the step
+    deadline shared by every call in the step. A call that runs out of time
+    is observed as a timeout message, so the model can answer with the
+    results that did arrive.
+
+    Timing out stops the wait, not the work. A native coroutine is
+    cancelled, and a call still queued for the tool pool is dropped from the
+    queue. But a sync tool already running on the pool is abandoned: its
+    thread runs the call to completion and holds its pool slot until then.
+
+    The sync path (``invoke``) still runs tool calls one after another,
+    without deadlines.
+
+    Args:
+        tool_timeouts: Timeout in seconds per tool name
+        default_tool_timeout: Timeout for tools not in ``tool_timeouts``
+        step_timeout: Deadline in seconds for all tool calls of one step
+    """
+
+    tool_timeouts: Dict[str, float] = Field(default_factory=dict)
+    default_tool_timeout: float = 20.0
+    step_timeout: float = 30.0
+    # Timed-out calls per tool since startup
+    timed_out: Dict[str, int] = Field(default_factory=dict)
+
+    def timeout_for(self, tool_name: str) -> float:
+        """Seconds a call to the tool may take, within the step deadline."""
+        return min(self.tool_timeouts.get(tool_name, self.default_tool_timeout), self.step_timeout)
+
+    async def _aperform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        # Every call of a step starts together, so per-call deadlines capped
+        # by step_timeout end the whole step by then
+        timeout = self.timeout_for(agent_action.tool)
+        try:
+            return await asyncio.wait_for(
+                super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            self.timed_out[agent_action.tool] = self.timed_out.get(agent_action.tool, 0) + 1
+            logger.warning(f"Tool {agent_action.tool} timed out after {timeout:g}s; its result will be discarded")
+            return AgentStep(
+                action=agent_action,
+                observation=f"Error: {agent_action.tool} timed out after {timeout:g}s. Answer without its result."
+            )
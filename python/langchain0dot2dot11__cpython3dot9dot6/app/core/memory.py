@@ -0,0 +1,290 @@
+"""Per-session conversation history with bounded storage."""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Rough tokens per message on top of its content (role and framing)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Estimate the prompt tokens of messages at ~4 characters per token."""
+    return sum(len(str(m.content)) // 4 + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+class SessionStore(ABC):
+    """
+    Base class for conversation history stores.
+
+    History is kept as whole turns (the user's message and the agent's
+    answer). When a session's history goes over ``max_tokens``, its oldest
+    turns are dropped. Sessions unused for ``ttl_seconds`` expire, and past
+    ``max_sessions`` the least recently used session is evicted.
+
+    The event loop uses ``aget`` and ``aappend``, which run the blocking
+    methods on the default executor.
+
+    Args:
+        max_sessions: Sessions kept before the least recently used is evicted
+        ttl_seconds: Idle time after which a session expires (0 = never)
+        max_tokens: Estimated history tokens kept per session
+    """
+
+    backend = "base"
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_tokens: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_tokens = max_tokens
+        self.evictions = {"lru": 0, "ttl": 0}
+        self.truncated_turns = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, session_id: str) -> List[BaseMessage]:
+        """Get a session's history (empty for new or expired sessions)."""
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[BaseMessage]) -> None:
+        """Add a turn to a session's history, trimming and evicting as needed."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed."""
+
+    @abstractmethod
+    def session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Messages, estimated tokens and idle time of one session, or None."""
+
+    @abstractmethod
+    def _sizes(self) -> List[int]:
+        """Estimated history tokens of every live session."""
+
+    async def aget(self, session_id: str) -> List[BaseMessage]:
+        """``get`` without blocking the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, session_id)
+
+    async def aappend(self, session_id: str, messages: List[BaseMessage]) -> None:
+        """``append`` without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.append, session_id, messages)
+
+    def stats(self) -> Dict[str, Any]:
+        """Store-wide sizes and eviction counts (since this process started)."""
+        sizes = self._sizes()
+        return {
+            "backend": self.backend,
+            "sessions": len(sizes),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "max_tokens_per_session": self.max_tokens,
+            "tokens": {
+                "total": sum(sizes),
+                "max_session": max(sizes, default=0),
+                "avg_session": round(sum(sizes) / len(sizes), 1) if sizes else 0
+            },
+            "evictions": dict(self.evictions),
+            "truncated_turns": self.truncated_turns
+        }
+
+    def _trim(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], int]:
+        """Drop the oldest turns until the history fits max_tokens."""
+        tokens = estimate_tokens(messages)
+        dropped = 0
+        while messages and tokens > self.max_tokens:
+            turn, messages = messages[:2], messages[2:]
+            tokens -= estimate_tokens(turn)
+            dropped += 1
+        if dropped:
+            self.truncated_turns += dropped
+        return messages, tokens
+
+    def _expired(self, updated_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - updated_at > self.ttl_seconds
+
+
+class InMemorySessionStore(SessionStore):
+    """Session history in this process's memory, in least-recently-used order."""
+
+    backend = "memory"
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_tokens: int):
+        super().__init__(max_sessions, ttl_seconds, max_tokens)
+        # session_id -> (messages, estimated tokens, last used)
+        self._sessions: "OrderedDict[str, Tuple[List[BaseMessage], int, float]]" = OrderedDict()
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._sessions.get(session_id)
+            return list(entry[0]) if entry else []
+
+    def append(self, session_id: str, messages: List[BaseMessage]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session_id, None)
+            history, tokens = self._trim((entry[0] if entry else []) + list(messages))
+            if not history:
+                return
+            self._sessions[session_id] = (history, tokens, now)
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self.evictions["lru"] += 1
+                logger.info(f"Evicted least recently used session {evicted}")
+
+    async def aget(self, session_id: str) -> List[BaseMessage]:
+        # No I/O and a lock held for microseconds: not worth a thread hop
+        return self.get(session_id)
+
+    async def aappend(self, session_id: str, messages: List[BaseMessage]) -> None:
+        self.append(session_id, messages)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            messages, tokens, updated_at = entry
+            return {"messages": len(messages), "tokens": tokens, "idle_seconds": round(now - updated_at, 1)}
+
+    def _sizes(self) -> List[int]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return [tokens for _, tokens, _ in self._sessions.values()]
+
+    def _expire(self, now: float) -> None:
+        # Least recently used first, so expired sessions are all at the front
+        while self._sessions:
+            session_id, (_, _, updated_at) = next(iter(self._sessions.items()))
+            if not self._expired(updated_at, now):
+                break
+            del self._sessions[session_id]
+            self.evictions["ttl"] += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session history in a local SQLite file.
+
+    Survives restarts and is shared by every worker on the host. Eviction
+    counts are per process.
+
+    Args:
+        path: Database file (created if missing)
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_sessions: int, ttl_seconds: float, max_tokens: int):
+        super().__init__(max_sessions, ttl_seconds, max_tokens)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, messages TEXT NOT NULL, tokens INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None or self._expired(row[1], time.time()):
+            return []
+        return messages_from_dict(json.loads(row[0]))
+
+    def append(self, session_id: str, messages: List[BaseMessage]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.ttl_seconds > 0:
+                    expired = self._conn.execute(
+                        "DELETE FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,)
+                    ).rowcount
+                    self.evictions["ttl"] += expired
+                row = self._conn.execute(
+                    "SELECT messages FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                history = messages_from_dict(json.loads(row[0])) if row else []
+                history, tokens = self._trim(history + list(messages))
+                if history:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO sessions (session_id, messages, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                        (session_id, json.dumps(messages_to_dict(history)), tokens, now)
+                    )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+                if count > self.max_sessions:
+                    self._conn.execute(
+                        "DELETE FROM sessions WHERE session_id IN "
+                        "(SELECT session_id FROM sessions ORDER BY updated_at LIMIT ?)",
+                        (count - self.max_sessions,)
+                    )
+                    self.evictions["lru"] += count - self.max_sessions
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def session_stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages, tokens, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        now = time.time()
+        if row is None or self._expired(row[2], now):
+            return None
+        return {"messages": len(json.loads(row[0])), "tokens": row[1], "idle_seconds": round(now - row[2], 1)}
+
+    def _sizes(self) -> List[int]:
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else float("-inf")
+        with self._lock:
+            rows = self._conn.execute("SELECT tokens FROM sessions WHERE updated_at >= ?", (cutoff,)).fetchall()
+        return [tokens for (tokens,) in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by SESSION_STORE."""
+    if config.SESSION_STORE == "sqlite":
+        logger.info(f"Storing session history in {config.SESSION_DB_PATH}")
+        return SQLiteSessionStore(
+            config.SESSION_DB_PATH,
+            max_sessions=config.SESSION_MAX_SESSIONS,
+            ttl_seconds=config.SESSION_TTL_SECONDS,
+            max_tokens=config.SESSION_MAX_TOKENS
+        )
+    if config.SESSION_STORE != "memory":
+        raise ValueError(f"SESSION_STORE must be 'memory' or 'sqlite', got {config.SESSION_STORE!r}")
+    return InMemorySessionStore(
+        max_sessions=config.SESSION_MAX_SESSIONS,
+        ttl_seconds=config.SESSION_TTL_SECONDS,
+        max_tokens=config.SESSION_MAX_TOKENS
+    )
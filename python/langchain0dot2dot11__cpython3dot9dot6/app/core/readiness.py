@@ -0,0 +1,133 @@
+"""Background readiness probe for the /readyz endpoint."""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+import httpx
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class _Check(NamedTuple):
+    name: str
+    run: Callable[[], Awaitable[Dict[str, Any]]]
+    critical: bool
+
+
+class ReadinessProbe:
+    """Dependency checks run in the background, served from a cache.
+
+    Every ``interval`` seconds the checks run concurrently, each bounded by
+    ``timeout``. A check returns details for the report or raises to fail.
+    ``/readyz`` only reads the last result, so load-balancer polling never
+    reaches OpenAI or Datadog. The service is ready when every critical
+    check passed and the result is less than three intervals old.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self._checks: List[_Check] = []
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[float] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def add_check(self, name: str, check: Callable[[], Awaitable[Dict[str, Any]]], critical: bool = True) -> None:
+        """Register a check; non-critical failures are reported without failing readiness."""
+        self._checks.append(_Check(name, check, critical))
+
+    async def _run(self, check: _Check) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            details = await asyncio.wait_for(check.run(), self.timeout)
+            result = {"ok": True, **(details or {})}
+        except asyncio.TimeoutError:
+            result = {"ok": False, "error": f"timed out after {self.timeout:g}s"}
+        except Exception as e:
+            result = {"ok": False, "error": str(e) or type(e).__name__}
+        result["critical"] = check.critical
+        result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def refresh(self) -> None:
+        """Run every check now and cache the results."""
+        results = await asyncio.gather(*[self._run(check) for check in self._checks])
+        previous = self._results
+        self._results = {check.name: result for check, result in zip(self._checks, results)}
+        self._checked_at = time.monotonic()
+        for name, result in self._results.items():
+            if previous.get(name, {}).get("ok", True) != result["ok"]:
+                log = logger.info if result["ok"] else logger.warning
+                log(f"Readiness check {name} {'passed' if result['ok'] else 'failed'}: {result.get('error', 'ok')}")
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Readiness probe failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background probe on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def close(self) -> None:
+        """Stop the background probe."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Tuple[bool, Dict[str, Any]]:
+        """Whether the service is ready, and the report for /readyz."""
+        if self._checked_at is None:
+            return False, {"status": "starting", "checks": {}}
+        age = time.monotonic() - self._checked_at
+        ready = age <= 3 * self.interval and all(
+            result["ok"] for result in self._results.values() if result["critical"]
+        )
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checked_seconds_ago": round(age, 1),
+            "checks": self._results
+        }
+
+
+async def check_config() -> Dict[str, Any]:
+    """Required configuration is present."""
+    config.validate_required_config()
+    return {}
+
+
+async def check_agent() -> Dict[str, Any]:
+    """The agent is built (built here, off the event loop, if no request has yet)."""
+    from app.core.agent import get_agent
+    agent = await asyncio.get_running_loop().run_in_executor(None, get_agent)
+    return {"tools": len(agent.agent_executor.tools)}
+
+
+async def check_openai() -> Dict[str, Any]:
+    """The OpenAI API answers; any status below 500 proves it reachable."""
+    async with httpx.AsyncClient(timeout=config.READINESS_TIMEOUT) as client:
+        response = await client.get(
+            f"{config.OPENAI_BASE_URL.rstrip('/')}/models",
+            headers={"Authorization": f"Bearer {config.OPENAI_API_KEY}"}
+        )
+    if response.status_code >= 500:
+        raise RuntimeError(f"OpenAI API returned {response.status_code}")
+    return {"status_code": response.status_code}
+
+
+async def check_datadog() -> Dict[str, Any]:
+    """The Datadog API client can be built from the configured keys."""
+    if not config.is_datadog_configured():
+        raise RuntimeError("DATADOG_API_KEY and DATADOG_APP_KEY are not set")
+    from app.tools.datadog import get_datadog_client
+    get_datadog_client().close()
+    return {}
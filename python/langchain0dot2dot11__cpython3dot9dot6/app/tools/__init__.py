@@ -2,6 +2,8 @@
 from typing import List
 from langchain_core.tools import BaseTool
 
+from app.core.config import config
+from .cache import datadog_policy, search_policy, with_cache
 from .search import search_tool
 from .datadog import datadog_metrics_tool
 
@@ -11,6 +13,20 @@ AVAILABLE_TOOLS: List[BaseTool] = [
     datadog_metrics_tool,
 ]
 
+# Cache each tool's results under its own policy
+if config.TOOL_CACHE_ENABLED:
+    AVAILABLE_TOOLS = [
+        with_cache(search_tool, search_policy(
+            ttl=config.SEARCH_CACHE_TTL_SECONDS,
+            error_ttl=config.TOOL_CACHE_ERROR_TTL_SECONDS,
+            max_entries=config.TOOL_CACHE_MAX_ENTRIES
+        )),
+        with_cache(datadog_metrics_tool, datadog_policy(
+            error_ttl=config.TOOL_CACHE_ERROR_TTL_SECONDS,
+            max_entries=config.TOOL_CACHE_MAX_ENTRIES
+        )),
+    ]
+
 # Tool descriptions for documentation
 TOOL_DESCRIPTIONS = {
     "search_tool": "Search the internet for information using DuckDuckGo",
@@ -0,0 +1,211 @@
+"""Result cache for tool calls, with a TTL policy per tool."""
+import copy
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+from langchain_core.tools import StructuredTool
+from app.tools.pool import run_in_tool_pool
+
+logger = logging.getLogger(__name__)
+
+# Datadog rollup intervals in seconds; a query uses the smallest one giving at most ~300 points
+ROLLUP_INTERVALS = (20, 60, 300, 600, 1800, 3600, 7200, 14400, 86400)
+_PERIOD_SECONDS = {"h": 3600, "d": 86400}
+
+
+class CachePolicy(NamedTuple):
+    """
+    How one tool's results are cached.
+
+    Args:
+        key: Cache key from the call's arguments (None = don't cache the call)
+        ttl: Seconds a result stays fresh, given the call's arguments
+        is_error: Whether a result is a failure, cached only for ``error_ttl``
+        error_ttl: Seconds an error stays cached
+        max_entries: Results kept before the least recently used is evicted
+    """
+
+    key: Callable[[Dict[str, Any]], Optional[Hashable]]
+    ttl: Callable[[Dict[str, Any]], float]
+    is_error: Callable[[Any], bool]
+    error_ttl: float
+    max_entries: int
+
+
+class ToolCache:
+    """Bounded LRU cache of one tool's results, with hit-rate counters."""
+
+    def __init__(self, name: str, policy: CachePolicy):
+        self.name = name
+        self.policy = policy
+        # key -> (result, expires at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.error_hits = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Look up a fresh result; returns (found, result)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self.policy.is_error(entry[0]):
+                self.error_hits += 1
+            return True, copy.deepcopy(entry[0])
+
+    def put(self, key: Hashable, result: Any, arguments: Dict[str, Any]) -> None:
+        """Store a result under the policy's TTL (the error TTL for failures)."""
+        ttl = self.policy.error_ttl if self.policy.is_error(result) else self.policy.ttl(arguments)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(result), time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.policy.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, hit rate and eviction counts since startup."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.policy.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "error_hits": self.error_hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+
+# Tool name -> its cache, for stats
+TOOL_CACHES: Dict[str, ToolCache] = {}
+
+
+def with_cache(tool: StructuredTool, policy: CachePolicy) -> StructuredTool:
+    """
+    Return a copy of the tool whose results are cached under the policy.
+
+    Both paths share the cache: ``invoke`` calls the tool on a miss, and
+    ``ainvoke`` answers hits on the event loop and runs misses on the tool
+    pool (or the tool's own coroutine).
+
+    Args:
+        tool: The tool to cache
+        policy: Keys, TTLs and size bound for its results
+    """
+    cache = ToolCache(tool.name, policy)
+    TOOL_CACHES[tool.name] = cache
+    signature = inspect.signature(tool.func or tool.coroutine)
+
+    def arguments_of(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def lookup(arguments: Dict[str, Any]) -> Tuple[Optional[Hashable], bool, Any]:
+        key = policy.key(arguments)
+        if key is None:
+            return None, False, None
+        return (key, *cache.get(key))
+
+    def cached_func(*args: Any, **kwargs: Any) -> Any:
+        arguments = arguments_of(args, kwargs)
+        key, found, result = lookup(arguments)
+        if found:
+            return result
+        result = tool.func(*args, **kwargs)
+        if key is not None:
+            cache.put(key, result, arguments)
+        return result
+
+    async def cached_coroutine(*args: Any, **kwargs: Any) -> Any:
+        arguments = arguments_of(args, kwargs)
+        key, found, result = lookup(arguments)
+        if found:
+            return result
+        if tool.coroutine is not None:
+            result = await tool.coroutine(*args, **kwargs)
+        else:
+            result = await run_in_tool_pool(tool.func, *args, **kwargs)
+        if key is not None:
+            cache.put(key, result, arguments)
+        return result
+
+    return tool.model_copy(update={
+        "func": functools.wraps(tool.func)(cached_func) if tool.func else None,
+        "coroutine": cached_coroutine
+    })
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every tool cache, by tool name."""
+    return {name: cache.stats() for name, cache in TOOL_CACHES.items()}
+
+
+def search_policy(ttl: float, error_ttl: float, max_entries: int) -> CachePolicy:
+    """Search results, keyed on the normalized query, fresh for ``ttl`` seconds."""
+
+    def key(arguments: Dict[str, Any]) -> Optional[Hashable]:
+        query = " ".join(str(arguments.get("query") or "").lower().split())
+        return query or None
+
+    def is_error(result: Any) -> bool:
+        # Failures, rate limiting and empty result sets are worth retrying soon
+        return not isinstance(result, dict) or "error" in result or "note" in result or not result.get("total_results")
+
+    return CachePolicy(key=key, ttl=lambda arguments: ttl, is_error=is_error, error_ttl=error_ttl, max_entries=max_entries)
+
+
+def rollup_interval(time_period: str) -> int:
+    """The Datadog rollup interval of a query over time_period ("1h", "7d"; else 1h)."""
+    try:
+        window = int(time_period[:-1]) * _PERIOD_SECONDS[time_period[-1]]
+    except (KeyError, ValueError, IndexError):
+        window = 3600
+    return next((interval for interval in ROLLUP_INTERVALS if window / interval <= 300), ROLLUP_INTERVALS[-1])
+
+
+def datadog_policy(error_ttl: float, max_entries: int) -> CachePolicy:
+    """
+    Datadog results, keyed on the query plus the current rollup bucket.
+
+    Within one rollup interval the query returns the same points, so a
+    result is fresh until the bucket ends.
+    """
+
+    def key(arguments: Dict[str, Any]) -> Optional[Hashable]:
+        query = str(arguments.get("metric_query") or "").strip()
+        if not query:
+            return None
+        period = str(arguments.get("time_period") or "1h")
+        interval = rollup_interval(period)
+        return query, period, int(time.time() // interval)
+
+    def ttl(arguments: Dict[str, Any]) -> float:
+        interval = rollup_interval(str(arguments.get("time_period") or "1h"))
+        return interval - time.time() % interval
+
+    def is_error(result: Any) -> bool:
+        return not isinstance(result, dict) or not result.get("success")
+
+    return CachePolicy(key=key, ttl=ttl, is_error=is_error, error_ttl=error_ttl, max_entries=max_entries)
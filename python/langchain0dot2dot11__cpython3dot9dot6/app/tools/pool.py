@@ -0,0 +1,72 @@
+"""Bounded thread pool for tools without native async support."""
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+from langchain_core.tools import BaseTool, StructuredTool
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_pool() -> ThreadPoolExecutor:
+    """Get the shared tool thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.TOOL_THREAD_POOL_SIZE,
+                    thread_name_prefix="tool-pool"
+                )
+                logger.info(f"Tool thread pool started with {config.TOOL_THREAD_POOL_SIZE} workers")
+    return _executor
+
+
+def shutdown_tool_pool() -> None:
+    """Shut the tool thread pool down (a later call starts a new one)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_in_tool_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking function on the tool pool without blocking the event loop.
+
+    The caller's context variables (LangChain callbacks, tracing) are copied
+    to the worker thread. When every worker is busy, calls queue instead of
+    starting more threads.
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_tool_pool(), call)
+
+
+def with_async_fallback(tool: BaseTool) -> BaseTool:
+    """
+    Give a sync-only tool an async path that runs it on the tool pool.
+
+    Tools that already have a coroutine are returned unchanged. Without one,
+    LangChain runs sync tools on the event loop's default executor, which is
+    shared with everything else and sized by CPU count.
+
+    Args:
+        tool: The tool to wrap
+
+    Returns:
+        The tool, or a copy with ``coroutine`` set
+    """
+    if isinstance(tool, StructuredTool) and tool.coroutine is None and tool.func is not None:
+        return tool.model_copy(update={"coroutine": functools.partial(run_in_tool_pool, tool.func)})
+    return tool
@@ -1,12 +1,15 @@
 """FastAPI application for LangChain tool calling."""
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from app.api.chat import router as chat_router
+from app.api.responses import FastJSONResponse
 from app.core.config import config
+from app.core.readiness import ReadinessProbe, check_agent, check_config, check_datadog, check_openai
 from app.models.schemas import HealthResponse, ErrorResponse
+from app.tools.pool import shutdown_tool_pool
 
 # Configure logging
 logging.basicConfig(
@@ -15,6 +18,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Background dependency checks behind /readyz
+readiness = ReadinessProbe(interval=config.READINESS_INTERVAL, timeout=config.READINESS_TIMEOUT)
+readiness.add_check("config", check_config)
+readiness.add_check("agent", check_agent)
+readiness.add_check("openai", check_openai)
+readiness.add_check("datadog", check_datadog, critical=False)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
@@ -29,8 +39,8 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Configuration validation failed: {str(e)}")
         # Continue anyway for development purposes
     
-    # Initialize agent (lazy loading)
-    logger.info("🤖 Agent will be initialized on first request")
+    # The readiness probe's first run initializes the agent off the event loop
+    readiness.start()
     
     logger.info("🚀 LangChain Tool Calling API started successfully")
     
@@ -38,6 +48,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down LangChain Tool Calling API...")
+    await readiness.close()
+    shutdown_tool_pool()
 
 # Create FastAPI app
 app = FastAPI(
@@ -63,10 +75,10 @@ app.include_router(chat_router)
 async def health_check():
     """Health check endpoint."""
     try:
-        return HealthResponse(
+        return FastJSONResponse(HealthResponse(
             status="healthy",
             message=f"{config.APP_TITLE} is running"
-        )
+        ))
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(
@@ -82,6 +94,19 @@ async def simple_health():
     """Simple health endpoint for load balancers."""
     return {"status": "ok"}
 
+_LIVE_BODY = b'{"status":"alive"}'
+
+@app.get("/livez")
+async def livez():
+    """Liveness: the process answers. Does no work and checks no dependency."""
+    return Response(content=_LIVE_BODY, media_type="application/json")
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the cached result of the background dependency checks (503 when not ready)."""
+    ready, report = readiness.status()
+    return FastJSONResponse(report, status_code=200 if ready else 503)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,7 +1,7 @@
 """API tests for FastAPI endpoints."""
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 import os
 from main import app
 
@@ -51,11 +51,11 @@ class TestAPI:
         """Test successful chat endpoint."""
         # Mock agent response
         mock_agent = MagicMock()
-        mock_agent.process_message.return_value = {
+        mock_agent.aprocess_message = AsyncMock(return_value={
             "response": "Hello! How can I help you?",
             "session_id": "test-session",
             "success": True
-        }
+        })
         mock_get_agent.return_value = mock_agent
         
         response = self.client.post(
@@ -74,11 +74,11 @@ class TestAPI:
         """Test chat endpoint with custom session ID."""
         # Mock agent response
         mock_agent = MagicMock()
-        mock_agent.process_message.return_value = {
+        mock_agent.aprocess_message = AsyncMock(return_value={
             "response": "Continuing conversation",
             "session_id": "custom-session-123",
             "success": True
-        }
+        })
         mock_get_agent.return_value = mock_agent
         
         response = self.client.post(
@@ -128,12 +128,12 @@ class TestAPI:
         """Test chat endpoint when agent returns error."""
         # Mock agent error response
         mock_agent = MagicMock()
-        mock_agent.process_message.return_value = {
+        mock_agent.aprocess_message = AsyncMock(return_value={
             "response": "Error occurred",
             "session_id": "test-session",
             "success": False,
             "error": "Agent processing failed"
-        }
+        })
         mock_get_agent.return_value = mock_agent
         
         response = self.client.post(
@@ -0,0 +1,57 @@
+"""Tests for lazy configuration loading and the import profiler."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from app.core.config import config, get_config, reload_config
+from app.import_profile import package_totals, parse_importtime, profile_imports
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestConfig:
+    """Test cases for configuration loading."""
+
+    def teardown_method(self):
+        """Restore the configuration read from the real environment."""
+        reload_config()
+
+    def test_config_is_read_once_and_reloaded_on_demand(self):
+        """Test the configuration is cached until reloaded."""
+        assert get_config() is get_config()
+
+        with patch.dict(os.environ, {"DATADOG_API_KEY": "dd-api", "DATADOG_APP_KEY": "dd-app"}):
+            reload_config()
+            assert config.is_datadog_configured()
+            assert config.DATADOG_API_KEY == "dd-api"
+
+    def test_importing_config_does_no_io(self):
+        """Test importing the config module reads nothing until first use."""
+        result = subprocess.run(
+            [sys.executable, "-c", "import app.core.config as c; print(c.get_config.cache_info().misses)"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "0"
+
+
+class TestImportProfile:
+    """Test cases for the import profiler."""
+
+    def test_parse_importtime(self):
+        """Test parsing of -X importtime output."""
+        timings = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       300 |        300 |   app.core.config\n"
+            "import time:      1500 |       1800 | main\n"
+        )
+        assert [t.module for t in timings] == ["app.core.config", "main"]
+        assert package_totals(timings) == {"app": 300, "main": 1500}
+
+    def test_profile_imports_of_the_app(self):
+        """Test profiling the application's imports."""
+        timings = profile_imports(["main"])
+        main = next(t for t in timings if t.module == "main")
+        print(f"\nmain imports in {main.cumulative_us / 1000:.0f}ms")
+        assert "app.core.agent" in {t.module for t in timings}
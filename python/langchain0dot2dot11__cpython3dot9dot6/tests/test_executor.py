@@ -0,0 +1,106 @@
+"""Tests for concurrent tool calls with deadlines."""
+import asyncio
+import time
+from typing import Any, List, Optional
+from unittest.mock import patch
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from app.core.agent import LangChainAgent
+from app.tools.pool import shutdown_tool_pool
+
+TOOL_LATENCY = 0.1
+
+
+@tool
+def slow_search(query: str) -> str:
+    """Search (a blocking stand-in)."""
+    time.sleep(TOOL_LATENCY)
+    return f"search: {query}"
+
+
+@tool
+def slow_metrics(query: str) -> str:
+    """Query metrics (a blocking stand-in)."""
+    time.sleep(TOOL_LATENCY)
+    return f"metrics: {query}"
+
+
+class MultiToolChatModel(BaseChatModel):
+    """Calls every tool in one turn, then answers with their results in order."""
+
+    tools: List[str] = ["slow_search", "slow_metrics"]
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-multi-tool"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "MultiToolChatModel":
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        results = [m.content for m in messages if isinstance(m, ToolMessage)]
+        if results:
+            message = AIMessage(content=" | ".join(results))
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": {"query": "cpu"}, "id": f"call_{i}"} for i, name in enumerate(self.tools)
+            ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class TestParallelToolExecutor:
+    """Test cases for concurrent tool execution within a step."""
+
+    def make_agent(self, **timeouts):
+        """Build an agent on the multi-tool stub, with the given deadlines."""
+        with patch('app.core.config.config.validate_required_config'), \
+             patch('app.core.agent.ChatOpenAI', return_value=MultiToolChatModel()), \
+             patch('app.core.agent.AVAILABLE_TOOLS', [slow_search, slow_metrics]):
+            agent = LangChainAgent()
+        for name, value in timeouts.items():
+            setattr(agent.agent_executor, name, value)
+        return agent
+
+    def teardown_method(self):
+        """Stop the tool pool started by the test."""
+        shutdown_tool_pool()
+
+    def test_tool_calls_in_a_step_run_concurrently(self):
+        """Test a step takes the slowest tool's time, not the sum, with results in call order."""
+        agent = self.make_agent()
+
+        start = time.perf_counter()
+        sequential = agent.process_message("check")
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = asyncio.run(agent.aprocess_message("check"))
+        concurrent_time = time.perf_counter() - start
+
+        assert concurrent["response"] == sequential["response"] == "search: cpu | metrics: cpu"
+        print(f"\nTwo {TOOL_LATENCY * 1000:.0f}ms tools: invoke {sequential_time * 1000:.0f}ms, "
+              f"ainvoke {concurrent_time * 1000:.0f}ms")
+        assert sequential_time >= 2 * TOOL_LATENCY
+        assert concurrent_time < 1.7 * TOOL_LATENCY
+
+    def test_slow_tools_time_out(self):
+        """Test a tool over its timeout is abandoned and observed as an error."""
+        agent = self.make_agent(tool_timeouts={"slow_metrics": 0.02})
+
+        result = asyncio.run(agent.aprocess_message("check"))
+
+        assert result["response"] == "search: cpu | Error: slow_metrics timed out after 0.02s. Answer without its result."
+        assert agent.agent_executor.timed_out == {"slow_metrics": 1}
+
+    def test_step_deadline_caps_every_tool(self):
+        """Test the step deadline bounds tools whose own timeout is longer."""
+        agent = self.make_agent(step_timeout=0.02)
+
+        start = time.perf_counter()
+        result = asyncio.run(agent.aprocess_message("check"))
+
+        assert time.perf_counter() - start < TOOL_LATENCY
+        assert result["response"].count("timed out after 0.02s") == 2
+        assert agent.agent_executor.timeout_for("slow_search") == 0.02
@@ -0,0 +1,185 @@
+"""Tests for per-session conversation memory."""
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+from app.core.agent import LangChainAgent, reset_agent
+from app.core.memory import InMemorySessionStore, SessionStore, SQLiteSessionStore, estimate_tokens
+
+
+def turn(text: str):
+    return [HumanMessage(content=text), AIMessage(content=f"re: {text}")]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    """Build stores of either backend."""
+    stores = []
+
+    def make(**kwargs):
+        limits = {"max_sessions": 10, "ttl_seconds": 60, "max_tokens": 1000, **kwargs}
+        if request.param == "sqlite":
+            store = SQLiteSessionStore(str(tmp_path / "sessions.db"), **limits)
+        else:
+            store = InMemorySessionStore(**limits)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        if isinstance(store, SQLiteSessionStore):
+            store.close()
+
+
+class TestSessionStore:
+    """Test cases for both session store backends."""
+
+    def test_history_round_trip(self, make_store):
+        """Test turns are returned in order, per session."""
+        store = make_store()
+        store.append("a", turn("first"))
+        store.append("a", turn("second"))
+        store.append("b", turn("other"))
+
+        assert [m.content for m in store.get("a")] == ["first", "re: first", "second", "re: second"]
+        assert isinstance(store.get("a")[0], HumanMessage)
+        assert store.get("missing") == []
+        assert store.session_stats("a")["messages"] == 4
+        assert store.delete("b") and store.get("b") == []
+
+    def test_oldest_turns_are_truncated_to_the_token_cap(self, make_store):
+        """Test history is trimmed to max_tokens, dropping whole turns."""
+        cap = estimate_tokens(turn("x" * 40)) * 2
+        store = make_store(max_tokens=cap)
+        for i in range(5):
+            store.append("a", turn(f"{i}" * 40))
+
+        assert [m.content for m in store.get("a")][::2] == ["3" * 40, "4" * 40]
+        assert store.session_stats("a")["tokens"] <= cap
+        assert store.stats()["truncated_turns"] == 3
+
+    def test_least_recently_used_sessions_are_evicted(self, make_store):
+        """Test sessions past max_sessions are evicted least recently used first."""
+        store = make_store(max_sessions=2)
+        store.append("a", turn("1"))
+        store.append("b", turn("2"))
+        store.append("a", turn("3"))
+        store.append("c", turn("4"))
+
+        assert store.get("b") == []
+        assert store.get("a") and store.get("c")
+        stats = store.stats()
+        assert stats["sessions"] == 2
+        assert stats["evictions"]["lru"] == 1
+
+    def test_idle_sessions_expire(self, make_store):
+        """Test sessions idle longer than the TTL are forgotten."""
+        store = make_store(ttl_seconds=0.05)
+        store.append("a", turn("1"))
+        time.sleep(0.1)
+        store.append("b", turn("2"))
+
+        assert store.get("a") == []
+        assert store.session_stats("a") is None
+        assert store.stats()["evictions"]["ttl"] == 1
+
+    def test_sqlite_history_survives_a_restart(self, tmp_path):
+        """Test a new process sees the sessions written by the last one."""
+        path = str(tmp_path / "sessions.db")
+        store = SQLiteSessionStore(path, max_sessions=10, ttl_seconds=60, max_tokens=1000)
+        store.append("a", turn("remember me"))
+        store.close()
+
+        restarted = SQLiteSessionStore(path, max_sessions=10, ttl_seconds=60, max_tokens=1000)
+        assert restarted.get("a")[0].content == "remember me"
+        restarted.close()
+
+    def test_incomplete_stores_cannot_be_created(self):
+        """Test a store missing any storage method fails when built, not when used."""
+        class GetOnlyStore(SessionStore):
+            def get(self, session_id):
+                return []
+
+        with pytest.raises(TypeError, match="abstract"):
+            GetOnlyStore(max_sessions=10, ttl_seconds=60, max_tokens=1000)
+
+
+class TestAgentMemory:
+    """Test cases for conversation memory in the agent."""
+
+    def setup_method(self):
+        """Build an agent with a mocked executor."""
+        reset_agent()
+        with patch('app.core.config.config.validate_required_config'), \
+             patch('app.core.agent.ChatOpenAI'), \
+             patch('app.core.agent.create_tool_calling_agent'), \
+             patch('app.core.agent.ParallelToolExecutor') as mock_executor:
+            self.executor = MagicMock()
+            self.executor.invoke.side_effect = lambda inputs: {"output": f"answer to {inputs['input']}"}
+            mock_executor.return_value = self.executor
+            self.agent = LangChainAgent()
+
+    def teardown_method(self):
+        """Clean up after tests."""
+        reset_agent()
+
+    def test_session_history_is_sent_with_later_turns(self):
+        """Test a session's earlier turns reach the agent; other sessions start cold."""
+        self.agent.process_message("My name is Ada", session_id="s1")
+        self.agent.process_message("What is my name?", session_id="s1")
+        self.agent.process_message("Hello", session_id="s2")
+
+        histories = [call.args[0]["chat_history"] for call in self.executor.invoke.call_args_list]
+        assert histories[0] == []
+        assert [m.content for m in histories[1]] == ["My name is Ada", "answer to My name is Ada"]
+        assert histories[2] == []
+
+    def test_failed_turns_are_not_remembered(self):
+        """Test errors leave the session's history unchanged."""
+        self.executor.invoke.side_effect = Exception("boom")
+        self.agent.process_message("Hello", session_id="s1")
+        assert self.agent.memory.get("s1") == []
+
+    def test_sqlite_history_is_read_and_written_off_the_event_loop(self, tmp_path):
+        """Test the async path runs SQLite calls on executor threads."""
+        threads = []
+
+        class RecordingStore(SQLiteSessionStore):
+            def get(self, session_id):
+                threads.append(threading.get_ident())
+                return super().get(session_id)
+
+            def append(self, session_id, messages):
+                threads.append(threading.get_ident())
+                super().append(session_id, messages)
+
+        self.agent.memory = RecordingStore(str(tmp_path / "sessions.db"), max_sessions=10, ttl_seconds=60, max_tokens=1000)
+        self.executor.ainvoke.side_effect = lambda inputs: asyncio.sleep(0, {"output": "hi"})
+
+        async def chat():
+            loop_thread = threading.get_ident()
+            await self.agent.aprocess_message("Hello", session_id="s1")
+            return loop_thread
+
+        loop_thread = asyncio.run(chat())
+        self.agent.memory.close()
+
+        assert len(threads) == 2
+        assert loop_thread not in threads
+
+    def test_memory_endpoints(self):
+        """Test memory usage is reported per store and per session."""
+        from main import app
+        client = TestClient(app)
+        self.agent.process_message("Hello", session_id="s1")
+
+        with patch('app.api.chat.get_agent', return_value=self.agent):
+            stats = client.get("/api/v1/chat/memory").json()
+            assert stats["backend"] == "memory"
+            assert stats["sessions"] == 1
+            assert client.get("/api/v1/chat/sessions/s1").json()["messages"] == 2
+            assert client.delete("/api/v1/chat/sessions/s1").status_code == 200
+            assert client.get("/api/v1/chat/sessions/s1").status_code == 404
@@ -0,0 +1,98 @@
+"""Tests for the liveness and readiness endpoints."""
+import asyncio
+from unittest.mock import MagicMock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.core.readiness import ReadinessProbe, check_agent, check_datadog
+
+
+async def _ok():
+    return {"detail": 1}
+
+
+async def _fail():
+    raise RuntimeError("unreachable")
+
+
+async def _hang():
+    await asyncio.sleep(10)
+
+
+class TestReadinessProbe:
+    """Test cases for the background readiness probe."""
+
+    def test_critical_failures_make_the_service_unready(self):
+        """Test only critical checks decide readiness, and slow checks time out."""
+        probe = ReadinessProbe(interval=10.0, timeout=0.05)
+        probe.add_check("agent", _ok)
+        probe.add_check("datadog", _fail, critical=False)
+        assert probe.status() == (False, {"status": "starting", "checks": {}})
+
+        asyncio.run(probe.refresh())
+        ready, report = probe.status()
+        assert ready
+        assert report["checks"]["agent"]["detail"] == 1
+        assert report["checks"]["datadog"]["error"] == "unreachable"
+
+        probe.add_check("openai", _hang)
+        asyncio.run(probe.refresh())
+        ready, report = probe.status()
+        assert not ready
+        assert report["checks"]["openai"]["error"] == "timed out after 0.05s"
+
+    def test_stale_results_are_not_ready(self):
+        """Test a probe that stopped refreshing reports not ready."""
+        probe = ReadinessProbe(interval=1.0, timeout=1.0)
+        probe.add_check("agent", _ok)
+        asyncio.run(probe.refresh())
+        assert probe.status()[0]
+
+        probe._checked_at -= 3.5
+        assert probe.status()[1]["status"] == "not_ready"
+
+    @patch('app.core.agent.get_agent')
+    def test_agent_check_initializes_the_agent(self, mock_get_agent):
+        """Test the agent check builds the agent and reports its tools."""
+        mock_get_agent.return_value.agent_executor.tools = [MagicMock(), MagicMock()]
+        assert asyncio.run(check_agent()) == {"tools": 2}
+        mock_get_agent.assert_called_once()
+
+    @patch('app.core.readiness.config')
+    def test_datadog_check_requires_keys(self, mock_config):
+        """Test the Datadog check fails without API keys."""
+        mock_config.is_datadog_configured.return_value = False
+        with pytest.raises(RuntimeError, match="not set"):
+            asyncio.run(check_datadog())
+
+
+class TestHealthEndpoints:
+    """Test cases for /livez and /readyz."""
+
+    def test_readyz_serves_the_cached_result(self):
+        """Test polling /readyz never re-runs the checks."""
+        from main import app, readiness
+        calls = []
+
+        async def counted():
+            calls.append(1)
+            return {}
+
+        with patch.object(readiness, "_checks", []):
+            readiness.add_check("agent", counted)
+            with TestClient(app) as client:
+                assert client.get("/livez").json() == {"status": "alive"}
+                for _ in range(20):
+                    response = client.get("/readyz")
+            assert response.status_code == 200
+            assert response.json()["status"] == "ready"
+            assert len(calls) == 1
+
+    def test_readyz_is_503_until_checks_pass(self):
+        """Test /readyz answers 503 while a critical check fails."""
+        from main import app, readiness
+        with patch.object(readiness, "_checks", []), patch.object(readiness, "_results", {}):
+            readiness.add_check("openai", _fail)
+            asyncio.run(readiness.refresh())
+            response = TestClient(app).get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["checks"]["openai"]["error"] == "unreachable"
@@ -0,0 +1,102 @@
+"""Tests for streaming agent events."""
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGenerationChunk
+from app.api.streaming import encode_event, with_keepalive
+from app.core.agent import LangChainAgent, reset_agent
+from app.tools.pool import shutdown_tool_pool
+from tests.test_agent import StubChatModel, stub_lookup
+
+
+class StreamingStubChatModel(StubChatModel):
+    """The stub model, streaming its final answer word by word."""
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages).generations[0].message
+        if not any(isinstance(m, ToolMessage) for m in messages):
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{
+                "name": "stub_lookup", "args": json.dumps(message.tool_calls[0]["args"]), "id": "call_1", "index": 0
+            }]))
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+async def collect(events: AsyncIterator[Any]) -> List[Any]:
+    return [event async for event in events]
+
+
+class TestStreaming:
+    """Test cases for streaming chat events."""
+
+    def setup_method(self):
+        """Build an agent on the streaming stub LLM and tool."""
+        reset_agent()
+        with patch('app.core.config.config.validate_required_config'), \
+             patch('app.core.agent.ChatOpenAI', return_value=StreamingStubChatModel()), \
+             patch('app.core.agent.AVAILABLE_TOOLS', [stub_lookup]):
+            self.agent = LangChainAgent()
+
+    def teardown_method(self):
+        """Clean up after tests."""
+        reset_agent()
+        shutdown_tool_pool()
+
+    def test_events_arrive_in_order(self):
+        """Test tool calls and answer tokens are streamed, then the final result."""
+        events = asyncio.run(collect(self.agent.astream_message("python", session_id="s1")))
+        types = [event["type"] for event in events]
+
+        assert types[:3] == ["start", "tool_start", "tool_end"]
+        assert events[1]["input"] == {"query": "python"}
+        assert events[2]["output"] == "result for python"
+        assert "".join(e["content"] for e in events if e["type"] == "token") == "Answer: result for python"
+        assert events[-1] == {"type": "final", "response": "Answer: result for python", "session_id": "s1", "success": True}
+        assert len(self.agent.memory.get("s1")) == 2
+
+    def test_errors_end_the_stream(self):
+        """Test failures are reported as an error event."""
+        events = asyncio.run(collect(self.agent.astream_message(" ")))
+        assert [e["type"] for e in events] == ["error"]
+
+        with patch.object(type(self.agent.agent_executor), "astream_events", side_effect=Exception("rate limit exceeded")):
+            events = asyncio.run(collect(self.agent.astream_message("Hello")))
+        assert [e["type"] for e in events] == ["start", "error"]
+        assert "rate limiting" in events[-1]["response"]
+
+    def test_stream_endpoint_formats(self):
+        """Test the endpoint sends SSE by default and NDJSON on request."""
+        from main import app
+        client = TestClient(app)
+        with patch('app.api.chat.get_agent', return_value=self.agent):
+            response = client.post("/api/v1/chat/stream", json={"message": "python"})
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert response.text.startswith("event: start\ndata: {")
+            assert "event: tool_end\n" in response.text
+
+            response = client.post(
+                "/api/v1/chat/stream", json={"message": "python"},
+                headers={"Accept": "application/x-ndjson"}
+            )
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert lines[-1]["type"] == "final"
+
+    def test_keepalives_while_idle(self):
+        """Test keepalives are sent while a step takes longer than the interval."""
+        async def slow():
+            yield {"type": "start"}
+            await asyncio.sleep(0.12)
+            yield {"type": "final"}
+
+        events = asyncio.run(collect(with_keepalive(slow(), 0.05)))
+        assert events[0] == {"type": "start"} and events[-1] == {"type": "final"}
+        assert events[1:-1] and all(event is None for event in events[1:-1])
+        assert encode_event(None, ndjson=False) == b": keepalive\n\n"
@@ -1,6 +1,10 @@
 """Unit tests for tools."""
+import asyncio
+import time
 import pytest
 from unittest.mock import patch, MagicMock
+from app.tools.cache import TOOL_CACHES, datadog_policy, rollup_interval, search_policy, tool_cache_stats, with_cache
+from app.tools.pool import shutdown_tool_pool
 from app.tools.search import search_tool
 from app.tools.datadog import datadog_metrics_tool
 
@@ -139,4 +143,96 @@ class TestDatadogTool:
                 })
         
         # Should still process with default 1h period
-        assert "time_period" in result["time_range"]
\ No newline at end of file
+        assert "time_period" in result["time_range"]
+
+
+SEARCH_HIT = [{"title": "Test Result", "body": "Test description", "href": "https://example.com"}]
+
+
+class TestToolCache:
+    """Test cases for the tool result cache."""
+
+    def setup_method(self):
+        """Keep test caches out of the registry used by the app."""
+        self.registry = patch.dict(TOOL_CACHES)
+        self.registry.start()
+
+    def teardown_method(self):
+        """Restore the registry and stop the tool pool."""
+        self.registry.stop()
+        shutdown_tool_pool()
+
+    @patch('app.tools.search.DDGS')
+    def test_search_results_are_cached_per_normalized_query(self, mock_ddgs):
+        """Test repeated searches are answered from the cache on both paths."""
+        text = mock_ddgs.return_value.__enter__.return_value.text
+        text.return_value = SEARCH_HIT
+        tool = with_cache(search_tool, search_policy(ttl=60, error_ttl=5, max_entries=10))
+
+        first = tool.invoke({"query": "FastAPI tutorial"})
+        assert tool.invoke({"query": "  fastapi   TUTORIAL "}) == first
+        assert asyncio.run(tool.ainvoke({"query": "fastapi tutorial"})) == first
+        assert text.call_count == 1
+
+        stats = tool_cache_stats()["search_tool"]
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.667)
+
+    @patch('app.tools.search.random.uniform', return_value=0)
+    @patch('app.tools.search.DDGS')
+    def test_errors_are_cached_briefly(self, mock_ddgs, mock_delay):
+        """Test failed searches use the short error TTL."""
+        text = mock_ddgs.return_value.__enter__.return_value.text
+        text.return_value = []
+        tool = with_cache(search_tool, search_policy(ttl=60, error_ttl=0.05, max_entries=10))
+
+        tool.invoke({"query": "nothing"})
+        tool.invoke({"query": "nothing"})
+        assert text.call_count == 3  # one call, three attempts
+        assert tool_cache_stats()["search_tool"]["error_hits"] == 1
+
+        time.sleep(0.1)
+        text.return_value = SEARCH_HIT
+        assert tool.invoke({"query": "nothing"})["total_results"] == 1
+
+    @patch('app.tools.search.DDGS')
+    def test_cache_is_bounded(self, mock_ddgs):
+        """Test the least recently used results are evicted past max_entries."""
+        mock_ddgs.return_value.__enter__.return_value.text.return_value = SEARCH_HIT
+        tool = with_cache(search_tool, search_policy(ttl=60, error_ttl=5, max_entries=2))
+
+        for query in ("a", "b", "a", "c"):
+            tool.invoke({"query": query})
+
+        stats = tool_cache_stats()["search_tool"]
+        assert (stats["entries"], stats["evictions"]) == (2, 1)
+        tool.invoke({"query": "b"})
+        assert tool_cache_stats()["search_tool"]["misses"] == 4
+
+    def test_datadog_results_are_keyed_on_the_rollup_bucket(self):
+        """Test Datadog queries are cached until their rollup interval ends."""
+        assert [rollup_interval(p) for p in ("1h", "24h", "7d", "10d", "bogus")] == [20, 300, 3600, 3600, 20]
+
+        policy = datadog_policy(error_ttl=5, max_entries=10)
+        arguments = {"metric_query": " system.cpu.user ", "time_period": "24h"}
+        with patch('app.tools.cache.time.time', return_value=3000.0):
+            assert policy.key(arguments) == ("system.cpu.user", "24h", 10)
+            assert policy.ttl(arguments) == 300
+        with patch('app.tools.cache.time.time', return_value=3299.0):
+            assert policy.key(arguments) == ("system.cpu.user", "24h", 10)
+            assert policy.ttl(arguments) == 1
+        assert policy.key({"metric_query": "", "time_period": "1h"}) is None
+        assert policy.is_error({"success": False, "error": "Datadog query failed"})
+
+    @patch('app.tools.datadog.config')
+    def test_datadog_tool_is_cached(self, mock_config):
+        """Test the cached Datadog tool skips the API within a rollup interval."""
+        mock_config.is_datadog_configured.return_value = True
+        tool = with_cache(datadog_metrics_tool, datadog_policy(error_ttl=5, max_entries=10))
+        with patch('app.tools.datadog.get_datadog_client'), \
+             patch('app.tools.datadog.MetricsApi') as mock_api:
+            mock_api.return_value.query_metrics.return_value = MagicMock(series=[])
+            first = tool.invoke({"metric_query": "system.cpu.user", "time_period": "7d"})
+            second = tool.invoke({"metric_query": "system.cpu.user", "time_period": "7d"})
+
+        assert first == second and first["success"]
+        assert mock_api.return_value.query_metrics.call_count == 1
@@ -1,5 +1,6 @@
 """FastAPI chat endpoints for LangGraph integration."""
 from fastapi import APIRouter, HTTPException
+from app.api.responses import FastJSONResponse
 from app.models.schemas import ChatRequest, ChatResponse, HealthResponse
 from app.core.graph import process_message
 from app.core.config import config
@@ -13,7 +14,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest) -> ChatResponse:
+async def chat_endpoint(request: ChatRequest) -> FastJSONResponse:
     """
     Process a chat message through the LangGraph workflow.
     
@@ -21,7 +22,7 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         request: Chat request containing message and optional thread_id
         
     Returns:
-        ChatResponse with AI response and thread_id
+        ChatResponse (as a FastJSONResponse) with AI response and thread_id
         
     Raises:
         HTTPException: If processing fails or configuration is invalid
@@ -52,10 +53,10 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         
         logger.info(f"Message processed successfully for thread: {result['thread_id']}")
         
-        return ChatResponse(
+        return FastJSONResponse(ChatResponse(
             response=result["response"],
             thread_id=result["thread_id"]
-        )
+        ))
         
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -68,12 +69,12 @@ async def chat_endpoint(request: ChatRequest) -> ChatResponse:
         )
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check() -> HealthResponse:
+async def health_check() -> FastJSONResponse:
     """
     Health check endpoint to verify service status.
     
     Returns:
-        HealthResponse indicating service status
+        HealthResponse (as a FastJSONResponse) indicating service status
     """
     try:
         # Check if configuration is valid
@@ -83,10 +84,10 @@ async def health_check() -> HealthResponse:
         
         logger.info(f"Health check performed: {status}")
         
-        return HealthResponse(
+        return FastJSONResponse(HealthResponse(
             status=status,
             version="1.0.0"
-        )
+        ))
         
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -1,46 +1,85 @@
 """Core configuration module for LangGraph application."""
+import logging
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any
 
-# Load environment variables from .env file
-load_dotenv(override=True)
+logger = logging.getLogger(__name__)
 
 class Config:
     """Configuration settings for the application."""
-    
-    # API Keys
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    DATADOG_API_KEY = os.getenv("DATADOG_API_KEY")
-    DATADOG_APP_KEY = os.getenv("DATADOG_APP_KEY")
-    
-    # Application settings
-    ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-    
+
     # LangGraph settings
     THREAD_TIMEOUT = 300  # 5 minutes
     MAX_ITERATIONS = 10
-    
+
     # FastAPI settings
     HOST = "0.0.0.0"
     PORT = 8000
-    DEBUG = ENVIRONMENT == "development"
-    
-    @classmethod
-    def validate_config(cls) -> bool:
+
+    def __init__(self):
+        """Read settings from the environment (use get_config() instead)."""
+        # API Keys
+        self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+        self.OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        self.DATADOG_API_KEY = os.getenv("DATADOG_API_KEY")
+        self.DATADOG_APP_KEY = os.getenv("DATADOG_APP_KEY")
+
+        # Application settings
+        self.ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+        self.DEBUG = self.ENVIRONMENT == "development"
+
+        # Request bodies larger than this get a 413 before they are parsed (0 = no limit)
+        self.MAX_REQUEST_BODY_BYTES = int(os.getenv("MAX_REQUEST_BODY_BYTES", str(256 * 1024)))
+
+        # Readiness probe: seconds between background checks, and per-check timeout
+        self.READINESS_INTERVAL = float(os.getenv("READINESS_INTERVAL", "15"))
+        self.READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", "5"))
+
+    def validate_config(self) -> bool:
         """Validate that all required configuration is present."""
-        required_keys = [
-            cls.OPENAI_API_KEY,
-            cls.DATADOG_API_KEY,
-            cls.DATADOG_APP_KEY,
-        ]
-        
-        missing_keys = [key for key in required_keys if not key]
-        
+        missing_keys = self.missing_keys()
+
         if missing_keys:
-            print(f"Missing required configuration: {missing_keys}")
+            logger.warning(f"Missing required configuration: {missing_keys}")
             return False
-        
+
         return True
 
+    def missing_keys(self) -> list:
+        """Names of the required settings that are not set."""
+        return [
+            name for name in ("OPENAI_API_KEY", "DATADOG_API_KEY", "DATADOG_APP_KEY")
+            if not getattr(self, name)
+        ]
+
+@lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Load environment variables from .env on first use and build the config once."""
+    from dotenv import load_dotenv
+    load_dotenv(override=True)
+    return Config()
+
+def reload_config() -> Config:
+    """Re-read .env and the environment; `config` resolves to the new values."""
+    get_config.cache_clear()
+    return get_config()
+
+class _LazyConfig:
+    """Stands in for the Config instance until an attribute is first read.
+
+    Importing this module does no I/O; attribute writes (test patches) go to
+    the cached instance.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_config(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_config(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(get_config(), name)
+
 # Global config instance
-config = Config()
\ No newline at end of file
+config: Config = _LazyConfig()  # type: ignore[assignment]
@@ -0,0 +1,68 @@
+"""Per-module import cost of the LangGraph service, for keeping cold starts fast.
+
+    python -m app.import_profile [--top N] [module ...]
+
+Imports the given modules (default: ``main``, what every server start and
+test session pays first) in a fresh interpreter under
+``python -X importtime`` and reports the slowest modules and the total per
+top-level package. The server itself can be profiled the same way by
+starting it with ``PYTHONPROFILEIMPORTTIME=1``.
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parse the ``import time:`` lines written to stderr by ``-X importtime``."""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        timings.append(ImportTiming(module.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+def profile_imports(modules: Sequence[str]) -> List[ImportTiming]:
+    """Import ``modules`` in a fresh interpreter and return every import's timing."""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def package_totals(timings: Sequence[ImportTiming]) -> Dict[str, int]:
+    """Self time in microseconds per top-level package."""
+    totals: Dict[str, int] = defaultdict(int)
+    for timing in timings:
+        totals[timing.module.split(".")[0]] += timing.self_us
+    return dict(totals)
+
+def format_report(timings: Sequence[ImportTiming], top: int = 15) -> str:
+    total_ms = sum(t.self_us for t in timings) / 1000
+    lines = [f"{len(timings)} modules imported in {total_ms:.1f}ms", "", "Slowest modules (cumulative, self):"]
+    for timing in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(f"  {timing.cumulative_us / 1000:8.1f}ms {timing.self_us / 1000:8.1f}ms  {timing.module}")
+    lines += ["", "By top-level package (self):"]
+    for package, self_us in sorted(package_totals(timings).items(), key=lambda item: item[1], reverse=True)[:top]:
+        lines.append(f"  {self_us / 1000:8.1f}ms  {package}")
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["main"], help="modules to import (default: main)")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    args = parser.parse_args(argv)
+    print(format_report(profile_imports(args.modules), args.top))
+
+if __name__ == "__main__":
+    main()
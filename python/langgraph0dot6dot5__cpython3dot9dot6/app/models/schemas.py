@@ -3,10 +3,13 @@ from typing import List, Optional, Any, Dict, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+# Longest accepted chat message, in characters
+MAX_MESSAGE_LENGTH = 32_000
+
 # Request/Response schemas for FastAPI
 class ChatRequest(BaseModel):
     """Request schema for chat endpoint."""
-    message: str = Field(..., description="User message to process")
+    message: str = Field(..., max_length=MAX_MESSAGE_LENGTH, description="User message to process")
     thread_id: Optional[str] = Field(None, description="Thread ID for conversation continuity")
 
 class ChatResponse(BaseModel):
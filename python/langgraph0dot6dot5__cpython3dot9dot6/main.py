@@ -1,8 +1,11 @@
 """Main FastAPI application entry point for LangGraph chat service."""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.body_limit import BodySizeLimitMiddleware
 from app.api.chat import router as chat_router
+from app.api.responses import FastJSONResponse
 from app.core.config import config
+from app.core.readiness import ReadinessProbe, check_config, check_datadog, check_graph, check_openai
 import logging
 import uvicorn
 
@@ -10,6 +13,13 @@ import uvicorn
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Background dependency checks behind /readyz
+readiness = ReadinessProbe(interval=config.READINESS_INTERVAL, timeout=config.READINESS_TIMEOUT)
+readiness.add_check("config", check_config)
+readiness.add_check("graph", check_graph)
+readiness.add_check("openai", check_openai)
+readiness.add_check("datadog", check_datadog, critical=False)
+
 # Create FastAPI application
 app = FastAPI(
     title="LangGraph Chat API",
@@ -18,6 +28,9 @@ app = FastAPI(
     debug=config.DEBUG
 )
 
+# Reject oversized request bodies before they are read and validated
+app.add_middleware(BodySizeLimitMiddleware, default_limit=config.MAX_REQUEST_BODY_BYTES)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,6 +52,8 @@ async def root():
         "status": "running",
         "endpoints": {
             "health": "/api/v1/health",
+            "livez": "/livez",
+            "readyz": "/readyz",
             "chat": "/api/v1/chat",
             "docs": "/docs"
         }
@@ -57,12 +72,27 @@ async def startup_event():
             detail="Server configuration error: missing required API keys"
         )
     
+    readiness.start()
     logger.info("LangGraph Chat API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event handler."""
     logger.info("Shutting down LangGraph Chat API...")
+    await readiness.close()
+
+_LIVE_BODY = b'{"status":"alive"}'
+
+@app.get("/livez")
+async def livez():
+    """Liveness probe: answers without doing any work or checking dependencies."""
+    return Response(content=_LIVE_BODY, media_type="application/json")
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: the cached result of the background checks (503 when not ready)."""
+    ready, report = readiness.status()
+    return FastJSONResponse(report, status_code=200 if ready else 503)
 
 if __name__ == "__main__":
     # Run the application
@@ -1,4 +1,5 @@
 """Test suite for LangGraph Chat API endpoints."""
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -165,6 +166,68 @@ class TestChatAPI:
         
         assert response.status_code == 422  # Validation error
 
+    def test_chat_endpoint_rejects_oversized_body(self):
+        """Test oversized bodies get a 413 before they are parsed."""
+        from app.api import body_limit
+        before = body_limit.rejected_bytes.get("default", 0)
+
+        response = client.post("/api/v1/chat", json={"message": "x" * (512 * 1024)})
+
+        assert response.status_code == 413
+        assert "Request body too large" in response.json()["detail"]
+        assert body_limit.rejected_bytes["default"] - before > 512 * 1024
+
+    def test_chat_endpoint_rejects_overlong_message(self):
+        """Test messages over the length limit fail validation."""
+        response = client.post("/api/v1/chat", json={"message": "x" * 40_000})
+        assert response.status_code == 422
+
+class TestHealthProbes:
+    """Test cases for the liveness and readiness probes."""
+
+    def test_livez(self):
+        """Test liveness answers without any dependency."""
+        response = client.get("/livez")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    def test_readyz_serves_the_cached_result(self):
+        """Test polling /readyz never re-runs the checks."""
+        from main import readiness
+        calls = []
+
+        async def counted():
+            calls.append(1)
+            return {}
+
+        with patch.object(readiness, "_checks", []), patch.object(readiness, "_results", {}):
+            readiness.add_check("graph", counted)
+            asyncio.run(readiness.refresh())
+            for _ in range(20):
+                response = client.get("/readyz")
+            assert response.status_code == 200
+            assert response.json()["status"] == "ready"
+            assert len(calls) == 1
+
+    def test_readyz_fails_on_critical_checks_only(self):
+        """Test a failing critical check answers 503, a non-critical one does not."""
+        from app.core.readiness import ReadinessProbe, check_config, check_datadog
+
+        probe = ReadinessProbe(interval=10.0, timeout=1.0)
+        probe.add_check("datadog", check_datadog, critical=False)
+        with patch("app.core.readiness.config") as mock_config:
+            mock_config.DATADOG_API_KEY = None
+            asyncio.run(probe.refresh())
+            assert probe.status()[0]
+
+            mock_config.missing_keys.return_value = ["OPENAI_API_KEY"]
+            probe.add_check("config", check_config)
+            asyncio.run(probe.refresh())
+        ready, report = probe.status()
+        assert not ready
+        assert report["checks"]["config"]["error"] == "Missing required configuration: OPENAI_API_KEY"
+        assert report["checks"]["datadog"]["critical"] is False
+
 if __name__ == "__main__":
     # Run tests
     pytest.main([__file__, "-v"])
\ No newline at end of file
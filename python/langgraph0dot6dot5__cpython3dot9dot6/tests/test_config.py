@@ -0,0 +1,51 @@
+"""Test suite for lazy configuration loading and import profiling."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from app.core.config import config, get_config, reload_config
+from app.import_profile import package_totals, parse_importtime
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+class TestConfig:
+    """Test cases for configuration loading."""
+
+    def teardown_method(self):
+        """Restore the configuration read from the real environment."""
+        reload_config()
+
+    def test_config_is_read_once_and_reloaded_on_demand(self):
+        """Test the config is cached until explicitly reloaded."""
+        cached = get_config()
+        assert get_config() is cached
+
+        with patch.dict(os.environ, {"ENVIRONMENT": "production"}):
+            assert get_config() is cached
+            reload_config()
+            assert config.ENVIRONMENT == "production"
+            assert config.DEBUG is False
+
+    def test_importing_config_does_no_io(self):
+        """Test importing the config module reads nothing until first use."""
+        result = subprocess.run(
+            [sys.executable, "-c", "import app.core.config as c; print(c.get_config.cache_info().misses)"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "0"
+
+class TestImportProfile:
+    """Test cases for the import profiler."""
+
+    def test_parse_importtime(self):
+        """Test parsing of -X importtime output."""
+        timings = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       400 |        400 |   app.core.graph\n"
+            "import time:      1200 |       1600 | main\n"
+        )
+        assert [t.module for t in timings] == ["app.core.graph", "main"]
+        assert package_totals(timings) == {"app": 400, "main": 1200}